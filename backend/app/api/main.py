@@ -1,18 +1,74 @@
 from __future__ import annotations
 
-from datetime import date
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+import os
 from pathlib import Path
+import secrets
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
+from app.api.scheduler import SyncScheduler, load_scheduler_settings
+from app.api.sync_jobs import SyncJob, SyncJobManager, format_sse
+from app.compression import CompressionMiddleware, choose_encoding, load_compression_settings
+from app.dashboard.bundle import fetch_dashboard_bundle
+from app.dashboard.cache import (
+    CachedResponse,
+    encoded_etag,
+    etag_matches,
+    fetch_data_version,
+    load_dashboard_cache,
+)
+from app.dashboard.daily_store import load_daily_store
+from app.dashboard.formats import SeriesFormat, SeriesStream, UnsupportedFormat, negotiate_format
+from app.dashboard.invalidation import apply_data_change, load_data_change_listener
+from app.dashboard.kpi_snapshots import get_kpi_snapshot, kpi_response
+from app.dashboard.presets import PRESETS
+from app.dashboard.series import (
+    DEFAULT_MAX_POINTS,
+    DEFAULT_ROLLING_MIN_POINTS,
+    DEFAULT_ROLLING_WINDOW,
+    METRIC_COLUMNS,
+    RESOLUTIONS,
+    ROLLING_METRICS,
+    choose_resolution,
+    fetch_rolling_comparison,
+    stream_series,
+)
+from app.ingest.db import SourceWriteResult, add_run_finalized_listener, get_connection
 from app.ingest.run_backfill import run_incremental_sync
+from app.ingest.run_export import ExportRequest, stream_export
+from app.instrumentation import INGEST_METRICS
+from app.profiling import ProfileSession, profiling
 
 repo_root = Path(__file__).resolve().parents[3]
 load_dotenv(repo_root / ".env")
 
-app = FastAPI(title="Orkunotkun API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    settings = load_scheduler_settings()
+    scheduler = SyncScheduler(sync_jobs, settings) if settings.enabled else None
+    cache_listener = load_data_change_listener(dashboard_cache, daily_store)
+    if cache_listener:
+        cache_listener.start()
+    if scheduler:
+        scheduler.start()
+    try:
+        yield
+    finally:
+        if scheduler:
+            await scheduler.stop()
+        if cache_listener:
+            await asyncio.to_thread(cache_listener.stop)
+
+
+app = FastAPI(title="Orkunotkun API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,6 +82,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+compression_settings = load_compression_settings()
+# Event streams and already-compressed media types are excluded, so sync progress is never buffered.
+app.add_middleware(CompressionMiddleware, settings=compression_settings)
 
 
 @app.get("/health")
@@ -33,20 +92,346 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/sync-data")
-async def sync_data() -> dict[str, object]:
-    results = await run_incremental_sync(backtrack_days=2, to_date=date.today())
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(INGEST_METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+# Callers of /debug/profile-next-sync waiting for the next sync job's profile report.
+_profile_waiters: list[asyncio.Future[dict[str, object]]] = []
+
+
+async def _run_sync_job(
+    force: bool,
+    sources: tuple[str, ...] | None,
+    on_result: Callable[[SourceWriteResult], None],
+) -> list[SourceWriteResult]:
+    # The sync does blocking database work, so it gets its own thread and event loop;
+    # results are handed back to this loop, which keeps the API and event streams responsive.
+    loop = asyncio.get_running_loop()
+    waiters = [waiter for waiter in _profile_waiters if not waiter.done()]
+    _profile_waiters.clear()
+    profile_session = ProfileSession() if waiters else None
+
+    def publish(result: SourceWriteResult) -> None:
+        loop.call_soon_threadsafe(on_result, result)
+
+    def run() -> list[SourceWriteResult]:
+        with profiling(profile_session):
+            return asyncio.run(
+                run_incremental_sync(
+                    backtrack_days=2,
+                    to_date=date.today(),
+                    force=force,
+                    on_result=publish,
+                    sources=sources,
+                )
+            )
+
+    try:
+        return await asyncio.to_thread(run)
+    finally:
+        if profile_session:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(profile_session.report())
+
+
+sync_jobs = SyncJobManager(_run_sync_job)
+
+
+def _get_sync_job(job_id: str) -> SyncJob:
+    job = sync_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown sync job")
+    return job
+
 
+@app.post("/sync-data", status_code=202)
+async def sync_data(force: bool = False) -> dict[str, object]:
+    job, joined = sync_jobs.start_or_join(force=force)
     return {
-        "success": True,
-        "sources": [
-            {
-                "source": result.source_name,
-                "status": result.status,
-                "rows_written": result.rows_written,
-                "sync_window": (result.details or {}).get("sync_window"),
-                "message": result.message,
-            }
-            for result in results
-        ],
+        **job.to_dict(),
+        "joined": joined,
+        "status_url": f"/sync-data/{job.id}",
+        "events_url": f"/sync-data/{job.id}/events",
+    }
+
+
+@app.get("/sync-data/{job_id}")
+async def sync_job_status(job_id: str) -> dict[str, object]:
+    return _get_sync_job(job_id).to_dict()
+
+
+@app.get("/sync-data/{job_id}/events")
+async def sync_job_events(job_id: str) -> StreamingResponse:
+    job = _get_sync_job(job_id)
+
+    async def stream() -> AsyncIterator[bytes]:
+        async for event, payload in job.events():
+            yield format_sse(event, payload)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _require_profiling_token(authorization: str | None) -> None:
+    token = os.getenv("PROFILING_TOKEN")
+    if not token:
+        # Profiling is opt-in; without a configured token the endpoint does not exist.
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, supplied = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(supplied.encode(), token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid profiling token", headers={"WWW-Authenticate": "Bearer"})
+
+
+@app.post("/debug/profile-next-sync")
+async def profile_next_sync(
+    authorization: str | None = Header(default=None),
+    timeout_seconds: float = Query(default=900, gt=0),
+) -> dict[str, object]:
+    """Wait for the next sync job to start and finish, and return its per-source profile report."""
+    _require_profiling_token(authorization)
+    waiter: asyncio.Future[dict[str, object]] = asyncio.get_running_loop().create_future()
+    _profile_waiters.append(waiter)
+    try:
+        return await asyncio.wait_for(waiter, timeout=timeout_seconds)
+    except TimeoutError as error:
+        raise HTTPException(status_code=504, detail="No sync job ran before the timeout") from error
+    finally:
+        if waiter in _profile_waiters:
+            _profile_waiters.remove(waiter)
+
+
+def _negotiate_series_format(accept: str | None, requested: str | None) -> SeriesFormat:
+    try:
+        return negotiate_format(accept, requested)
+    except UnsupportedFormat as error:
+        raise HTTPException(status_code=406, detail=str(error)) from error
+
+
+@app.get("/dashboard/series")
+def dashboard_series(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    resolution: str = "auto",
+    max_points: int = Query(default=DEFAULT_MAX_POINTS, ge=1),
+    response_format: str | None = Query(default=None, alias="format"),
+    accept: str | None = Header(default=None),
+) -> StreamingResponse:
+    """Rollup points streamed from the database, as JSON rows by default or in the negotiated format."""
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from date must be <= to date")
+    if resolution == "auto":
+        resolution = choose_resolution(date_from, date_to, max_points)
+    elif resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of: auto, {', '.join(RESOLUTIONS)}")
+    series_format = _negotiate_series_format(accept, response_format)
+
+    def body() -> Iterator[bytes]:
+        with get_connection() as connection:
+            yield from series_format.encode(
+                SeriesStream(
+                    meta={"from": date_from.isoformat(), "to": date_to.isoformat(), "resolution": resolution},
+                    rows_key="points",
+                    columns=("bucket_start", *METRIC_COLUMNS),
+                    batches=stream_series(connection, date_from, date_to, resolution),
+                )
+            )
+
+    return StreamingResponse(body(), media_type=series_format.media_type, headers={"Vary": "Accept"})
+
+
+@app.get("/export/{source}")
+def export_source(
+    source: str,
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    export_format: str = Query(default="csv", alias="format"),
+    gzip: bool = False,
+) -> StreamingResponse:
+    """Stream a raw table or daily view for a local date range as CSV, NDJSON or Parquet."""
+    request = ExportRequest(source=source, from_date=date_from, to_date=date_to, format=export_format, gzip=gzip)
+    try:
+        request.validate()
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+
+    def body() -> Iterator[bytes]:
+        with get_connection() as connection:
+            yield from stream_export(connection, request)
+
+    return StreamingResponse(
+        body(),
+        media_type=request.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{request.filename}"'},
+    )
+
+
+dashboard_cache = load_dashboard_cache()
+daily_store = load_daily_store()
+add_run_finalized_listener(
+    lambda run_id, touched_days: apply_data_change(dashboard_cache, daily_store, run_id, touched_days)
+)
+
+
+def _load_data_version() -> int | None:
+    with get_connection() as connection:
+        return fetch_data_version(connection)
+
+
+def _cached_response(
+    cached: CachedResponse,
+    if_none_match: str | None,
+    accept_encoding: str | None,
+    vary: str | None = None,
+) -> Response:
+    # Compressed here, once per entry and coding, so CompressionMiddleware passes the body through.
+    encoding = choose_encoding(accept_encoding, compression_settings)
+    if len(cached.body) < compression_settings.minimum_size:
+        encoding = None
+    headers = {
+        "ETag": encoded_etag(cached.etag, encoding),
+        "Cache-Control": "private, no-cache",
+        "X-Data-Version": str(cached.data_version) if cached.data_version is not None else "none",
+        "Vary": f"{vary}, Accept-Encoding" if vary else "Accept-Encoding",
     }
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(
+        content=cached.encoded_body(encoding, compression_settings), media_type=cached.media_type, headers=headers
+    )
+
+
+@app.get("/dashboard/daily")
+def dashboard_daily(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    response_format: str | None = Query(default=None, alias="format"),
+    accept: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+) -> Response:
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from date must be <= to date")
+    series_format = _negotiate_series_format(accept, response_format)
+
+    data_version = dashboard_cache.data_version(_load_data_version)
+
+    def encode(batches: Iterable[list[tuple[object, ...]]]) -> bytes:
+        return b"".join(
+            series_format.encode(
+                SeriesStream(
+                    meta={"from": date_from.isoformat(), "to": date_to.isoformat(), "data_version": data_version},
+                    rows_key="rows",
+                    columns=("day", *METRIC_COLUMNS),
+                    batches=batches,
+                )
+            )
+        )
+
+    def build_body() -> bytes:
+        if daily_store and daily_store.live:
+            return encode(daily_store.daily_batches(date_from, date_to))
+        with get_connection() as connection:
+            return encode(stream_series(connection, date_from, date_to, "day", time_column="day"))
+
+    cached = dashboard_cache.get_or_build_body(
+        ("daily", date_from, date_to, series_format.name),
+        data_version,
+        build_body,
+        (date_from, date_to),
+        series_format.media_type,
+    )
+    return _cached_response(cached, if_none_match, accept_encoding, vary="Accept")
+
+
+@app.get("/dashboard/rolling")
+def dashboard_rolling(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    metric: str = "brutto_kwh",
+    window: int = Query(default=DEFAULT_ROLLING_WINDOW, ge=1, le=366),
+    min_points: int = Query(default=DEFAULT_ROLLING_MIN_POINTS, ge=1),
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+) -> Response:
+    """Plot-ready daily values with their rolling average and the matching day of the previous period."""
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from date must be <= to date")
+    if metric not in ROLLING_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of: {', '.join(ROLLING_METRICS)}")
+
+    data_version = dashboard_cache.data_version(_load_data_version)
+
+    def build() -> dict[str, object]:
+        if daily_store and daily_store.live:
+            comparison = daily_store.rolling_comparison(date_from, date_to, metric, window, min_points)
+        else:
+            with get_connection() as connection:
+                comparison = fetch_rolling_comparison(connection, date_from, date_to, metric, window, min_points)
+        return {
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat(),
+            "metric": metric,
+            "window": window,
+            "min_points": min_points,
+            "data_version": data_version,
+            **comparison,
+        }
+
+    lookback_days = max(window, (date_to - date_from).days + 1)
+    cached = dashboard_cache.get_or_build(
+        ("rolling", date_from, date_to, metric, window, min_points),
+        data_version,
+        build,
+        (date_from - timedelta(days=lookback_days), date_to),
+    )
+    return _cached_response(cached, if_none_match, accept_encoding)
+
+
+@app.get("/dashboard/kpis")
+def dashboard_kpis(
+    preset: str = "thisMonth",
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+) -> Response:
+    if preset not in PRESETS:
+        raise HTTPException(status_code=400, detail=f"preset must be one of: {', '.join(PRESETS)}")
+
+    today = date.today()
+    data_version = dashboard_cache.data_version(_load_data_version)
+
+    def build() -> dict[str, object]:
+        with get_connection() as connection:
+            return kpi_response(get_kpi_snapshot(connection, preset, today))
+
+    cached = dashboard_cache.get_or_build(("kpis", preset, today), data_version, build)
+    return _cached_response(cached, if_none_match, accept_encoding)
+
+
+@app.get("/dashboard/bundle")
+def dashboard_bundle(
+    preset: str = "thisMonth",
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+) -> Response:
+    """Everything the dashboard renders for a preset: KPI cards, daily rows, source status and recent runs."""
+    if preset not in PRESETS:
+        raise HTTPException(status_code=400, detail=f"preset must be one of: {', '.join(PRESETS)}")
+
+    today = date.today()
+    data_version = dashboard_cache.data_version(_load_data_version)
+
+    def build() -> dict[str, object]:
+        with get_connection() as connection:
+            return {**fetch_dashboard_bundle(connection, preset, today), "data_version": data_version}
+
+    cached = dashboard_cache.get_or_build(("bundle", preset, today), data_version, build)
+    return _cached_response(cached, if_none_match, accept_encoding)
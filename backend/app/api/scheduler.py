@@ -0,0 +1,257 @@
+"""In-process cron-like scheduler for incremental syncs.
+
+Each source has a five-field cron expression (minute hour day-of-month month
+day-of-week, evaluated in Atlantic/Reykjavik). Sources sharing an expression share
+one job. Fires go through the sync job manager, so scheduled and manual syncs never
+overlap in this process; the advisory locks cover other processes. A fire that comes
+due while the previous one is still running is coalesced into the next slot.
+
+Retention (app.ingest.run_retention) can run on its own cron expression too,
+SCHEDULE_RETENTION, which is off unless set. It runs in a worker thread and is not
+caught up after downtime; the next slot covers whatever the missed one would have.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+import os
+import random
+from zoneinfo import ZoneInfo
+
+from app.api.sync_jobs import SyncJobManager
+from app.ingest.db import get_connection, get_source_freshness
+from app.ingest.locks import IngestLockBusy
+from app.ingest.run_backfill import SOURCE_INGESTERS
+from app.ingest.run_retention import load_retention_policy, run_retention
+
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TZ = ZoneInfo("Atlantic/Reykjavik")
+CATCH_UP_POLICIES = ("once", "skip")
+
+# Hsveitur publishes the previous day in the morning; Zaptec sessions are worth seeing intraday.
+DEFAULT_SCHEDULES = {
+    "hsveitur": "20 7 * * *",
+    "veitur": "30 7 * * *",
+    "zaptec": "*/30 * * * *",
+    "weather": "5 * * * *",
+}
+
+_DISABLED_SCHEDULES = {"", "off", "never", "none"}
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+
+def _parse_field(text: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in text.split(","):
+        base, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f"invalid cron step in '{part}'")
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start_text, end_text = base.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(base)
+            end = high if step_text else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron field '{part}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class CronSchedule:
+    expression: str
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    days_restricted: bool
+    weekdays_restricted: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> CronSchedule:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression '{expression}' must have five fields")
+        minutes, hours, days, months, weekdays = (
+            _parse_field(text, low, high) for text, (low, high) in zip(fields, _FIELD_RANGES)
+        )
+        # Cron numbers Sunday 0, Python numbers Monday 0.
+        return cls(
+            expression=expression,
+            minutes=minutes,
+            hours=hours,
+            days=days,
+            months=months,
+            weekdays=frozenset((weekday - 1) % 7 for weekday in weekdays),
+            days_restricted=fields[2] != "*",
+            weekdays_restricted=fields[4] != "*",
+        )
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = moment.weekday() in self.weekdays
+        # Standard cron: when both day fields are restricted, either one may match.
+        if self.days_restricted and self.weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment`, as an aware local datetime."""
+        candidate = moment.astimezone(LOCAL_TZ).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"cron expression '{self.expression}' never fires")
+
+
+@dataclass(frozen=True)
+class ScheduledSync:
+    schedule: CronSchedule
+    sources: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class SchedulerSettings:
+    enabled: bool
+    entries: tuple[ScheduledSync, ...]
+    jitter_seconds: float = 0
+    catch_up: str = "once"
+    retention: CronSchedule | None = None
+
+
+def load_scheduler_settings() -> SchedulerSettings:
+    grouped: dict[str, list[str]] = {}
+    for source_name in SOURCE_INGESTERS:
+        expression = os.getenv(f"SCHEDULE_{source_name.upper()}", DEFAULT_SCHEDULES[source_name]).strip()
+        if expression.lower() in _DISABLED_SCHEDULES:
+            continue
+        grouped.setdefault(" ".join(expression.split()), []).append(source_name)
+
+    catch_up = (os.getenv("SCHEDULER_CATCH_UP") or "once").strip().lower()
+    if catch_up not in CATCH_UP_POLICIES:
+        raise ValueError(f"SCHEDULER_CATCH_UP must be one of: {', '.join(CATCH_UP_POLICIES)}")
+    retention_expression = " ".join((os.getenv("SCHEDULE_RETENTION") or "").split())
+
+    return SchedulerSettings(
+        enabled=(os.getenv("SCHEDULER_ENABLED") or "false").strip().lower() in {"1", "true", "yes", "on"},
+        entries=tuple(
+            ScheduledSync(schedule=CronSchedule.parse(expression), sources=tuple(sources))
+            for expression, sources in grouped.items()
+        ),
+        jitter_seconds=float(os.getenv("SCHEDULER_JITTER_SECONDS") or 60),
+        catch_up=catch_up,
+        retention=(
+            None if retention_expression.lower() in _DISABLED_SCHEDULES else CronSchedule.parse(retention_expression)
+        ),
+    )
+
+
+def missed_fire(entry: ScheduledSync, last_success_at: dict[str, datetime | None], now: datetime) -> bool:
+    """True when a slot of the schedule passed since some source in the entry last synced."""
+    for source_name in entry.sources:
+        checked_at = last_success_at.get(source_name)
+        if checked_at is None or entry.schedule.next_after(checked_at) <= now:
+            return True
+    return False
+
+
+def _load_last_success() -> dict[str, datetime | None]:
+    with get_connection() as connection:
+        return {
+            source_name: freshness.last_success_at
+            for source_name, freshness in get_source_freshness(connection).items()
+        }
+
+
+class SyncScheduler:
+    def __init__(
+        self,
+        jobs: SyncJobManager,
+        settings: SchedulerSettings,
+        clock: Callable[[], datetime] = lambda: datetime.now(LOCAL_TZ),
+    ) -> None:
+        self._jobs = jobs
+        self._settings = settings
+        self._clock = clock
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        for entry in self._settings.entries:
+            logger.info("Scheduling %s with '%s'", ", ".join(entry.sources), entry.schedule.expression)
+            self._tasks.append(asyncio.create_task(self._run_entry(entry)))
+        if self._settings.retention:
+            logger.info("Scheduling retention with '%s'", self._settings.retention.expression)
+            self._tasks.append(asyncio.create_task(self._run_retention(self._settings.retention)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _fire(self, entry: ScheduledSync) -> None:
+        job, joined = self._jobs.start_or_join(sources=entry.sources)
+        logger.info("Scheduled sync of %s %s job %s", ", ".join(entry.sources), "joined" if joined else "started", job.id)
+        await job.wait()
+        if job.status == "failed":
+            logger.warning("Scheduled sync job %s failed: %s", job.id, job.error)
+
+    async def _sleep_until_next(self, schedule: CronSchedule) -> None:
+        fire_at = schedule.next_after(self._clock())
+        delay = (fire_at - self._clock()).total_seconds() + random.uniform(0, self._settings.jitter_seconds)
+        await asyncio.sleep(max(delay, 0))
+
+    async def _run_retention(self, schedule: CronSchedule) -> None:
+        while True:
+            await self._sleep_until_next(schedule)
+            try:
+                # The policy is re-read each time, like the CLI reads it on every run.
+                results = await asyncio.to_thread(run_retention, load_retention_policy())
+            except IngestLockBusy as error:
+                logger.warning("Scheduled retention skipped: %s", error)
+                continue
+            except Exception:
+                logger.exception("Scheduled retention failed")
+                continue
+            for result in results:
+                logger.info(
+                    "Retention %s on %s affected %d rows", result.action, result.table_name, result.rows_affected
+                )
+
+    async def _run_entry(self, entry: ScheduledSync) -> None:
+        if self._settings.catch_up == "once":
+            try:
+                last_success_at = await asyncio.to_thread(_load_last_success)
+            except Exception:
+                logger.exception("Could not read last sync times; skipping catch-up for %s", ", ".join(entry.sources))
+            else:
+                if missed_fire(entry, last_success_at, self._clock()):
+                    await self._fire(entry)
+
+        while True:
+            await self._sleep_until_next(entry.schedule)
+            try:
+                await self._fire(entry)
+            except Exception:
+                logger.exception("Scheduled sync of %s failed", ", ".join(entry.sources))
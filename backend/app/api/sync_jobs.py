@@ -0,0 +1,164 @@
+"""Background incremental-sync jobs with single-flight dedupe.
+
+At most one sync job runs per API process. POST /sync-data and the scheduler start one
+or join the running one when it already covers the requested sources, and is forced
+whenever the request is; otherwise the new job queues behind it. Clients follow
+progress through the job status or its event stream.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+import logging
+from typing import Any
+import uuid
+
+from app import json_codec
+from app.ingest.db import SourceWriteResult
+
+
+logger = logging.getLogger(__name__)
+
+MAX_FINISHED_JOBS = 20
+
+SyncRunner = Callable[
+    [bool, tuple[str, ...] | None, Callable[[SourceWriteResult], None]],
+    Awaitable[list[SourceWriteResult]],
+]
+
+
+def source_result_payload(result: SourceWriteResult) -> dict[str, Any]:
+    return {
+        "source": result.source_name,
+        "status": result.status,
+        "rows_written": result.rows_written,
+        "sync_window": (result.details or {}).get("sync_window"),
+        "message": result.message,
+    }
+
+
+@dataclass(slots=True)
+class SyncJob:
+    id: str
+    force: bool
+    started_at: datetime
+    sources: tuple[str, ...] | None = None
+    status: str = "queued"
+    finished_at: datetime | None = None
+    error: str | None = None
+    results: list[SourceWriteResult] = field(default_factory=list)
+    _updated: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def done(self) -> bool:
+        return self.status not in {"queued", "running"}
+
+    def covers(self, sources: tuple[str, ...] | None, force: bool = False) -> bool:
+        # A job that applies freshness skips cannot stand in for a forced request.
+        if force and not self.force:
+            return False
+        if self.sources is None:
+            return True
+        return sources is not None and set(sources) <= set(self.sources)
+
+    def start(self) -> None:
+        self.status = "running"
+        self._notify()
+
+    def publish(self, result: SourceWriteResult) -> None:
+        self.results.append(result)
+        self._notify()
+
+    def finish(self, status: str, error: str | None = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.now(UTC)
+        self._notify()
+
+    def _notify(self) -> None:
+        # Wake every waiting stream, then arm a fresh event for the next update.
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "force": self.force,
+            "requested_sources": list(self.sources) if self.sources is not None else None,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "sources": [source_result_payload(result) for result in self.results],
+        }
+
+    async def events(self) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """Yield ("source", result) for every result, past and future, then ("done", job)."""
+        sent = 0
+        while True:
+            updated = self._updated
+            while sent < len(self.results):
+                yield "source", source_result_payload(self.results[sent])
+                sent += 1
+            if self.done:
+                yield "done", self.to_dict()
+                return
+            await updated.wait()
+
+    async def wait(self) -> None:
+        while not self.done:
+            await self._updated.wait()
+
+
+class SyncJobManager:
+    def __init__(self, runner: SyncRunner) -> None:
+        self._runner = runner
+        self._jobs: dict[str, SyncJob] = {}
+        self._current: SyncJob | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def get(self, job_id: str) -> SyncJob | None:
+        return self._jobs.get(job_id)
+
+    def start_or_join(self, force: bool = False, sources: tuple[str, ...] | None = None) -> tuple[SyncJob, bool]:
+        """Return the latest unfinished job when it covers `sources` and `force` (joined=True), or start one.
+
+        A new job waits for the previous one to finish, so two runners never overlap.
+        """
+        previous = self._current
+        if previous is not None and not previous.done and previous.covers(sources, force):
+            return previous, True
+
+        job = SyncJob(id=uuid.uuid4().hex, force=force, started_at=datetime.now(UTC), sources=sources)
+        self._jobs[job.id] = job
+        self._current = job
+        self._forget_old_jobs()
+
+        task = asyncio.create_task(self._run(job, previous))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job, False
+
+    async def _run(self, job: SyncJob, previous: SyncJob | None) -> None:
+        if previous is not None:
+            await previous.wait()
+        job.start()
+        try:
+            await self._runner(job.force, job.sources, job.publish)
+        except Exception as error:
+            logger.exception("Sync job %s failed", job.id)
+            job.finish("failed", error=str(error))
+        else:
+            job.finish("finished")
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+
+def format_sse(event: str, payload: dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + json_codec.dumps(payload) + b"\n\n"
@@ -0,0 +1,195 @@
+"""Response compression: gzip always, brotli when the optional package is installed.
+
+CompressionMiddleware encodes any response of at least minimum_size bytes whose client
+accepts a supported coding, and streams chunked bodies through an incremental
+compressor. Responses that already carry Content-Encoding pass through untouched;
+that is how cached dashboard responses ship the variant compressed once when the entry
+was first served (see CachedResponse.encoded_body). Already-compressed media types and
+server-sent events are never touched. benchmarks/compression.py measures the trade-off.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import os
+from typing import Any
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+DEFAULT_MINIMUM_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+EXCLUDED_MEDIA_TYPES = (
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/vnd.apache.parquet",
+    "text/event-stream",
+    "image/",
+    "audio/",
+    "video/",
+    "font/woff",
+)
+
+
+def _load_brotli() -> Any | None:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+brotli = _load_brotli()
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    minimum_size: int = DEFAULT_MINIMUM_SIZE
+    gzip_level: int = DEFAULT_GZIP_LEVEL
+    brotli_quality: int = DEFAULT_BROTLI_QUALITY
+    brotli_enabled: bool = True
+
+    @property
+    def encodings(self) -> tuple[str, ...]:
+        """Supported codings, preferred first."""
+        return ("br", "gzip") if self.brotli_enabled and brotli is not None else ("gzip",)
+
+
+def load_compression_settings() -> CompressionSettings:
+    return CompressionSettings(
+        minimum_size=int(os.getenv("COMPRESSION_MINIMUM_SIZE") or DEFAULT_MINIMUM_SIZE),
+        gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL") or DEFAULT_GZIP_LEVEL),
+        brotli_quality=int(os.getenv("COMPRESSION_BROTLI_QUALITY") or DEFAULT_BROTLI_QUALITY),
+        brotli_enabled=(os.getenv("COMPRESSION_BROTLI") or "true").strip().lower()
+        not in {"0", "false", "no", "off"},
+    )
+
+
+def choose_encoding(accept_encoding: str | None, settings: CompressionSettings) -> str | None:
+    """The supported coding the client weighs highest, preferring brotli on ties; None for identity."""
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = (piece.strip() for piece in part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+
+    best: tuple[float, str] | None = None
+    for coding in settings.encodings:
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[0]):
+            best = (quality, coding)
+    return best[1] if best else None
+
+
+def compress(body: bytes, encoding: str, settings: CompressionSettings) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def _streaming_compressor(
+    encoding: str, settings: CompressionSettings
+) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=settings.brotli_quality)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _compressible(headers: Headers) -> bool:
+    media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+    return "content-encoding" not in headers and not media_type.startswith(EXCLUDED_MEDIA_TYPES)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, settings: CompressionSettings | None = None) -> None:
+        self.app = app
+        self.settings = settings or load_compression_settings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.settings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingResponder(self.app, self.settings, encoding)(scope, receive, send)
+
+
+class _CompressingResponder:
+    def __init__(self, app: ASGIApp, settings: CompressionSettings, encoding: str) -> None:
+        self.app = app
+        self.settings = settings
+        self.encoding = encoding
+        self.send: Send
+        self.start_message: Message | None = None
+        # None until the first body message decides between passing through and compressing.
+        self.compressing: bool | None = None
+        self.process: Callable[[bytes], bytes]
+        self.finish: Callable[[], bytes]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether the body is worth compressing.
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressing is None:
+            headers = Headers(raw=self.start_message["headers"])
+            small = not more_body and len(body) < self.settings.minimum_size
+            self.compressing = _compressible(headers) and self.start_message["status"] != 206 and not small
+            if not self.compressing:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            mutable = MutableHeaders(raw=self.start_message["headers"])
+            mutable["Content-Encoding"] = self.encoding
+            mutable.add_vary_header("Accept-Encoding")
+            if not more_body:
+                compressed = compress(body, self.encoding, self.settings)
+                mutable["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            del mutable["Content-Length"]
+            self.process, self.finish = _streaming_compressor(self.encoding, self.settings)
+            await self.send(self.start_message)
+
+        if not self.compressing:
+            await self.send(message)
+            return
+        chunk = self.process(body)
+        if not more_body:
+            chunk += self.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,82 @@
+"""Whole-dashboard payload for one preset in a single database round trip.
+
+One statement assembles the daily rows of the preset range, the latest non-skipped
+status per source, the recent ingestion runs and the stored KPI snapshot as one JSON
+document. Only when today's snapshot does not exist yet is a second round trip spent
+computing it, and the result is not stored. Comparison totals and rolling averages come precomputed with the
+snapshot, so the rows before the range are not shipped.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from psycopg import Connection
+
+from app.dashboard.kpi_snapshots import computed_kpi_snapshot, kpi_response
+from app.dashboard.presets import preset_range
+
+
+RECENT_RUN_COUNT = 20
+
+_BUNDLE_SQL = """
+select json_build_object(
+  'daily', coalesce((
+    select json_agg(json_build_object(
+      'day', bucket_start::date,
+      'brutto_kwh', brutto_kwh,
+      'ev_kwh', ev_kwh,
+      'netto_kwh', netto_kwh,
+      'hot_water_usage', hot_water_usage,
+      'avg_temperature_c', avg_temperature_c
+    ) order by bucket_start)
+    from energy.dashboard_rollups
+    where resolution = 'day'
+      and bucket_start >= %(from)s::timestamp
+      and bucket_start < %(to)s::timestamp + interval '1 day'
+  ), '[]'::json),
+  'source_status', coalesce((
+    select json_agg(latest order by latest.source_name)
+    from (
+      select distinct on (source_name) source_name, checked_at, status, message
+      from energy.source_status
+      where status <> 'skipped'
+      order by source_name, checked_at desc
+    ) latest
+  ), '[]'::json),
+  'ingestion_runs', coalesce((
+    select json_agg(recent order by recent.started_at desc)
+    from (
+      select id, started_at, finished_at, status, source_count, success_count, failure_count, details
+      from energy.ingestion_runs
+      order by started_at desc
+      limit %(run_count)s
+    ) recent
+  ), '[]'::json),
+  'kpi_snapshot', (
+    select row_to_json(snapshot)
+    from energy.dashboard_kpi_snapshots snapshot
+    where preset = %(preset)s and as_of = %(today)s
+  )
+)
+"""
+
+
+def fetch_dashboard_bundle(connection: Connection, preset: str, today: date) -> dict[str, Any]:
+    window = preset_range(preset, today)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _BUNDLE_SQL,
+            {
+                "from": window.start,
+                "to": window.end,
+                "run_count": RECENT_RUN_COUNT,
+                "preset": preset,
+                "today": today,
+            },
+        )
+        bundle = cursor.fetchone()[0]
+
+    snapshot = bundle.pop("kpi_snapshot") or computed_kpi_snapshot(connection, preset, today)
+    return {"preset": preset, "as_of": today.isoformat(), "kpis": kpi_response(snapshot), **bundle}
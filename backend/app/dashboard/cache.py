@@ -0,0 +1,220 @@
+"""In-memory cache of encoded dashboard responses, versioned by ingestion run.
+
+Dashboard data only changes when an ingestion run finalizes (or raw rows are
+reprocessed), and the data version is the latest finished energy.ingestion_runs.id.
+Each entry remembers the version it was built at and the local days it was built
+from; entries without days (KPI cards, the bundle) depend on every run. Data-change
+notifications (see app.dashboard.invalidation) name the days a run touched, so only
+overlapping entries are evicted and the version is adopted without a query. While no
+listener is connected, the version is re-read at most every version_ttl_seconds and
+a change found that way drops every entry. Bodies are encoded once and carry a strong
+ETag over their bytes, so unchanged data is answered with 304. Each gzip or brotli
+variant is compressed the first time a client asks for it and kept with the entry,
+so repeat hits skip both serialization and compression.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from datetime import date
+import hashlib
+import os
+import threading
+import time
+from typing import Any
+
+from psycopg import Connection
+
+from app import json_codec
+from app.compression import CompressionSettings, compress
+
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_VERSION_TTL_SECONDS = 30.0
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    data_version: int | None
+    media_type: str = "application/json"
+    # Content coding -> compressed body, filled on first use; the body itself is never mutated.
+    encoded: dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    def encoded_body(self, encoding: str, settings: CompressionSettings) -> bytes:
+        """The body compressed with encoding, compressed once per entry."""
+        body = self.encoded.get(encoding)
+        if body is None:
+            # Concurrent first hits may both compress; either result is the same bytes.
+            body = self.encoded[encoding] = compress(self.body, encoding, settings)
+        return body
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def encoded_etag(etag: str, encoding: str | None) -> str:
+    """The ETag of a compressed variant; each representation needs its own strong validator."""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 prescribes for If-None-Match.
+
+    A validator of any compressed variant of the same body matches too, so a client
+    that changes Accept-Encoding still revalidates instead of downloading again.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_identity_etag(candidate.strip().removeprefix("W/")) == etag for candidate in if_none_match.split(","))
+
+
+def _identity_etag(etag: str) -> str:
+    for encoding in ("gzip", "br"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def fetch_data_version(connection: Connection) -> int | None:
+    with connection.cursor() as cursor:
+        cursor.execute("select max(id) from energy.ingestion_runs where finished_at is not null")
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _overlaps(days: tuple[date, date], touched_days: tuple[date, date]) -> bool:
+    return days[0] <= touched_days[1] and touched_days[0] <= days[1]
+
+
+class DashboardCache:
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        version_ttl_seconds: float = DEFAULT_VERSION_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max_entries
+        self._version_ttl_seconds = version_ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[CachedResponse, tuple[date, date] | None]] = OrderedDict()
+        self._version: int | None = None
+        self._version_checked_at: float | None = None
+        # Bumped by every eviction, so builds that started before one are not stored.
+        self._generation = 0
+        self._listening = False
+
+    def data_version(self, load_version: Callable[[], int | None]) -> int | None:
+        with self._lock:
+            checked_at = self._version_checked_at
+            if checked_at is not None and (
+                self._listening or self._clock() - checked_at < self._version_ttl_seconds
+            ):
+                return self._version
+        version = load_version()
+        self._set_version(version)
+        return version
+
+    def get_or_build(
+        self,
+        key: Hashable,
+        data_version: int | None,
+        build: Callable[[], Any],
+        days: tuple[date, date] | None = None,
+    ) -> CachedResponse:
+        """The cached response for key, built and stored on a miss; days is the range the body reads."""
+        return self.get_or_build_body(key, data_version, lambda: json_codec.dumps(build()), days)
+
+    def get_or_build_body(
+        self,
+        key: Hashable,
+        data_version: int | None,
+        build_body: Callable[[], bytes],
+        days: tuple[date, date] | None = None,
+        media_type: str = "application/json",
+    ) -> CachedResponse:
+        """Like get_or_build, for a body the caller has already encoded."""
+        with self._lock:
+            # Evictions remove whatever a change affected, so an entry still present is current,
+            # even when it was built at an older version.
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+            generation = self._generation
+
+        body = build_body()
+        cached = CachedResponse(body=body, etag=strong_etag(body), data_version=data_version, media_type=media_type)
+        with self._lock:
+            # A response built for a superseded version, or across an eviction, may already be stale.
+            if data_version == self._version and generation == self._generation:
+                self._entries[key] = (cached, days)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, data_version: int | None = None) -> None:
+        """Drop every entry; with a version, also adopt it without asking the database."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            if data_version is not None:
+                self._adopt_version(data_version)
+            else:
+                self._version_checked_at = None
+
+    def evict(self, data_version: int | None, touched_days: tuple[date, date] | None) -> int:
+        """Drop the entries a data change affects: those without days and those overlapping touched_days.
+
+        With a version (the finalized run id), also adopt it without asking the database.
+        """
+        with self._lock:
+            stale = [
+                key
+                for key, (_, days) in self._entries.items()
+                if days is None or (touched_days is not None and _overlaps(days, touched_days))
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._generation += 1
+            if data_version is not None:
+                self._adopt_version(data_version)
+        return len(stale)
+
+    def set_listening(self, listening: bool) -> None:
+        """While a notification listener is connected, the data version is not polled."""
+        with self._lock:
+            self._listening = listening
+
+    def _adopt_version(self, data_version: int) -> None:
+        self._version = max(data_version, self._version or 0)
+        self._version_checked_at = self._clock()
+
+    def _set_version(self, version: int | None) -> None:
+        with self._lock:
+            if version != self._version:
+                # Found by polling, so which days changed is unknown.
+                self._entries.clear()
+                self._generation += 1
+            self._version = version
+            self._version_checked_at = self._clock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def load_dashboard_cache() -> DashboardCache:
+    return DashboardCache(
+        max_entries=int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES") or DEFAULT_MAX_ENTRIES),
+        version_ttl_seconds=float(os.getenv("DASHBOARD_CACHE_VERSION_TTL_SECONDS") or DEFAULT_VERSION_TTL_SECONDS),
+    )
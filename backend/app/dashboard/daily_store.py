@@ -0,0 +1,231 @@
+"""In-process daily series for the API, held in NumPy arrays indexed by day ordinal.
+
+Every daily metric of energy.dashboard_rollups fits in memory for decades (a few
+hundred kilobytes), so the API keeps one float64 row per metric in a contiguous
+2-D array, with column i holding day `origin + i` and NaN standing in for null, plus
+a mask of the days that have a rollup row. Range slices, sums, means and the rolling
+comparison are array arithmetic instead of a database round trip.
+
+The store is loaded when the data-change listener connects and updated with only the
+touched days of each notification; each update swaps in a new snapshot, so readers
+never lock. It is live only while that listener is connected. Otherwise a missed
+notification could leave it stale, so the endpoints fall back to SQL. NumPy is
+optional (`uv sync --extra store`); without it the store is simply not created.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date, timedelta
+import os
+import threading
+from typing import Any
+
+from psycopg import Connection
+
+from app.dashboard.series import METRIC_COLUMNS, STREAM_BATCH_ROWS
+from app.ingest.db import get_connection
+
+
+def _load_numpy() -> Any | None:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+np = _load_numpy()
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    origin: int
+    # Shape (len(METRIC_COLUMNS), days); NaN where the metric is null or the day has no row.
+    values: Any
+    present: Any
+
+    def span(self, date_from: date, date_to: date) -> tuple[int, int]:
+        """Clipped [start, stop) column slice for the inclusive day range."""
+        days = self.present.shape[0]
+        start = min(max(date_from.toordinal() - self.origin, 0), days)
+        stop = min(max(date_to.toordinal() - self.origin + 1, 0), days)
+        return start, max(start, stop)
+
+
+def _fetch_days(connection: Connection, date_from: date | None, date_to: date | None) -> list[tuple[Any, ...]]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            select bucket_start::date, {", ".join(f"{column}::float8" for column in METRIC_COLUMNS)}
+            from energy.dashboard_rollups
+            where resolution = 'day'
+              and (%(from)s::date is null or bucket_start >= %(from)s::date)
+              and (%(to)s::date is null or bucket_start < %(to)s::date + 1)
+            order by bucket_start
+            """,
+            {"from": date_from, "to": date_to},
+        )
+        return cursor.fetchall()
+
+
+def _metric_values(snapshot: _Snapshot, metric: str, date_from: date, date_to: date) -> Any:
+    start, stop = snapshot.span(date_from, date_to)
+    return snapshot.values[METRIC_COLUMNS.index(metric), start:stop]
+
+
+def _sum(snapshot: _Snapshot, metric: str, date_from: date, date_to: date) -> float:
+    return float(np.nansum(_metric_values(snapshot, metric, date_from, date_to)))
+
+
+def _nan_to_none(values: list[float]) -> list[float | None]:
+    return [None if value != value else value for value in values]
+
+
+class DailyStore:
+    def __init__(self, connect: Callable[[], Connection] = get_connection) -> None:
+        self._connect = connect
+        self._snapshot: _Snapshot | None = None
+        self._live = False
+        # Serializes writers; readers take self._snapshot once and never lock.
+        self._write_lock = threading.Lock()
+
+    @property
+    def live(self) -> bool:
+        return self._live and self._snapshot is not None
+
+    def set_live(self, live: bool) -> None:
+        self._live = live
+
+    def load(self) -> int:
+        """Replace the store with every day rollup; returns the number of days with a row."""
+        with self._write_lock:
+            with self._connect() as connection:
+                rows = _fetch_days(connection, None, None)
+            origin = rows[0][0].toordinal() if rows else date.today().toordinal()
+            days = rows[-1][0].toordinal() - origin + 1 if rows else 0
+            snapshot = _Snapshot(origin, np.full((len(METRIC_COLUMNS), days), np.nan), np.zeros(days, bool))
+            self._snapshot = self._write_rows(snapshot, rows)
+        return len(rows)
+
+    def apply_change(self, touched_days: tuple[date, date] | None) -> None:
+        """Re-read only the touched days into a copy of the arrays, widened when the days reach past either end."""
+        if touched_days is None:
+            return
+        with self._write_lock:
+            current = self._snapshot
+            if current is None:
+                return
+            with self._connect() as connection:
+                rows = _fetch_days(connection, *touched_days)
+
+            days = current.present.shape[0]
+            origin = min(current.origin, touched_days[0].toordinal())
+            end = max(current.origin + days, touched_days[1].toordinal() + 1)
+            snapshot = _Snapshot(
+                origin, np.full((len(METRIC_COLUMNS), end - origin), np.nan), np.zeros(end - origin, bool)
+            )
+            offset = current.origin - origin
+            snapshot.values[:, offset : offset + days] = current.values
+            snapshot.present[offset : offset + days] = current.present
+
+            # Days in the touched range without a row now have no data at all.
+            start, stop = touched_days[0].toordinal() - origin, touched_days[1].toordinal() - origin + 1
+            snapshot.values[:, start:stop] = np.nan
+            snapshot.present[start:stop] = False
+            self._snapshot = self._write_rows(snapshot, rows)
+
+    @staticmethod
+    def _write_rows(snapshot: _Snapshot, rows: list[tuple[Any, ...]]) -> _Snapshot:
+        if rows:
+            indexes = np.array([row[0].toordinal() - snapshot.origin for row in rows], dtype=np.int64)
+            snapshot.values[:, indexes] = np.array([row[1:] for row in rows], dtype=float).T
+            snapshot.present[indexes] = True
+        return snapshot
+
+    def daily_batches(
+        self, date_from: date, date_to: date, batch_rows: int = STREAM_BATCH_ROWS
+    ) -> Iterator[list[tuple[Any, ...]]]:
+        """Present days of the range as (day, *METRIC_COLUMNS) tuples, shaped like series.stream_series."""
+        snapshot = self._snapshot
+        start, stop = snapshot.span(date_from, date_to)
+        indexes = np.flatnonzero(snapshot.present[start:stop]) + start
+        for batch_start in range(0, len(indexes), batch_rows):
+            batch = indexes[batch_start : batch_start + batch_rows]
+            columns = [_nan_to_none(snapshot.values[metric, batch].tolist()) for metric in range(len(METRIC_COLUMNS))]
+            days = [date.fromordinal(snapshot.origin + index) for index in batch.tolist()]
+            yield list(zip(days, *columns))
+
+    def sum(self, metric: str, date_from: date, date_to: date) -> float:
+        return _sum(self._snapshot, metric, date_from, date_to)
+
+    def mean(self, metric: str, date_from: date, date_to: date) -> float | None:
+        values = _metric_values(self._snapshot, metric, date_from, date_to)
+        return float(np.nanmean(values)) if np.count_nonzero(~np.isnan(values)) else None
+
+    def rolling_comparison(
+        self, date_from: date, date_to: date, metric: str, window: int, min_points: int
+    ) -> dict[str, Any]:
+        """The result of series.fetch_rolling_comparison, from the arrays."""
+        snapshot = self._snapshot
+        row = snapshot.values[METRIC_COLUMNS.index(metric)]
+        span_days = (date_to - date_from).days + 1
+
+        # Like the SQL, the rolling window only sees rows from the lookback start on.
+        lookback_start, stop = snapshot.span(date_from - timedelta(days=max(window, span_days)), date_to)
+        indexes = np.flatnonzero(snapshot.present[lookback_start:stop]) + lookback_start
+        values = row[indexes]
+        known = ~np.isnan(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(known, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(known)))
+        positions = np.arange(len(indexes))
+        first = np.maximum(positions - window, 0)
+        window_counts = counts[positions] - counts[first]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            averages = np.round((sums[positions] - sums[first]) / window_counts, 2)
+        averages[window_counts < min_points] = np.nan
+
+        in_range = indexes >= date_from.toordinal() - snapshot.origin
+        indexes, values, averages = indexes[in_range], values[in_range], averages[in_range]
+        previous_indexes = indexes - span_days
+        has_previous = previous_indexes >= 0
+        previous = np.full(len(indexes), np.nan)
+        previous[has_previous] = np.where(
+            snapshot.present[previous_indexes[has_previous]], row[previous_indexes[has_previous]], np.nan
+        )
+
+        current_total = round(_sum(snapshot, metric, date_from, date_to), 2)
+        previous_from, previous_to = date_from - timedelta(days=span_days), date_from - timedelta(days=1)
+        previous_total = round(_sum(snapshot, metric, previous_from, previous_to), 2)
+        return {
+            "series": [
+                {
+                    "day": date.fromordinal(snapshot.origin + index).isoformat(),
+                    "value": value,
+                    "rolling_average": average,
+                    "previous_value": previous_value,
+                }
+                for index, value, average, previous_value in zip(
+                    indexes.tolist(),
+                    _nan_to_none(values.tolist()),
+                    _nan_to_none(averages.tolist()),
+                    _nan_to_none(previous.tolist()),
+                )
+            ],
+            "totals": {
+                "current": current_total,
+                "previous": previous_total,
+                "previous_from": previous_from.isoformat(),
+                "previous_to": previous_to.isoformat(),
+                "delta_percent": (
+                    round((current_total - previous_total) / previous_total * 100, 1) if previous_total else None
+                ),
+            },
+        }
+
+
+def load_daily_store() -> DailyStore | None:
+    if np is None or (os.getenv("DAILY_STORE_ENABLED") or "true").strip().lower() in {"0", "false", "no", "off"}:
+        return None
+    return DailyStore()
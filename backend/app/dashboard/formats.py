@@ -0,0 +1,211 @@
+"""Content negotiation and streaming encoders for time-series responses.
+
+Rows arrive in batches from a server-side cursor (see series.stream_series) and are
+encoded batch by batch, so a multi-year series never exists as a list of row dicts.
+
+- json (default): the row-object layout the endpoints have always returned.
+- columnar: the same document with one array per column instead of row objects,
+  like Open-Meteo's `hourly` block. The first column streams as rows arrive; the
+  others are spooled per column, to disk past COLUMN_SPOOL_BYTES, and follow it.
+- msgpack: a header map (metadata plus "columns"), followed by one array per row,
+  as consecutive MessagePack objects that msgpack.Unpacker reads as a stream.
+- arrow: an Arrow IPC stream with one record batch per cursor batch and the
+  metadata in the schema.
+
+msgpack and arrow need the optional packages (`pip install .[binary]`) and are only
+offered when those are importable, in the same way json_codec falls back without orjson.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+import io
+import tempfile
+from typing import Any
+
+from app import json_codec
+
+
+# Encoded values each spooled column keeps in memory before it rolls over to a temporary file.
+COLUMN_SPOOL_BYTES = 1 << 20
+_SPOOL_READ_BYTES = 1 << 16
+
+
+@dataclass(frozen=True)
+class SeriesStream:
+    meta: dict[str, Any]
+    # Key the rows go under in the JSON layouts ("points", "rows"), after the metadata.
+    rows_key: str
+    # Time column first, then metrics; a time column named "day" holds dates.
+    columns: tuple[str, ...]
+    batches: Iterable[list[tuple[Any, ...]]]
+
+
+@dataclass(frozen=True)
+class SeriesFormat:
+    name: str
+    media_type: str
+    encode: Callable[[SeriesStream], Iterator[bytes]]
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+def _isoformat_times(batch: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+    return [(row[0].isoformat(), *row[1:]) for row in batch]
+
+
+def _open_document(stream: SeriesStream, opening: bytes) -> bytes:
+    head = json_codec.dumps(stream.meta)[:-1]
+    return head + (b"," if stream.meta else b"") + json_codec.dumps(stream.rows_key) + b":" + opening
+
+
+def encode_json_rows(stream: SeriesStream) -> Iterator[bytes]:
+    yield _open_document(stream, b"[")
+    separator = b""
+    for batch in stream.batches:
+        if batch:
+            yield separator + json_codec.dumps([dict(zip(stream.columns, row)) for row in _isoformat_times(batch)])[1:-1]
+            separator = b","
+    yield b"]}"
+
+
+def encode_json_columns(stream: SeriesStream) -> Iterator[bytes]:
+    # Rows arrive once, in order, so only the first column can be written as they do.
+    first_column, *later_columns = stream.columns
+    spools = [tempfile.SpooledTemporaryFile(max_size=COLUMN_SPOOL_BYTES) for _ in later_columns]
+    try:
+        yield _open_document(stream, b"{") + json_codec.dumps(first_column) + b":["
+        separator = b""
+        for batch in stream.batches:
+            if not batch:
+                continue
+            first_values, *later_values = zip(*_isoformat_times(batch))
+            yield separator + json_codec.dumps(first_values)[1:-1]
+            for spool, values in zip(spools, later_values):
+                spool.write(separator + json_codec.dumps(values)[1:-1])
+            separator = b","
+        yield b"]"
+
+        for column, spool in zip(later_columns, spools):
+            yield b"," + json_codec.dumps(column) + b":["
+            spool.seek(0)
+            while chunk := spool.read(_SPOOL_READ_BYTES):
+                yield chunk
+            yield b"]"
+        yield b"}}"
+    finally:
+        for spool in spools:
+            spool.close()
+
+
+def _load_msgpack() -> Any | None:
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def _load_pyarrow() -> Any | None:
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def encode_msgpack(stream: SeriesStream) -> Iterator[bytes]:
+    msgpack = _load_msgpack()
+    packer = msgpack.Packer()
+    yield packer.pack({**stream.meta, "columns": list(stream.columns)})
+    for batch in stream.batches:
+        yield b"".join(packer.pack(row) for row in _isoformat_times(batch))
+
+
+def encode_arrow(stream: SeriesStream) -> Iterator[bytes]:
+    pa = _load_pyarrow()
+    time_type = pa.date32() if stream.columns[0] == "day" else pa.timestamp("us")
+    schema = pa.schema(
+        [pa.field(stream.columns[0], time_type), *(pa.field(column, pa.float64()) for column in stream.columns[1:])],
+        metadata={key: "" if value is None else str(value) for key, value in stream.meta.items()},
+    )
+    sink = io.BytesIO()
+
+    def drain() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return chunk
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield drain()
+        for batch in stream.batches:
+            if batch:
+                writer.write_batch(pa.record_batch(list(zip(*batch)), schema=schema))
+                yield drain()
+    yield drain()
+
+
+SERIES_FORMATS = {
+    "json": SeriesFormat("json", "application/json", encode_json_rows),
+    "columnar": SeriesFormat("columnar", "application/vnd.orkunotkun.columnar+json", encode_json_columns),
+    "msgpack": SeriesFormat("msgpack", "application/msgpack", encode_msgpack),
+    "arrow": SeriesFormat("arrow", "application/vnd.apache.arrow.stream", encode_arrow),
+}
+_MEDIA_TYPE_ALIASES = {
+    "*/*": "json",
+    "application/*": "json",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+    **{series_format.media_type: name for name, series_format in SERIES_FORMATS.items()},
+}
+
+
+def format_available(name: str) -> bool:
+    if name == "msgpack":
+        return _load_msgpack() is not None
+    if name == "arrow":
+        return _load_pyarrow() is not None
+    return name in SERIES_FORMATS
+
+
+def _accepted_media_types(accept: str) -> list[str]:
+    weighted: list[tuple[float, int, str]] = []
+    for index, part in enumerate(accept.split(",")):
+        media_type, *params = (piece.strip() for piece in part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            weighted.append((-quality, index, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(weighted)]
+
+
+def negotiate_format(accept: str | None, requested: str | None = None) -> SeriesFormat:
+    """Pick the response format from an explicit format name, else from the Accept header.
+
+    An unknown or unavailable explicit format raises UnsupportedFormat; an Accept header
+    naming nothing usable gets the JSON default.
+    """
+    if requested:
+        name = requested.strip().lower()
+        if name not in SERIES_FORMATS:
+            raise UnsupportedFormat(f"format must be one of: {', '.join(SERIES_FORMATS)}")
+        if not format_available(name):
+            raise UnsupportedFormat(f"{name} responses need the optional 'binary' dependencies on the server")
+        return SERIES_FORMATS[name]
+
+    for media_type in _accepted_media_types(accept or ""):
+        name = _MEDIA_TYPE_ALIASES.get(media_type)
+        if name and format_available(name):
+            return SERIES_FORMATS[name]
+    return SERIES_FORMATS["json"]
@@ -0,0 +1,125 @@
+"""Cross-process cache invalidation over Postgres LISTEN/NOTIFY.
+
+finalize_ingestion_run (and run_reprocess) notify DATA_CHANGED_CHANNEL in the same
+transaction that publishes new data, with the run id and the local days whose rollups
+changed. Every API worker holds one autocommit connection listening on that channel,
+so a sync finished by another worker, the scheduler of another process or a CLI run
+evicts exactly the affected cache entries everywhere. The in-memory daily store, when
+present, re-reads the touched days first, so rebuilt responses see the new data. While
+connected, the cache skips its version polling; after a dropped connection the store is
+reloaded and the cache invalidated once, since notifications sent in between are lost.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import date
+import json
+import logging
+import os
+import threading
+
+from psycopg import Connection
+
+from app.dashboard.cache import DashboardCache
+from app.dashboard.daily_store import DailyStore
+from app.ingest.db import DATA_CHANGED_CHANNEL, get_connection
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECONNECT_SECONDS = 5.0
+# How often the listening thread wakes up to check whether it should stop.
+_POLL_SECONDS = 1.0
+
+
+def parse_data_changed(payload: str) -> tuple[int | None, tuple[date, date] | None]:
+    """The run id and touched day range of a notification payload."""
+    message = json.loads(payload)
+    run_id = message.get("run_id")
+    if message.get("from") and message.get("to"):
+        return run_id, (date.fromisoformat(message["from"]), date.fromisoformat(message["to"]))
+    return run_id, None
+
+
+def apply_data_change(
+    cache: DashboardCache,
+    store: DailyStore | None,
+    run_id: int | None,
+    touched_days: tuple[date, date] | None,
+) -> None:
+    """Update the daily store, then evict the cache entries the change affects."""
+    if store is not None:
+        store.apply_change(touched_days)
+    evicted = cache.evict(run_id, touched_days)
+    logger.debug("Run %s touched %s; evicted %d cache entries", run_id, touched_days, evicted)
+
+
+class DataChangeListener:
+    def __init__(
+        self,
+        cache: DashboardCache,
+        store: DailyStore | None = None,
+        connect: Callable[[], Connection] = get_connection,
+        reconnect_seconds: float = DEFAULT_RECONNECT_SECONDS,
+    ) -> None:
+        self._cache = cache
+        self._store = store
+        self._connect = connect
+        self._reconnect_seconds = reconnect_seconds
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="dashboard-cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=_POLL_SECONDS * 5)
+            self._thread = None
+
+    def handle(self, payload: str) -> None:
+        try:
+            run_id, touched_days = parse_data_changed(payload)
+        except (ValueError, TypeError, AttributeError):
+            logger.warning("Ignoring malformed %s payload: %r", DATA_CHANGED_CHANNEL, payload)
+            self._resync()
+            return
+        apply_data_change(self._cache, self._store, run_id, touched_days)
+
+    def _resync(self) -> None:
+        if self._store is not None:
+            self._store.load()
+        self._cache.invalidate()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                with self._connect() as connection:
+                    connection.autocommit = True
+                    connection.execute(f"listen {DATA_CHANGED_CHANNEL}")
+                    # Anything that changed while no listener was connected is unknown.
+                    self._resync()
+                    self._cache.set_listening(True)
+                    if self._store is not None:
+                        self._store.set_live(True)
+                    while not self._stopping.is_set():
+                        for notify in connection.notifies(timeout=_POLL_SECONDS):
+                            self.handle(notify.payload)
+            except Exception as error:
+                # Keep trying through database restarts and network drops.
+                logger.warning("Dashboard cache listener disconnected: %s", error)
+            finally:
+                self._cache.set_listening(False)
+                if self._store is not None:
+                    self._store.set_live(False)
+            self._stopping.wait(self._reconnect_seconds)
+
+
+def load_data_change_listener(cache: DashboardCache, store: DailyStore | None = None) -> DataChangeListener | None:
+    if (os.getenv("DASHBOARD_CACHE_LISTEN") or "true").strip().lower() in {"0", "false", "no", "off"}:
+        return None
+    return DataChangeListener(cache, store)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import date, datetime, UTC
+from decimal import Decimal
+import logging
+from typing import Any
+
+from psycopg import Connection
+from psycopg.types.json import Jsonb
+
+from app.dashboard.presets import PRESETS, build_kpi_snapshot, kpi_cards, preset_range
+from app.dashboard.series import fetch_daily
+from app.ingest.db import get_connection
+
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_COLUMNS = (
+    "preset",
+    "as_of",
+    "run_id",
+    "range_start",
+    "range_end",
+    "compare_start",
+    "compare_end",
+    "rolling_start",
+    "day_count",
+    "brutto_kwh",
+    "netto_kwh",
+    "ev_kwh",
+    "hot_water_usage",
+    "latest_temperature_c",
+    "latest_temperature_day",
+    "previous_brutto_kwh",
+    "previous_netto_kwh",
+    "previous_ev_kwh",
+    "previous_hot_water_usage",
+    "brutto_delta_percent",
+    "netto_delta_percent",
+    "ev_delta_percent",
+    "hot_water_delta_percent",
+    "rolling_average_kwh",
+    "rolling_series",
+)
+
+
+def compute_kpi_snapshot(connection: Connection, preset: str, today: date, run_id: int | None = None) -> dict[str, Any]:
+    window = preset_range(preset, today)
+    rows = fetch_daily(connection, min(window.rolling_start, window.compare_start), window.end)
+    return {
+        "preset": preset,
+        "as_of": today,
+        "run_id": run_id,
+        "range_start": window.start,
+        "range_end": window.end,
+        "compare_start": window.compare_start,
+        "compare_end": window.compare_end,
+        "rolling_start": window.rolling_start,
+        **build_kpi_snapshot(window, rows),
+    }
+
+
+def store_kpi_snapshot(connection: Connection, snapshot: dict[str, Any]) -> None:
+    values = [Jsonb(snapshot[column]) if column == "rolling_series" else snapshot[column] for column in SNAPSHOT_COLUMNS]
+    updates = ", ".join(f"{column} = excluded.{column}" for column in SNAPSHOT_COLUMNS[2:])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            insert into energy.dashboard_kpi_snapshots ({", ".join(SNAPSHOT_COLUMNS)})
+            values ({", ".join(["%s"] * len(SNAPSHOT_COLUMNS))})
+            on conflict (preset, as_of) do update set {updates}, computed_at = now()
+            """,
+            values,
+        )
+
+
+def refresh_kpi_snapshots(connection: Connection, today: date, run_id: int | None = None) -> int:
+    """Recompute and store the snapshot of every preset for today."""
+    for preset in PRESETS:
+        store_kpi_snapshot(connection, compute_kpi_snapshot(connection, preset, today, run_id))
+    connection.commit()
+    return len(PRESETS)
+
+
+def discard_kpi_snapshots(connection: Connection, today: date) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("delete from energy.dashboard_kpi_snapshots where as_of = %s", (today,))
+    connection.commit()
+
+
+def refresh_kpi_snapshots_after_change(
+    today: date, run_id: int | None = None, connect: Callable[[], Connection] = get_connection
+) -> bool:
+    """Refresh today's snapshots after new data landed, without ever raising.
+
+    Snapshots are derived data, so a failure must not keep a run from being finalized.
+    Today's snapshots are deleted instead, and reads recompute them rather than serve
+    totals from before the change. Returns whether the refresh succeeded.
+    """
+    try:
+        with connect() as connection:
+            refresh_kpi_snapshots(connection, today, run_id)
+        return True
+    except Exception:
+        logger.exception("Could not refresh KPI snapshots for %s; discarding them", today)
+    try:
+        with connect() as connection:
+            discard_kpi_snapshots(connection, today)
+    except Exception:
+        logger.exception("Could not discard KPI snapshots for %s", today)
+    return False
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def fetch_kpi_snapshot(connection: Connection, preset: str, today: date) -> dict[str, Any] | None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            select {", ".join(SNAPSHOT_COLUMNS)}, computed_at
+            from energy.dashboard_kpi_snapshots
+            where preset = %s and as_of = %s
+            """,
+            (preset, today),
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return {column: _json_value(value) for column, value in zip((*SNAPSHOT_COLUMNS, "computed_at"), row)}
+
+
+def computed_kpi_snapshot(connection: Connection, preset: str, today: date) -> dict[str, Any]:
+    """Today's snapshot for the preset computed on the spot, shaped like a stored one but not stored.
+
+    Only refresh_kpi_snapshots_after_change writes snapshots, so concurrent cold reads never
+    race on the insert and a read-only role can serve them.
+    """
+    snapshot = {column: _json_value(value) for column, value in compute_kpi_snapshot(connection, preset, today).items()}
+    return {**snapshot, "computed_at": datetime.now(UTC).isoformat()}
+
+
+def get_kpi_snapshot(connection: Connection, preset: str, today: date) -> dict[str, Any]:
+    """Today's stored snapshot for the preset, or a computed one when none is stored.
+
+    A snapshot goes missing when no run has finalized yet today, since presets move with the date.
+    """
+    return fetch_kpi_snapshot(connection, preset, today) or computed_kpi_snapshot(connection, preset, today)
+
+
+def kpi_response(snapshot: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "preset": snapshot["preset"],
+        "as_of": snapshot["as_of"],
+        "run_id": snapshot["run_id"],
+        "computed_at": snapshot["computed_at"],
+        "range": {
+            "start": snapshot["range_start"],
+            "end": snapshot["range_end"],
+            "compare_start": snapshot["compare_start"],
+            "compare_end": snapshot["compare_end"],
+            "rolling_start": snapshot["rolling_start"],
+        },
+        "day_count": snapshot["day_count"],
+        "kpis": kpi_cards(snapshot),
+        "rolling_average_kwh": snapshot["rolling_average_kwh"],
+        "rolling_series": snapshot["rolling_series"],
+    }
@@ -0,0 +1,145 @@
+"""Dashboard date presets and KPI cards, ported from frontend/src/data/dashboardAdapter.ts.
+
+Ranges, totals and deltas follow mapPresetToRange and buildKpis exactly, so snapshot
+values match what the frontend computes from raw daily rows. Rolling averages look
+back into the 120-day window before the range, which the frontend fetches for that
+purpose, so the first days of a range get an average too.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+
+PRESETS = ("thisMonth", "last30Days", "last3Months")
+ROLLING_WINDOW_DAYS = 120
+ROLLING_PRECEDING_POINTS = 90
+ROLLING_MIN_POINTS = 7
+
+# (card key, label, snapshot metric, unit); deltas are stored as <card key>_delta_percent.
+KPI_CARDS = (
+    ("brutto", "Brutto", "brutto_kwh", "kWh"),
+    ("netto", "Netto", "netto_kwh", "kWh"),
+    ("ev", "EV", "ev_kwh", "kWh"),
+    ("hot_water", "Hot Water", "hot_water_usage", "m³"),
+)
+
+
+@dataclass(frozen=True)
+class PresetRange:
+    preset: str
+    start: date
+    end: date
+    compare_start: date
+    compare_end: date
+    rolling_start: date
+
+
+def _add_months_like_js(day: date, months: int) -> date:
+    # Date.setMonth keeps the day of month and rolls overflow forward (May 31 - 3 months = Mar 3).
+    month_index = day.year * 12 + day.month - 1 + months
+    first_of_month = date(month_index // 12, month_index % 12 + 1, 1)
+    return first_of_month + timedelta(days=day.day - 1)
+
+
+def preset_range(preset: str, today: date) -> PresetRange:
+    if preset == "thisMonth":
+        start = today.replace(day=1)
+    elif preset == "last30Days":
+        start = today - timedelta(days=29)
+    elif preset == "last3Months":
+        start = _add_months_like_js(today, -3) + timedelta(days=1)
+    else:
+        raise ValueError(f"preset must be one of: {', '.join(PRESETS)}")
+
+    span_days = max(1, (today - start).days + 1)
+    compare_end = start - timedelta(days=1)
+    return PresetRange(
+        preset=preset,
+        start=start,
+        end=today,
+        compare_start=compare_end - timedelta(days=span_days - 1),
+        compare_end=compare_end,
+        rolling_start=start - timedelta(days=ROLLING_WINDOW_DAYS),
+    )
+
+
+def _to_number(value: float | None) -> float:
+    return round(value or 0.0, 2)
+
+
+def _sum_metric(rows: list[dict[str, Any]], metric: str) -> float:
+    return round(sum(_to_number(row[metric]) for row in rows), 2)
+
+
+def delta_percent(current: float, previous: float) -> float | None:
+    if previous == 0:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def rolling_averages(rows: list[dict[str, Any]], range_start: date) -> list[dict[str, Any]]:
+    """Average daily brutto over up to 90 preceding rows, for each row from range_start on."""
+    series: list[dict[str, Any]] = []
+    values = [_to_number(row["brutto_kwh"]) for row in rows]
+    for index, row in enumerate(rows):
+        if row["day"] < range_start.isoformat():
+            continue
+        earlier = values[max(0, index - ROLLING_PRECEDING_POINTS) : index]
+        average = round(sum(earlier) / len(earlier), 2) if len(earlier) >= ROLLING_MIN_POINTS else None
+        series.append({"day": row["day"], "average_kwh": average})
+    return series
+
+
+def build_kpi_snapshot(preset_window: PresetRange, rows: list[dict[str, Any]]) -> dict[str, Any]:
+    """KPI totals, previous-period deltas and rolling averages from daily rows covering the rolling window."""
+    start, end = preset_window.start.isoformat(), preset_window.end.isoformat()
+    compare_start, compare_end = preset_window.compare_start.isoformat(), preset_window.compare_end.isoformat()
+    current = [row for row in rows if start <= row["day"] <= end]
+    previous = [row for row in rows if compare_start <= row["day"] <= compare_end]
+
+    totals = {metric: _sum_metric(current, metric) for metric in ("brutto_kwh", "netto_kwh", "ev_kwh", "hot_water_usage")}
+    previous_totals = {metric: _sum_metric(previous, metric) for metric in totals}
+    latest = current[-1] if current else None
+    rolling_series = rolling_averages([row for row in rows if row["day"] <= end], preset_window.start)
+
+    return {
+        "day_count": len(current),
+        **totals,
+        "latest_temperature_c": round(_to_number(latest["avg_temperature_c"]), 1) if latest else None,
+        "latest_temperature_day": latest["day"] if latest else None,
+        **{f"previous_{metric}": value for metric, value in previous_totals.items()},
+        "brutto_delta_percent": delta_percent(totals["brutto_kwh"], previous_totals["brutto_kwh"]),
+        "netto_delta_percent": delta_percent(totals["netto_kwh"], previous_totals["netto_kwh"]),
+        "ev_delta_percent": delta_percent(totals["ev_kwh"], previous_totals["ev_kwh"]),
+        "hot_water_delta_percent": delta_percent(totals["hot_water_usage"], previous_totals["hot_water_usage"]),
+        "rolling_average_kwh": rolling_series[-1]["average_kwh"] if rolling_series else None,
+        "rolling_series": rolling_series,
+    }
+
+
+def kpi_cards(snapshot: dict[str, Any]) -> list[dict[str, Any]]:
+    """The five KPI cards the dashboard renders, in buildKpis order."""
+    cards = [
+        {
+            "key": key,
+            "label": label,
+            "value": snapshot[metric],
+            "unit": unit,
+            "delta_percent": snapshot[f"{key}_delta_percent"],
+        }
+        for key, label, metric, unit in KPI_CARDS
+    ]
+    cards.append(
+        {
+            "key": "weather",
+            "label": "Weather",
+            "value": snapshot["latest_temperature_c"] or 0,
+            "unit": "°C",
+            "delta_percent": None,
+            "as_of_day": snapshot["latest_temperature_day"],
+        }
+    )
+    return cards
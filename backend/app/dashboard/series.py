@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import date, timedelta
+from typing import Any
+
+from psycopg import Connection
+
+
+RESOLUTIONS = ("hour", "day", "week", "month")
+DEFAULT_MAX_POINTS = 200
+METRIC_COLUMNS = ("brutto_kwh", "ev_kwh", "netto_kwh", "hot_water_usage", "avg_temperature_c")
+STREAM_BATCH_ROWS = 2000
+
+_SERIES_SQL = """
+select
+  {time_column},
+  brutto_kwh{cast},
+  ev_kwh{cast},
+  netto_kwh{cast},
+  hot_water_usage{cast},
+  avg_temperature_c{cast}
+from energy.dashboard_rollups
+where resolution = %s
+  and bucket_start >= date_trunc(%s, %s::timestamp)
+  and bucket_start < %s::timestamp + interval '1 day'
+order by bucket_start
+"""
+
+
+def count_buckets(date_from: date, date_to: date, resolution: str) -> int:
+    day_count = (date_to - date_from).days + 1
+    if resolution == "hour":
+        return day_count * 24
+    if resolution == "day":
+        return day_count
+    if resolution == "week":
+        first_monday = date_from - timedelta(days=date_from.weekday())
+        last_monday = date_to - timedelta(days=date_to.weekday())
+        return (last_monday - first_monday).days // 7 + 1
+    if resolution == "month":
+        return (date_to.year - date_from.year) * 12 + date_to.month - date_from.month + 1
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+def choose_resolution(date_from: date, date_to: date, max_points: int = DEFAULT_MAX_POINTS) -> str:
+    """Return the finest resolution whose bucket count fits in max_points, falling back to month."""
+    for resolution in RESOLUTIONS:
+        if count_buckets(date_from, date_to, resolution) <= max_points:
+            return resolution
+    return "month"
+
+
+def fetch_series(connection: Connection, date_from: date, date_to: date, resolution: str) -> list[dict[str, Any]]:
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _SERIES_SQL.format(time_column="bucket_start", cast=""),
+            (resolution, resolution, date_from, date_to),
+        )
+        rows = cursor.fetchall()
+
+    return [
+        {
+            "bucket_start": bucket_start.isoformat(),
+            "brutto_kwh": _to_float(brutto_kwh),
+            "ev_kwh": _to_float(ev_kwh),
+            "netto_kwh": _to_float(netto_kwh),
+            "hot_water_usage": _to_float(hot_water_usage),
+            "avg_temperature_c": _to_float(avg_temperature_c),
+        }
+        for bucket_start, brutto_kwh, ev_kwh, netto_kwh, hot_water_usage, avg_temperature_c in rows
+    ]
+
+
+def fetch_daily(connection: Connection, date_from: date, date_to: date) -> list[dict[str, Any]]:
+    """Daily rows shaped like the public dashboard_daily view, read from the day rollups."""
+    return [
+        {"day": point.pop("bucket_start")[:10], **point}
+        for point in fetch_series(connection, date_from, date_to, "day")
+    ]
+
+
+def stream_series(
+    connection: Connection,
+    date_from: date,
+    date_to: date,
+    resolution: str,
+    time_column: str = "bucket_start",
+    batch_rows: int = STREAM_BATCH_ROWS,
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Rollup rows as (time, *METRIC_COLUMNS) tuples, in batches from a server-side cursor.
+
+    Metrics arrive as floats. time_column "day" yields dates instead of bucket_start timestamps.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    if time_column not in {"bucket_start", "day"}:
+        raise ValueError(f"Unknown time column: {time_column}")
+
+    with connection.cursor(name="dashboard_series_stream") as cursor:
+        cursor.execute(
+            _SERIES_SQL.format(
+                time_column="bucket_start::date as day" if time_column == "day" else "bucket_start",
+                cast="::float8",
+            ),
+            (resolution, resolution, date_from, date_to),
+        )
+        while batch := cursor.fetchmany(batch_rows):
+            yield batch
+
+
+ROLLING_METRICS = ("brutto_kwh", "netto_kwh", "ev_kwh", "hot_water_usage", "avg_temperature_c")
+DEFAULT_ROLLING_WINDOW = 90
+DEFAULT_ROLLING_MIN_POINTS = 7
+
+
+def fetch_rolling_comparison(
+    connection: Connection,
+    date_from: date,
+    date_to: date,
+    metric: str = "brutto_kwh",
+    window: int = DEFAULT_ROLLING_WINDOW,
+    min_points: int = DEFAULT_ROLLING_MIN_POINTS,
+) -> dict[str, Any]:
+    """Daily metric values with a rolling average and the previous period, computed in SQL.
+
+    The average covers up to `window` preceding daily rows, like the dashboard's 3-month
+    line, and is null until `min_points` rows precede a day. The previous period is the
+    equally long span right before date_from; each day is paired with the day one span earlier.
+    """
+    if metric not in ROLLING_METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(ROLLING_METRICS)}")
+
+    span_days = (date_to - date_from).days + 1
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            with daily as (
+              select bucket_start::date as day, {metric} as value
+              from energy.dashboard_rollups
+              where resolution = 'day'
+                and bucket_start >= least(%(from)s::date - %(window)s, %(from)s::date - %(span)s)::timestamp
+                and bucket_start < %(to)s::timestamp + interval '1 day'
+            ), windowed as (
+              select
+                day,
+                value,
+                avg(value) over preceding_rows as rolling_average,
+                count(value) over preceding_rows as rolling_points
+              from daily
+              window preceding_rows as (order by day rows between %(window)s preceding and 1 preceding)
+            )
+            select
+              current.day,
+              current.value,
+              case when current.rolling_points >= %(min_points)s then round(current.rolling_average, 2) end,
+              previous.value
+            from windowed current
+            left join daily previous on previous.day = current.day - %(span)s
+            where current.day >= %(from)s
+            order by current.day
+            """,
+            {"from": date_from, "to": date_to, "window": window, "min_points": min_points, "span": span_days},
+        )
+        rows = cursor.fetchall()
+
+        cursor.execute(
+            f"""
+            select
+              sum({metric}) filter (where bucket_start >= %(from)s::timestamp),
+              sum({metric}) filter (where bucket_start < %(from)s::timestamp)
+            from energy.dashboard_rollups
+            where resolution = 'day'
+              and bucket_start >= (%(from)s::date - %(span)s)::timestamp
+              and bucket_start < %(to)s::timestamp + interval '1 day'
+            """,
+            {"from": date_from, "to": date_to, "span": span_days},
+        )
+        current_total, previous_total = cursor.fetchone()
+
+    current_total, previous_total = _to_float(current_total) or 0.0, _to_float(previous_total) or 0.0
+    return {
+        "series": [
+            {
+                "day": day.isoformat(),
+                "value": _to_float(value),
+                "rolling_average": _to_float(rolling_average),
+                "previous_value": _to_float(previous_value),
+            }
+            for day, value, rolling_average, previous_value in rows
+        ],
+        "totals": {
+            "current": round(current_total, 2),
+            "previous": round(previous_total, 2),
+            "previous_from": (date_from - timedelta(days=span_days)).isoformat(),
+            "previous_to": (date_from - timedelta(days=1)).isoformat(),
+            "delta_percent": (
+                round((current_total - previous_total) / previous_total * 100, 1) if previous_total else None
+            ),
+        },
+    }
+
+
+def _to_float(value: Any) -> float | None:
+    return float(value) if value is not None else None
@@ -0,0 +1,269 @@
+"""Columnar row batches for the raw energy tables.
+
+Each batch keeps one list per table column instead of one dict per row. Provider
+payloads are parsed straight into a batch, normalizers work on the column lists,
+and the writers in app.ingest.db hand the lists to Postgres as typed arrays.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from itertools import islice
+import operator
+from typing import Any, Self
+
+from app.ingest.parsing import (
+    parse_float_column,
+    parse_non_negative_int_column,
+    parse_timestamp_column,
+)
+
+
+class RowBatch:
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        first_column = fields(self)[0].name
+        return len(getattr(self, first_column))
+
+    def select(self, indexes: list[int]) -> Self:
+        columns = {
+            column.name: [getattr(self, column.name)[index] for index in indexes]
+            for column in fields(self)
+        }
+        return type(self)(**columns)
+
+    def sorted_by(self, key: list[Any]) -> Self:
+        return self.select(sorted(range(len(self)), key=key.__getitem__))
+
+    def deduplicated(self, key: Callable[[int], Hashable]) -> Self:
+        """Keep the last row for each key, so one upsert statement never hits a row twice."""
+        last_index_by_key = {key(index): index for index in range(len(self))}
+        if len(last_index_by_key) == len(self):
+            return self
+        return self.select(sorted(last_index_by_key.values()))
+
+    def time_ordered_unique(self, times: list[datetime], same_time_key: list[Hashable] | None = None) -> Self:
+        """Sort by time and keep the last row per (time, same_time_key).
+
+        Only rows sharing a timestamp are compared, so no per-row key tuples are built,
+        and an already ordered, duplicate-free batch is returned as is, without building
+        any index list: provider pages usually arrive that way.
+        """
+        in_order = all(map(operator.le, times, islice(times, 1, None)))
+        if in_order and not _repeats_within_time(times, same_time_key):
+            return self
+        order = range(len(times)) if in_order else sorted(range(len(times)), key=times.__getitem__)
+        kept_indexes: list[int] = []
+        position_by_key: dict[Hashable, int] = {}
+        current_time: datetime | None = None
+        unchanged = True
+
+        for index in order:
+            row_time = times[index]
+            if row_time != current_time:
+                current_time = row_time
+                position_by_key.clear()
+            row_key = same_time_key[index] if same_time_key is not None else None
+            position = position_by_key.get(row_key)
+            if position is None:
+                position_by_key[row_key] = len(kept_indexes)
+                unchanged = unchanged and index == len(kept_indexes)
+                kept_indexes.append(index)
+            else:
+                kept_indexes[position] = index
+                unchanged = False
+
+        return self if unchanged else self.select(kept_indexes)
+
+
+@dataclass(slots=True)
+class ElectricityBatch(RowBatch):
+    meter_ids: list[str] = field(default_factory=list)
+    delivery_point_names: list[str | None] = field(default_factory=list)
+    measured_at: list[datetime] = field(default_factory=list)
+    delta_kwh: list[float | None] = field(default_factory=list)
+    index_values: list[float | None] = field(default_factory=list)
+    ambient_temperatures_c: list[float | None] = field(default_factory=list)
+    unit_codes: list[str | None] = field(default_factory=list)
+    utility_types: list[str | None] = field(default_factory=list)
+    source_payloads: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_usage_rows(cls, usage_rows: list[Any]) -> ElectricityBatch:
+        """Parse HS Veitur UsageData rows."""
+        rows = [row for row in usage_rows if isinstance(row, dict)]
+        return cls(
+            meter_ids=[str(row.get("meter_id") or "unknown") for row in rows],
+            delivery_point_names=[_to_text(row.get("delivery_point_name")) for row in rows],
+            measured_at=parse_timestamp_column([row.get("date") for row in rows]),
+            delta_kwh=parse_float_column([row.get("delta_value") for row in rows]),
+            index_values=parse_float_column([row.get("index_value") for row in rows]),
+            ambient_temperatures_c=parse_float_column([row.get("temperature") for row in rows]),
+            unit_codes=[_to_text(row.get("unitcode")) for row in rows],
+            utility_types=[_to_text(row.get("type_data") or row.get("type")) for row in rows],
+            source_payloads=rows,
+        )
+
+    def prepared_for_write(self) -> ElectricityBatch:
+        return self.time_ordered_unique(self.measured_at, self.meter_ids)
+
+
+@dataclass(slots=True)
+class EvChargerBatch(RowBatch):
+    charger_ids: list[str] = field(default_factory=list)
+    charger_names: list[str | None] = field(default_factory=list)
+    session_ids: list[str] = field(default_factory=list)
+    started_at: list[datetime] = field(default_factory=list)
+    finished_at: list[datetime] = field(default_factory=list)
+    energy_kwh: list[float | None] = field(default_factory=list)
+    duration_seconds: list[int] = field(default_factory=list)
+    source_payloads: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_charge_history(cls, session_rows: list[Any]) -> EvChargerBatch:
+        """Parse Zaptec charge-history sessions, accepting both PascalCase and camelCase fields."""
+        rows = [row for row in session_rows if isinstance(row, dict)]
+        charger_ids = [
+            str(row.get("ChargerId") or row.get("chargerId") or row.get("DeviceId") or "unknown") for row in rows
+        ]
+        started_at = parse_timestamp_column([row.get("StartDateTime") or row.get("startDateTime") for row in rows])
+        finished_at = [
+            finished or started
+            for finished, started in zip(
+                parse_timestamp_column([row.get("EndDateTime") or row.get("endDateTime") for row in rows], optional=True),
+                started_at,
+            )
+        ]
+        return cls(
+            charger_ids=charger_ids,
+            charger_names=[_to_text(row.get("DeviceName") or row.get("ChargerName")) for row in rows],
+            session_ids=[
+                str(row.get("Id") or row.get("id") or f"{charger_id}-{row.get('StartDateTime')}")
+                for row, charger_id in zip(rows, charger_ids)
+            ],
+            started_at=started_at,
+            finished_at=finished_at,
+            energy_kwh=parse_float_column(
+                [row.get("Energy") if row.get("Energy") is not None else row.get("TotalChargeKwh") for row in rows]
+            ),
+            duration_seconds=[
+                int((finished - started).total_seconds()) if finished >= started else 0
+                for started, finished in zip(started_at, finished_at)
+            ],
+            source_payloads=rows,
+        )
+
+    def prepared_for_write(self) -> EvChargerBatch:
+        deduplicated = self.deduplicated(lambda index: (self.charger_ids[index], self.session_ids[index]))
+        return deduplicated.sorted_by(deduplicated.started_at)
+
+
+@dataclass(slots=True)
+class HotWaterBatch(RowBatch):
+    measured_at: list[datetime] = field(default_factory=list)
+    period_usage_values: list[float | None] = field(default_factory=list)
+    interval_start_at: list[datetime] = field(default_factory=list)
+    interval_end_at: list[datetime] = field(default_factory=list)
+    interval_days: list[int] = field(default_factory=list)
+    daily_estimations: list[float | None] = field(default_factory=list)
+    reading_values: list[float | None] = field(default_factory=list)
+    usage_units: list[str | None] = field(default_factory=list)
+    data_statuses: list[int | None] = field(default_factory=list)
+    source_payloads: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_reading_history(cls, reading_rows: list[Any]) -> HotWaterBatch:
+        """Parse Veitur reading-history rows, oldest first, with intervals from readingDays."""
+        rows = [row for row in reading_rows if isinstance(row, dict)]
+        measured_at = parse_timestamp_column([row.get("readingDate") for row in rows])
+        interval_days = parse_non_negative_int_column([row.get("readingDays") for row in rows])
+        batch = cls(
+            measured_at=measured_at,
+            period_usage_values=parse_float_column([row.get("usage") for row in rows]),
+            interval_start_at=[end - timedelta(days=days) for end, days in zip(measured_at, interval_days)],
+            interval_end_at=list(measured_at),
+            interval_days=interval_days,
+            daily_estimations=parse_float_column([row.get("dailyEstimation") for row in rows]),
+            reading_values=parse_float_column([row.get("readingValue") for row in rows]),
+            usage_units=[None] * len(rows),
+            data_statuses=[0] * len(rows),
+            source_payloads=rows,
+        )
+        return batch.sorted_by(batch.measured_at)
+
+    @classmethod
+    def from_usage_series(cls, usage_payload: Any) -> HotWaterBatch:
+        """Parse a Veitur usage-series payload; each usage is a zero-length interval."""
+        if not isinstance(usage_payload, dict):
+            return cls()
+
+        usages = [
+            usage
+            for meter_data in usage_payload.get("data", [])
+            if isinstance(meter_data, dict)
+            for usage in meter_data.get("usages", [])
+            if isinstance(usage, dict)
+        ]
+        measured_at = parse_timestamp_column([usage.get("timeStamp") for usage in usages])
+        return cls(
+            measured_at=measured_at,
+            period_usage_values=parse_float_column([usage.get("value") for usage in usages]),
+            interval_start_at=list(measured_at),
+            interval_end_at=list(measured_at),
+            interval_days=[0] * len(usages),
+            daily_estimations=[None] * len(usages),
+            reading_values=[None] * len(usages),
+            usage_units=[_to_text(usage_payload.get("usageUnit"))] * len(usages),
+            data_statuses=[usage_payload.get("dataStatus")] * len(usages),
+            source_payloads=usages,
+        )
+
+    def prepared_for_write(self) -> HotWaterBatch:
+        return self.time_ordered_unique(self.measured_at)
+
+
+@dataclass(slots=True)
+class WeatherBatch(RowBatch):
+    """Open-Meteo hourly arrays, kept exactly as received; Postgres pads and parses them."""
+
+    timestamps: list[str] = field(default_factory=list)
+    temperatures_c: list[float | int | None] = field(default_factory=list)
+    humidities_percent: list[float | int | None] = field(default_factory=list)
+    wind_speeds_kmh: list[float | int | None] = field(default_factory=list)
+
+    @classmethod
+    def from_hourly(cls, hourly: Any) -> WeatherBatch:
+        if not isinstance(hourly, dict):
+            return cls()
+        return cls(
+            timestamps=_list_or_empty(hourly.get("time")),
+            temperatures_c=_list_or_empty(hourly.get("temperature_2m")),
+            humidities_percent=_list_or_empty(hourly.get("relative_humidity_2m")),
+            wind_speeds_kmh=_list_or_empty(hourly.get("wind_speed_10m")),
+        )
+
+
+def _repeats_within_time(times: list[datetime], same_time_key: list[Hashable] | None) -> bool:
+    """Whether a time-ordered column has two rows with the same time and key."""
+    current_time: datetime | None = None
+    keys: set[Hashable] = set()
+    for index, row_time in enumerate(times):
+        if row_time != current_time:
+            current_time = row_time
+            keys.clear()
+        row_key = same_time_key[index] if same_time_key is not None else None
+        if row_key in keys:
+            return True
+        keys.add(row_key)
+    return False
+
+
+def _list_or_empty(value: Any) -> list[Any]:
+    return value if isinstance(value, list) else []
+
+
+def _to_text(value: Any) -> str | None:
+    return None if value is None else str(value)
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
-from datetime import datetime, UTC
-import json
+from datetime import date, datetime, UTC
+import logging
 import os
 from typing import Any
 
 import psycopg
 from psycopg import Connection
+from psycopg.types.json import Jsonb, set_json_dumps, set_json_loads
+
+from app import json_codec
+from app.ingest.batches import ElectricityBatch, EvChargerBatch, HotWaterBatch, WeatherBatch
+from app.ingest.freshness import SourceFreshness
+from app.ingest.parsing import parse_float_column
+from app.instrumentation import sum_timing_details
+
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(slots=True)
@@ -27,7 +38,11 @@ def get_connection() -> Connection:
     user = os.getenv("SUPABASE_DB_USER", "postgres")
     password = os.getenv("SUPABASE_DB_PASSWORD", "postgres")
     connection_string = f"postgresql://{user}:{password}@{host}:{port}/{database}"
-    return psycopg.connect(connection_string)
+    connection = psycopg.connect(connection_string)
+    # jsonb values are encoded straight to bytes and decoded by the shared codec.
+    set_json_dumps(json_codec.dumps, context=connection)
+    set_json_loads(json_codec.loads, context=connection)
+    return connection
 
 
 def create_ingestion_run(connection: Connection) -> int:
@@ -44,7 +59,41 @@ def create_ingestion_run(connection: Connection) -> int:
     return int(run_id)
 
 
-def finalize_ingestion_run(connection: Connection, run_id: int, source_results: list[SourceWriteResult]) -> None:
+DATA_CHANGED_CHANNEL = "energy_data_changed"
+
+_run_finalized_listeners: list[Callable[[int, tuple[date, date] | None], None]] = []
+
+
+def add_run_finalized_listener(listener: Callable[[int, tuple[date, date] | None], None]) -> None:
+    """Call listener(run_id, touched_days) after each ingestion run in this process is finalized.
+
+    The run is already committed by then, so a listener that raises is logged and never
+    fails the run or keeps the other listeners from being called.
+    """
+    _run_finalized_listeners.append(listener)
+
+
+def notify_data_changed(connection: Connection, run_id: int | None, touched_days: tuple[date, date] | None) -> None:
+    """Queue a notification on DATA_CHANGED_CHANNEL; Postgres delivers it when the transaction commits.
+
+    touched_days is the inclusive range of local days whose rollups changed, or None when no day did.
+    """
+    payload = {
+        "run_id": run_id,
+        "from": touched_days[0].isoformat() if touched_days else None,
+        "to": touched_days[1].isoformat() if touched_days else None,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute("select pg_notify(%s, %s)", (DATA_CHANGED_CHANNEL, json_codec.dumps(payload).decode()))
+
+
+def finalize_ingestion_run(
+    connection: Connection,
+    run_id: int,
+    source_results: list[SourceWriteResult],
+    touched_days: tuple[date, date] | None = None,
+) -> None:
+    # Skipped sources were not called, so they count neither as success nor as failure.
     success_count = sum(1 for result in source_results if result.status == "success")
     failure_count = sum(1 for result in source_results if result.status == "failed")
     has_partial_or_empty = any(result.status in {"partial", "empty"} for result in source_results)
@@ -60,6 +109,9 @@ def finalize_ingestion_run(connection: Connection, run_id: int, source_results:
 
     details = {
         "finalized_at": datetime.now(UTC).isoformat(),
+        "timing": sum_timing_details(
+            [(result.details or {})["timing"] for result in source_results if "timing" in (result.details or {})]
+        ),
         "source_results": [
             {
                 "source": result.source_name,
@@ -86,10 +138,17 @@ def finalize_ingestion_run(connection: Connection, run_id: int, source_results:
               details = %s::jsonb
             where id = %s
             """,
-            (final_status, len(source_results), success_count, failure_count, json.dumps(details), run_id),
+            (final_status, len(source_results), success_count, failure_count, Jsonb(details), run_id),
         )
+    notify_data_changed(connection, run_id, touched_days)
     connection.commit()
 
+    for listener in _run_finalized_listeners:
+        try:
+            listener(run_id, touched_days)
+        except Exception:
+            logger.exception("Run finalized listener failed for ingestion run %s", run_id)
+
 
 def write_source_status(connection: Connection, run_id: int, result: SourceWriteResult) -> None:
     with connection.cursor() as cursor:
@@ -110,16 +169,79 @@ def write_source_status(connection: Connection, run_id: int, result: SourceWrite
                 result.failure_category,
                 result.message,
                 run_id,
-                json.dumps(result.details or {"rows_written": result.rows_written}),
+                Jsonb(result.details or {"rows_written": result.rows_written}),
             ),
         )
     connection.commit()
 
 
-def upsert_electricity_row(connection: Connection, row: dict[str, Any], run_id: int) -> bool:
-    measured_at = _parse_timestamp(row.get("date"))
-    meter_id = str(row.get("meter_id") or "unknown")
+def refresh_dashboard_rollups(connection: Connection, from_date: date, to_date: date) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute("select energy.refresh_dashboard_rollups(%s, %s)", (from_date, to_date))
+        rows_refreshed = cursor.fetchone()[0]
+    connection.commit()
+    return int(rows_refreshed or 0)
 
+
+def get_latest_hot_water_reading(
+    connection: Connection,
+    permanent_number: str,
+    before: datetime,
+) -> tuple[datetime, float] | None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            select measured_at, reading_value
+            from energy.hot_water_raw
+            where source = 'veitur'
+              and permanent_number = %s
+              and measured_at < %s
+              and reading_value is not null
+            order by measured_at desc
+            limit 1
+            """,
+            (permanent_number, before),
+        )
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+    return row[0], float(row[1])
+
+
+def get_source_freshness(connection: Connection) -> dict[str, SourceFreshness]:
+    """Latest stored data timestamp and last successful incremental check for each source."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            with watermarks (source_name, latest_data_at) as (
+              select 'hsveitur', max(measured_at) from energy.electricity_raw where source = 'hsveitur'
+              union all
+              select 'veitur', max(coalesce(interval_end_at, measured_at)) from energy.hot_water_raw where source = 'veitur'
+              union all
+              select 'zaptec', max(coalesce(finished_at, started_at)) from energy.ev_charger_raw where source = 'zaptec'
+              union all
+              select 'weather', max(measured_at) from energy.weather_raw where source = 'open_meteo'
+            ), checks as (
+              select source_name, max(checked_at) as last_success_at
+              from energy.source_status
+              where status in ('success', 'partial', 'empty')
+                and not details ? 'gap_window'
+              group by source_name
+            )
+            select watermarks.source_name, watermarks.latest_data_at, checks.last_success_at
+            from watermarks
+            left join checks using (source_name)
+            """
+        )
+        return {
+            source_name: SourceFreshness(latest_data_at=latest_data_at, last_success_at=last_success_at)
+            for source_name, latest_data_at, last_success_at in cursor.fetchall()
+        }
+
+
+def write_electricity_batch(connection: Connection, batch: ElectricityBatch, run_id: int) -> int:
+    batch = batch.prepared_for_write()
     with connection.cursor() as cursor:
         cursor.execute(
             """
@@ -135,8 +257,25 @@ def upsert_electricity_row(connection: Connection, row: dict[str, Any], run_id:
               utility_type,
               source_payload,
               ingestion_run_id
-            ) values (
-              'hsveitur', %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s
+            )
+            select
+              'hsveitur',
+              usage.meter_id,
+              usage.delivery_point_name,
+              usage.measured_at,
+              usage.delta_kwh,
+              usage.index_value,
+              usage.ambient_temperature_c,
+              usage.unit_code,
+              usage.utility_type,
+              usage.source_payload,
+              %s
+            from unnest(
+              %s::text[], %s::text[], %s::timestamptz[], %s::float8[], %s::float8[],
+              %s::float8[], %s::text[], %s::text[], %s::jsonb[]
+            ) as usage(
+              meter_id, delivery_point_name, measured_at, delta_kwh, index_value,
+              ambient_temperature_c, unit_code, utility_type, source_payload
             )
             on conflict (source, meter_id, measured_at)
             do update set
@@ -147,39 +286,27 @@ def upsert_electricity_row(connection: Connection, row: dict[str, Any], run_id:
               unit_code = excluded.unit_code,
               utility_type = excluded.utility_type,
               source_payload = excluded.source_payload,
+              source_payload_archived_at = null,
               ingestion_run_id = excluded.ingestion_run_id
             """,
             (
-                meter_id,
-                row.get("delivery_point_name"),
-                measured_at,
-                row.get("delta_value"),
-                row.get("index_value"),
-                row.get("temperature"),
-                row.get("unitcode"),
-                row.get("type_data") or row.get("type"),
-                json.dumps(row),
                 run_id,
+                batch.meter_ids,
+                batch.delivery_point_names,
+                batch.measured_at,
+                batch.delta_kwh,
+                batch.index_values,
+                batch.ambient_temperatures_c,
+                batch.unit_codes,
+                batch.utility_types,
+                _jsonb_array(batch.source_payloads),
             ),
         )
-    return True
+        return cursor.rowcount
 
 
-def upsert_hot_water_row(
-    connection: Connection,
-    permanent_number: str,
-    measured_at: datetime,
-    period_usage_value: float | int | None,
-    interval_start_at: datetime,
-    interval_end_at: datetime,
-    interval_days: int,
-    daily_estimation: float | int | None,
-    reading_value: float | int | None,
-    usage_unit: str | None,
-    data_status: int | None,
-    source_payload: dict[str, Any],
-    run_id: int,
-) -> bool:
+def write_hot_water_batch(connection: Connection, permanent_number: str, batch: HotWaterBatch, run_id: int) -> int:
+    batch = batch.prepared_for_write()
     with connection.cursor() as cursor:
         cursor.execute(
             """
@@ -188,164 +315,194 @@ def upsert_hot_water_row(
               permanent_number,
               measured_at,
               usage_value,
-                            period_usage_value,
-                            interval_start_at,
-                            interval_end_at,
-                            interval_days,
-                            daily_estimation,
-                            reading_value,
+              period_usage_value,
+              interval_start_at,
+              interval_end_at,
+              interval_days,
+              daily_estimation,
+              reading_value,
               usage_unit,
               data_status,
               source_payload,
               ingestion_run_id
-            ) values (
-                            'veitur',
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                            %s::jsonb,
-                            %s
+            )
+            select
+              'veitur',
+              %s,
+              reading.measured_at,
+              reading.period_usage_value,
+              reading.period_usage_value,
+              reading.interval_start_at,
+              reading.interval_end_at,
+              reading.interval_days,
+              reading.daily_estimation,
+              reading.reading_value,
+              reading.usage_unit,
+              reading.data_status,
+              reading.source_payload,
+              %s
+            from unnest(
+              %s::timestamptz[], %s::float8[], %s::timestamptz[], %s::timestamptz[], %s::integer[],
+              %s::float8[], %s::float8[], %s::text[], %s::integer[], %s::jsonb[]
+            ) as reading(
+              measured_at, period_usage_value, interval_start_at, interval_end_at, interval_days,
+              daily_estimation, reading_value, usage_unit, data_status, source_payload
             )
             on conflict (source, permanent_number, measured_at)
             do update set
               usage_value = excluded.usage_value,
-                            period_usage_value = excluded.period_usage_value,
-                            interval_start_at = excluded.interval_start_at,
-                            interval_end_at = excluded.interval_end_at,
-                            interval_days = excluded.interval_days,
-                            daily_estimation = excluded.daily_estimation,
-                            reading_value = excluded.reading_value,
+              period_usage_value = excluded.period_usage_value,
+              interval_start_at = excluded.interval_start_at,
+              interval_end_at = excluded.interval_end_at,
+              interval_days = excluded.interval_days,
+              daily_estimation = excluded.daily_estimation,
+              reading_value = excluded.reading_value,
               usage_unit = excluded.usage_unit,
               data_status = excluded.data_status,
               source_payload = excluded.source_payload,
+              source_payload_archived_at = null,
               ingestion_run_id = excluded.ingestion_run_id
             """,
             (
                 permanent_number,
-                measured_at,
-                period_usage_value,
-                period_usage_value,
-                interval_start_at,
-                interval_end_at,
-                interval_days,
-                daily_estimation,
-                reading_value,
-                usage_unit,
-                data_status,
-                json.dumps(source_payload),
                 run_id,
+                batch.measured_at,
+                batch.period_usage_values,
+                batch.interval_start_at,
+                batch.interval_end_at,
+                batch.interval_days,
+                batch.daily_estimations,
+                batch.reading_values,
+                batch.usage_units,
+                batch.data_statuses,
+                _jsonb_array(batch.source_payloads),
             ),
         )
-    return True
-
-
-def upsert_ev_charger_row(connection: Connection, row: dict[str, Any], run_id: int) -> bool:
-        charger_id = str(row.get("ChargerId") or row.get("chargerId") or row.get("DeviceId") or "unknown")
-        session_id = str(row.get("Id") or row.get("id") or f"{charger_id}-{row.get('StartDateTime')}")
-        charger_name = row.get("DeviceName") or row.get("ChargerName")
-
-        started_at = _parse_timestamp(row.get("StartDateTime") or row.get("startDateTime"))
-        finished_raw = row.get("EndDateTime") or row.get("endDateTime")
-        finished_at = _parse_timestamp(finished_raw) if finished_raw else started_at
-
-        duration_seconds = int((finished_at - started_at).total_seconds()) if finished_at >= started_at else 0
-        energy_kwh = row.get("Energy") if row.get("Energy") is not None else row.get("TotalChargeKwh")
-
-        with connection.cursor() as cursor:
-                cursor.execute(
-                        """
-                        insert into energy.ev_charger_raw (
-                            source,
-                            charger_id,
-                            charger_name,
-                            session_id,
-                            started_at,
-                            finished_at,
-                            energy_kwh,
-                            duration_seconds,
-                            source_payload,
-                            ingestion_run_id
-                        ) values (
-                            'zaptec', %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s
-                        )
-                        on conflict (source, charger_id, session_id)
-                        do update set
-                            charger_name = excluded.charger_name,
-                            started_at = excluded.started_at,
-                            finished_at = excluded.finished_at,
-                            energy_kwh = excluded.energy_kwh,
-                            duration_seconds = excluded.duration_seconds,
-                            source_payload = excluded.source_payload,
-                            ingestion_run_id = excluded.ingestion_run_id
-                        """,
-                        (
-                                charger_id,
-                                charger_name,
-                                session_id,
-                                started_at,
-                                finished_at,
-                                energy_kwh,
-                                duration_seconds,
-                                json.dumps(row),
-                                run_id,
-                        ),
-                )
-        return True
-
-
-def upsert_weather_row(
-        connection: Connection,
-        measured_at: datetime,
-        temperature_c: float | int | None,
-        humidity_percent: float | int | None,
-        wind_speed_kmh: float | int | None,
-        source_payload: dict[str, Any],
-        run_id: int,
-) -> bool:
-        with connection.cursor() as cursor:
-                cursor.execute(
-                        """
-                        insert into energy.weather_raw (
-                            source,
-                            measured_at,
-                            temperature_c,
-                            humidity_percent,
-                            wind_speed_kmh,
-                            source_payload,
-                            ingestion_run_id
-                        ) values (
-                            'open_meteo', %s, %s, %s, %s, %s::jsonb, %s
-                        )
-                        on conflict (source, measured_at)
-                        do update set
-                            temperature_c = excluded.temperature_c,
-                            humidity_percent = excluded.humidity_percent,
-                            wind_speed_kmh = excluded.wind_speed_kmh,
-                            source_payload = excluded.source_payload,
-                            ingestion_run_id = excluded.ingestion_run_id
-                        """,
-                        (
-                                measured_at,
-                                temperature_c,
-                                humidity_percent,
-                                wind_speed_kmh,
-                                json.dumps(source_payload),
-                                run_id,
-                        ),
-                )
-        return True
-
-
-def _parse_timestamp(value: Any) -> datetime:
-    if isinstance(value, datetime):
-        return value if value.tzinfo else value.replace(tzinfo=UTC)
-
-    text = str(value or "").strip()
-    if not text:
-        raise ValueError("Missing timestamp value")
-
-    text = text.replace("Z", "+00:00")
-    try:
-        parsed = datetime.fromisoformat(text)
-        return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
-    except ValueError:
-        parsed = datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
-        return parsed.replace(tzinfo=UTC)
+        return cursor.rowcount
+
+
+def write_ev_charger_batch(connection: Connection, batch: EvChargerBatch, run_id: int) -> int:
+    batch = batch.prepared_for_write()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            insert into energy.ev_charger_raw (
+              source,
+              charger_id,
+              charger_name,
+              session_id,
+              started_at,
+              finished_at,
+              energy_kwh,
+              duration_seconds,
+              source_payload,
+              ingestion_run_id
+            )
+            select
+              'zaptec',
+              session.charger_id,
+              session.charger_name,
+              session.session_id,
+              session.started_at,
+              session.finished_at,
+              session.energy_kwh,
+              session.duration_seconds,
+              session.source_payload,
+              %s
+            from unnest(
+              %s::text[], %s::text[], %s::text[], %s::timestamptz[], %s::timestamptz[],
+              %s::float8[], %s::integer[], %s::jsonb[]
+            ) as session(
+              charger_id, charger_name, session_id, started_at, finished_at,
+              energy_kwh, duration_seconds, source_payload
+            )
+            on conflict (source, charger_id, session_id)
+            do update set
+              charger_name = excluded.charger_name,
+              started_at = excluded.started_at,
+              finished_at = excluded.finished_at,
+              energy_kwh = excluded.energy_kwh,
+              duration_seconds = excluded.duration_seconds,
+              source_payload = excluded.source_payload,
+              source_payload_archived_at = null,
+              ingestion_run_id = excluded.ingestion_run_id
+            """,
+            (
+                run_id,
+                batch.charger_ids,
+                batch.charger_names,
+                batch.session_ids,
+                batch.started_at,
+                batch.finished_at,
+                batch.energy_kwh,
+                batch.duration_seconds,
+                _jsonb_array(batch.source_payloads),
+            ),
+        )
+        return cursor.rowcount
+
+
+def write_weather_batch(connection: Connection, batch: WeatherBatch, run_id: int) -> int:
+    """Upsert Open-Meteo's columnar hourly arrays in one statement.
+
+    Postgres unnests the parallel arrays, pads shorter ones with nulls and builds the
+    per-hour source_payload itself, so no per-hour Python objects are created.
+    Timestamps without an offset are taken as UTC, as Reykjavik local time is UTC.
+    A repeated hour keeps its last values, as one insert cannot upsert a row twice.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            insert into energy.weather_raw (
+              source,
+              measured_at,
+              temperature_c,
+              humidity_percent,
+              wind_speed_kmh,
+              source_payload,
+              ingestion_run_id
+            )
+            select
+              'open_meteo',
+              hour.measured_at,
+              hour.temperature,
+              hour.humidity,
+              hour.wind_speed,
+              jsonb_build_object(
+                'time', hour.time_text,
+                'temperature_2m', hour.temperature,
+                'relative_humidity_2m', hour.humidity,
+                'wind_speed_10m', hour.wind_speed
+              ),
+              %s
+            from (
+              select distinct on (measured_at)
+                unnested.time_text::timestamp at time zone 'UTC' as measured_at,
+                unnested.*
+              from unnest(%s::text[], %s::float8[], %s::float8[], %s::float8[])
+                with ordinality as unnested(time_text, temperature, humidity, wind_speed, position)
+              where unnested.time_text is not null
+              order by measured_at, unnested.position desc
+            ) as hour
+            on conflict (source, measured_at)
+            do update set
+              temperature_c = excluded.temperature_c,
+              humidity_percent = excluded.humidity_percent,
+              wind_speed_kmh = excluded.wind_speed_kmh,
+              source_payload = excluded.source_payload,
+              source_payload_archived_at = null,
+              ingestion_run_id = excluded.ingestion_run_id
+            """,
+            (
+                run_id,
+                batch.timestamps,
+                parse_float_column(batch.temperatures_c),
+                parse_float_column(batch.humidities_percent),
+                parse_float_column(batch.wind_speeds_kmh),
+            ),
+        )
+        return cursor.rowcount
+
+
+def _jsonb_array(payloads: list[dict[str, Any]]) -> list[Jsonb]:
+    return [Jsonb(payload) for payload in payloads]
@@ -0,0 +1,76 @@
+"""Decide before any HTTP call whether a provider can have new data.
+
+A source is skipped when it was checked successfully less than min_check_interval
+ago, or when its stored watermark already reaches the newest slot the provider can
+have published (now - publication_lag). Veitur readings, Zaptec sessions and
+Open-Meteo hours arrive irregularly or are revised, so they only use the interval.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import os
+
+
+@dataclass(frozen=True)
+class FreshnessPolicy:
+    source_name: str
+    min_check_interval: timedelta
+    publication_lag: timedelta | None = None
+    data_interval: timedelta = timedelta(hours=1)
+
+
+@dataclass(frozen=True)
+class SourceFreshness:
+    latest_data_at: datetime | None
+    last_success_at: datetime | None
+
+
+def _env_number(name: str, default: float | None) -> float | None:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    if value.strip().lower() in {"off", "never", "none"}:
+        return None
+    return float(value)
+
+
+def _policy(source_name: str, min_check_minutes: float, publication_lag_hours: float | None = None) -> FreshnessPolicy:
+    prefix = f"FRESHNESS_{source_name.upper()}"
+    lag_hours = _env_number(f"{prefix}_PUBLICATION_LAG_HOURS", publication_lag_hours)
+    return FreshnessPolicy(
+        source_name=source_name,
+        min_check_interval=timedelta(minutes=_env_number(f"{prefix}_MIN_CHECK_MINUTES", min_check_minutes) or 0),
+        publication_lag=timedelta(hours=lag_hours) if lag_hours is not None else None,
+    )
+
+
+def load_freshness_policies() -> dict[str, FreshnessPolicy]:
+    return {
+        "hsveitur": _policy("hsveitur", min_check_minutes=60, publication_lag_hours=24),
+        "veitur": _policy("veitur", min_check_minutes=360),
+        "zaptec": _policy("zaptec", min_check_minutes=10),
+        "weather": _policy("weather", min_check_minutes=60),
+    }
+
+
+def skip_reason(policy: FreshnessPolicy, freshness: SourceFreshness, now: datetime) -> str | None:
+    """Return why the source cannot have new data yet, or None when it should be fetched."""
+    if freshness.last_success_at is not None:
+        since_check = now - freshness.last_success_at
+        if since_check < policy.min_check_interval:
+            return (
+                f"Checked {int(since_check.total_seconds() // 60)} min ago; "
+                f"minimum interval is {int(policy.min_check_interval.total_seconds() // 60)} min"
+            )
+
+    if policy.publication_lag is not None and freshness.latest_data_at is not None:
+        newest_publishable_at = now - policy.publication_lag
+        if freshness.latest_data_at + policy.data_interval > newest_publishable_at:
+            return (
+                f"Latest stored data {freshness.latest_data_at.isoformat()} already reaches the publication lag "
+                f"of {policy.publication_lag.total_seconds() / 3600:g} h"
+            )
+
+    return None
@@ -0,0 +1,148 @@
+"""Find holes in loaded history and turn them into provider fetch windows.
+
+Each source has an expected time grid (hours for electricity and weather, days for
+hot water). The grid runs from the first to the last loaded slot; slots with no
+stored row are found with a hash anti-join against generate_series. Zaptec is not
+checked: days without charging sessions are normal, so its rows cannot show gaps.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, UTC
+
+from psycopg import Connection
+
+
+@dataclass(frozen=True)
+class GapGrid:
+    source_name: str
+    step: str
+    # Yields one local-time `slot` per stored row between %(from)s and %(to)s (timestamptz).
+    present_slots_sql: str
+    # Hourly rows before energy.retention_state.downsampled_before are deleted on purpose.
+    downsampled_table: str | None = None
+
+
+@dataclass(slots=True)
+class GapWindow:
+    source_name: str
+    from_date: date
+    to_date: date
+    missing_slots: int
+
+
+GAP_GRIDS: dict[str, GapGrid] = {
+    "hsveitur": GapGrid(
+        source_name="hsveitur",
+        step="1 hour",
+        present_slots_sql="""
+            select date_trunc('hour', measured_at at time zone 'Atlantic/Reykjavik') as slot
+            from energy.electricity_raw
+            where source = 'hsveitur' and measured_at >= %(from)s and measured_at < %(to)s
+        """,
+        downsampled_table="electricity_raw",
+    ),
+    "veitur": GapGrid(
+        source_name="veitur",
+        step="1 day",
+        # Reading intervals cover several days, so coverage comes from the expanded daily view.
+        present_slots_sql="""
+            select day::timestamp as slot
+            from energy.hot_water_daily
+            where day >= (%(from)s at time zone 'Atlantic/Reykjavik')::date
+              and day < (%(to)s at time zone 'Atlantic/Reykjavik')::date
+        """,
+    ),
+    "weather": GapGrid(
+        source_name="weather",
+        step="1 hour",
+        present_slots_sql="""
+            select date_trunc('hour', measured_at at time zone 'Atlantic/Reykjavik') as slot
+            from energy.weather_raw
+            where source = 'open_meteo' and measured_at >= %(from)s and measured_at < %(to)s
+        """,
+        downsampled_table="weather_raw",
+    ),
+}
+
+
+def _downsampled_before(connection: Connection, table_name: str) -> date | None:
+    with connection.cursor() as cursor:
+        cursor.execute("select downsampled_before from energy.retention_state where source_table = %s", (table_name,))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def find_missing_days(connection: Connection, grid: GapGrid, from_date: date, to_date: date) -> dict[date, int]:
+    """Return {day: missing slot count} for grid slots with no stored row in [from_date, to_date]."""
+    if grid.downsampled_table:
+        watermark = _downsampled_before(connection, grid.downsampled_table)
+        if watermark and watermark > from_date:
+            from_date = watermark
+    if from_date > to_date:
+        return {}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            with present as (
+              select distinct slot from ({grid.present_slots_sql}) stored
+            ), bounds as (
+              select min(slot) as first_slot, max(slot) as last_slot from present
+            )
+            select grid.slot::date as day, count(*)::integer as missing_slots
+            from bounds
+            cross join lateral generate_series(bounds.first_slot, bounds.last_slot, %(step)s::interval) as grid(slot)
+            where not exists (select 1 from present where present.slot = grid.slot)
+            group by 1
+            order by 1
+            """,
+            {
+                "from": datetime.combine(from_date, time.min, tzinfo=UTC),
+                "to": datetime.combine(to_date + timedelta(days=1), time.min, tzinfo=UTC),
+                "step": grid.step,
+            },
+        )
+        return {day: missing_slots for day, missing_slots in cursor.fetchall()}
+
+
+def merge_gap_days(
+    missing_days: dict[date, int],
+    bridge_days: int = 0,
+    max_window_days: int | None = None,
+) -> list[tuple[date, date, int]]:
+    """Merge missing days into inclusive (from, to, missing_slots) fetch windows.
+
+    Consecutive days always share a window. Windows separated by at most bridge_days
+    loaded days are joined too, trading a little refetching for fewer provider calls.
+    """
+    windows: list[tuple[date, date, int]] = []
+    for day in sorted(missing_days):
+        if windows:
+            window_from, window_to, window_slots = windows[-1]
+            fits_bridge = (day - window_to).days <= bridge_days + 1
+            fits_length = max_window_days is None or (day - window_from).days < max_window_days
+            if fits_bridge and fits_length:
+                windows[-1] = (window_from, day, window_slots + missing_days[day])
+                continue
+        windows.append((day, day, missing_days[day]))
+    return windows
+
+
+def detect_gap_windows(
+    connection: Connection,
+    sources: tuple[str, ...],
+    from_date: date,
+    to_date: date,
+    bridge_days: int = 0,
+    max_window_days: int | None = None,
+) -> list[GapWindow]:
+    windows: list[GapWindow] = []
+    for source_name in sources:
+        missing_days = find_missing_days(connection, GAP_GRIDS[source_name], from_date, to_date)
+        windows.extend(
+            GapWindow(source_name=source_name, from_date=window_from, to_date=window_to, missing_slots=missing_slots)
+            for window_from, window_to, missing_slots in merge_gap_days(missing_days, bridge_days, max_window_days)
+        )
+    return windows
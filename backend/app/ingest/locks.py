@@ -0,0 +1,131 @@
+"""Cross-process ingestion locks on Postgres session advisory locks.
+
+The CLI, the API sync job and the scheduler may run in different processes. Each
+ingestion takes the global lock or one lock per source, held on its own
+autocommit connection for as long as the work runs. Per-source runs also hold the
+global key shared, so they exclude a global run but not each other.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+import os
+import zlib
+
+import psycopg
+
+from app.ingest.db import get_connection
+
+
+LOCK_MODES = ("wait", "skip", "fail")
+LOCK_SCOPES = ("source", "global")
+GLOBAL_LOCK_NAME = "global"
+
+# First half of the two-int advisory key, so these locks never clash with other users of the database.
+_LOCK_NAMESPACE = 0x4F524B55
+
+
+class IngestLockBusy(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class LockPolicy:
+    scope: str = "source"
+    mode: str = "wait"
+    timeout_seconds: float | None = None
+
+    def __post_init__(self) -> None:
+        if self.scope not in LOCK_SCOPES:
+            raise ValueError(f"lock scope must be one of: {', '.join(LOCK_SCOPES)}")
+        if self.mode not in LOCK_MODES:
+            raise ValueError(f"lock mode must be one of: {', '.join(LOCK_MODES)}")
+
+
+def load_lock_policy(scope: str | None = None, mode: str | None = None) -> LockPolicy:
+    timeout = os.getenv("INGEST_LOCK_TIMEOUT_SECONDS")
+    return LockPolicy(
+        scope=scope or os.getenv("INGEST_LOCK_SCOPE") or "source",
+        mode=mode or os.getenv("INGEST_LOCK_MODE") or "wait",
+        timeout_seconds=float(timeout) if timeout and timeout.strip() else None,
+    )
+
+
+def add_lock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--lock-scope",
+        choices=LOCK_SCOPES,
+        default=None,
+        help="Lock each source or the whole run (default INGEST_LOCK_SCOPE or source)",
+    )
+    parser.add_argument(
+        "--lock-mode",
+        choices=LOCK_MODES,
+        default=None,
+        help="When another run holds the lock: wait, skip or fail (default INGEST_LOCK_MODE or wait)",
+    )
+
+
+def lock_key(name: str) -> tuple[int, int]:
+    return _LOCK_NAMESPACE, zlib.crc32(name.encode("utf-8")) & 0x7FFFFFFF
+
+
+@contextmanager
+def ingestion_lock(
+    name: str, mode: str = "wait", timeout_seconds: float | None = None, shared: bool = False
+) -> Iterator[bool]:
+    """Hold the named lock for the duration of the block.
+
+    Yields True while the lock is held. In skip mode a busy lock yields False instead;
+    in fail mode, or when a wait times out, IngestLockBusy is raised. A shared lock
+    is only busy while someone holds the name exclusively.
+    """
+    namespace, key = lock_key(name)
+    suffix = "_shared" if shared else ""
+    with get_connection() as connection:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            if mode == "wait":
+                if timeout_seconds is not None:
+                    cursor.execute(f"set lock_timeout = '{int(timeout_seconds * 1000)}ms'")
+                try:
+                    cursor.execute(f"select pg_advisory_lock{suffix}(%s, %s)", (namespace, key))
+                except psycopg.errors.LockNotAvailable as error:
+                    raise IngestLockBusy(f"Timed out waiting for ingestion lock '{name}'") from error
+                acquired = True
+            else:
+                cursor.execute(f"select pg_try_advisory_lock{suffix}(%s, %s)", (namespace, key))
+                acquired = bool(cursor.fetchone()[0])
+                if not acquired and mode == "fail":
+                    raise IngestLockBusy(f"Ingestion lock '{name}' is held by another run")
+
+        try:
+            yield acquired
+        finally:
+            if acquired and not connection.closed:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"select pg_advisory_unlock{suffix}(%s, %s)", (namespace, key))
+
+
+@contextmanager
+def global_ingestion_lock(policy: LockPolicy) -> Iterator[bool]:
+    """Take the global lock, exclusively in global scope and shared in source scope."""
+    shared = policy.scope != "global"
+    with ingestion_lock(GLOBAL_LOCK_NAME, policy.mode, policy.timeout_seconds, shared=shared) as acquired:
+        yield acquired
+
+
+@contextmanager
+def exclusive_ingestion_lock(policy: LockPolicy) -> Iterator[None]:
+    """Hold the global lock exclusively whatever the scope, for jobs that rewrite every source.
+
+    Retention and reprocessing have no per-source results to mark as skipped, so a busy
+    lock in skip mode raises IngestLockBusy as in fail mode.
+    """
+    with ingestion_lock(GLOBAL_LOCK_NAME, policy.mode, policy.timeout_seconds) as acquired:
+        if not acquired:
+            raise IngestLockBusy(f"Ingestion lock '{GLOBAL_LOCK_NAME}' is held by another run")
+        yield
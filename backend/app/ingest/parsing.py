@@ -0,0 +1,130 @@
+"""Column-at-a-time parsing of provider timestamps and numbers.
+
+Provider payloads use one timestamp format per field, so the format is detected
+once per column (and cached by string shape across pages) instead of being
+guessed value by value. Values that do not match the detected format fall back
+to the forgiving single-value parser.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from datetime import datetime, UTC
+from typing import Any
+
+
+_NAIVE = "naive"
+_AWARE = "aware"
+_LEGACY = "legacy"
+
+_FORMAT_BY_SHAPE: dict[tuple[int, str, str], str] = {}
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """Parse one timestamp; naive values are treated as UTC."""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+    text = str(value or "").strip()
+    if not text:
+        raise ValueError("Missing timestamp value")
+
+    text = text.replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(text)
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+    except ValueError:
+        parsed = datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+        return parsed.replace(tzinfo=UTC)
+
+
+def _shape(text: str) -> tuple[int, str, str]:
+    # Length, date/time separator and last character tell the provider formats apart.
+    return len(text), text[10:11], text[-1:]
+
+
+def _detect_format(text: str) -> str:
+    shape = _shape(text)
+    known_format = _FORMAT_BY_SHAPE.get(shape)
+    if known_format is not None:
+        return known_format
+
+    try:
+        detected_format = _NAIVE if datetime.fromisoformat(text).tzinfo is None else _AWARE
+    except ValueError:
+        detected_format = _LEGACY
+    _FORMAT_BY_SHAPE[shape] = detected_format
+    return detected_format
+
+
+def _naive_as_utc(text: str) -> datetime:
+    # Appending the offset keeps the whole parse inside fromisoformat, which is far
+    # cheaper than parsing naive and calling replace(tzinfo=...) afterwards.
+    return datetime.fromisoformat(text + "+00:00")
+
+
+_PARSER_BY_FORMAT: dict[str, Callable[[str], datetime]] = {
+    _NAIVE: _naive_as_utc,
+    _AWARE: datetime.fromisoformat,
+    _LEGACY: parse_timestamp,
+}
+
+
+def parse_timestamp_column(values: Iterable[Any], optional: bool = False) -> list[datetime | None]:
+    """Parse a column of timestamps into UTC-aware datetimes.
+
+    Missing values raise ValueError unless optional is set, in which case they become None.
+    """
+    raw_values = values if isinstance(values, list) else list(values)
+    first_text = next((value for value in raw_values if isinstance(value, str) and value), None)
+    if first_text is None:
+        return [_parse_one(value, optional) for value in raw_values]
+
+    detected_format = _detect_format(first_text)
+    parser = _PARSER_BY_FORMAT[detected_format]
+    try:
+        parsed = [parser(value) for value in raw_values]
+    except (TypeError, ValueError):
+        return [_parse_one(value, optional) for value in raw_values]
+
+    if detected_format == _AWARE and any(item.tzinfo is None for item in parsed):
+        return [item if item.tzinfo else item.replace(tzinfo=UTC) for item in parsed]
+    return parsed
+
+
+def _parse_one(value: Any, optional: bool) -> datetime | None:
+    if optional and not value:
+        return None
+    return parse_timestamp(value)
+
+
+def to_float(value: Any) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_float_column(values: Iterable[Any]) -> list[float | None]:
+    """Convert a column to floats; unparsable values become None.
+
+    Also normalizes int/float mixes, which psycopg refuses to dump as one array.
+    """
+    raw_values = values if isinstance(values, list) else list(values)
+    try:
+        return [None if value is None else float(value) for value in raw_values]
+    except (TypeError, ValueError):
+        return [to_float(value) for value in raw_values]
+
+
+def to_non_negative_int(value: Any) -> int:
+    try:
+        return max(int(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_non_negative_int_column(values: Iterable[Any]) -> list[int]:
+    return [to_non_negative_int(value) for value in values]
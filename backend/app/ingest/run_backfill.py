@@ -3,23 +3,38 @@ from __future__ import annotations
 import argparse
 import asyncio
 from collections.abc import Awaitable, Callable
-from datetime import date, datetime, timedelta, UTC
+from datetime import date, datetime, time, timedelta, UTC
 from pathlib import Path
-from typing import Any
 
 from dotenv import load_dotenv
 
+from app.dashboard.kpi_snapshots import refresh_kpi_snapshots_after_change
+from app.ingest.batches import ElectricityBatch, EvChargerBatch, HotWaterBatch, WeatherBatch
 from app.ingest.db import (
     SourceWriteResult,
     create_ingestion_run,
     finalize_ingestion_run,
     get_connection,
-    upsert_electricity_row,
-    upsert_ev_charger_row,
-    upsert_hot_water_row,
-    upsert_weather_row,
+    get_latest_hot_water_reading,
+    get_source_freshness,
+    refresh_dashboard_rollups,
+    write_electricity_batch,
+    write_ev_charger_batch,
+    write_hot_water_batch,
     write_source_status,
+    write_weather_batch,
 )
+from app.ingest.freshness import SourceFreshness, load_freshness_policies, skip_reason
+from app.ingest.locks import (
+    IngestLockBusy,
+    LockPolicy,
+    add_lock_arguments,
+    global_ingestion_lock,
+    ingestion_lock,
+    load_lock_policy,
+)
+from app.instrumentation import INGEST_METRICS, collect_stage_metrics, stage
+from app.profiling import ProfileSession, profile_source, profiling
 from app.providers.hsveitur import HsVeiturClient
 from app.providers.open_meteo import OpenMeteoClient
 from app.providers.types import ProviderError
@@ -35,6 +50,13 @@ def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Backfill provider data into local energy tables")
     parser.add_argument("--from", dest="from_date", default=None, help="Start date (YYYY-MM-DD), default Jan 1 this year")
     parser.add_argument("--to", dest="to_date", default=None, help="End date (YYYY-MM-DD), default yesterday")
+    parser.add_argument(
+        "--profile",
+        dest="profile_dir",
+        default=None,
+        help="Write a CPU profile (.prof), sampled wall-clock stacks (.folded) and a summary per source to this directory",
+    )
+    add_lock_arguments(parser)
     return parser.parse_args()
 
 
@@ -52,62 +74,27 @@ def _resolve_date_range(from_date_input: str | None, to_date_input: str | None)
     return from_date, to_date
 
 
-def _parse_datetime(value: Any) -> datetime:
-    text = str(value or "").strip().replace("Z", "+00:00")
-    try:
-        parsed = datetime.fromisoformat(text)
-        return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
-    except ValueError:
-        parsed = datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
-        return parsed.replace(tzinfo=UTC)
-
+def _normalize_veitur_history_rows(
+    batch: HotWaterBatch,
+    previous_reading: tuple[datetime, float] | None = None,
+) -> tuple[HotWaterBatch, int]:
+    """Derive missing usage from reading-value deltas on a time-ordered reading batch.
 
-def _to_float(value: Any) -> float | None:
-    if value is None:
-        return None
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return None
-
-
-def _to_non_negative_int(value: Any) -> int:
-    try:
-        return max(int(value or 0), 0)
-    except (TypeError, ValueError):
-        return 0
-
-
-def _normalize_veitur_history_rows(reading_rows: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], int]:
-    prepared_rows: list[dict[str, Any]] = []
-
-    for row in reading_rows:
-        measured_at = _parse_datetime(row.get("readingDate"))
-        prepared_rows.append(
-            {
-                "row": row,
-                "measured_at": measured_at,
-                "usage": _to_float(row.get("usage")),
-                "reading_value": _to_float(row.get("readingValue")),
-                "daily_estimation": _to_float(row.get("dailyEstimation")),
-                "interval_days": _to_non_negative_int(row.get("readingDays")),
-            }
+    previous_reading is the last stored (measured_at, reading_value) before the fetched
+    window. It seeds the delta derivation, and fetched rows at or before it are dropped
+    so already-derived rows are not overwritten.
+    """
+    if previous_reading:
+        batch = batch.select(
+            [index for index, measured_at in enumerate(batch.measured_at) if measured_at > previous_reading[0]]
         )
 
-    prepared_rows.sort(key=lambda item: item["measured_at"])
-
-    normalized_rows: list[dict[str, Any]] = []
-    previous_with_reading_value: tuple[datetime, float] | None = None
+    previous_with_reading_value = previous_reading
     derived_usage_rows = 0
 
-    for item in prepared_rows:
-        measured_at = item["measured_at"]
-        usage_value = item["usage"]
-        reading_value = item["reading_value"]
-        interval_days = item["interval_days"]
-
-        interval_start_at = measured_at - timedelta(days=interval_days)
-        interval_end_at = measured_at
+    for index, measured_at in enumerate(batch.measured_at):
+        usage_value = batch.period_usage_values[index]
+        reading_value = batch.reading_values[index]
 
         if (usage_value is None or usage_value <= 0) and previous_with_reading_value and reading_value is not None:
             previous_measured_at, previous_reading_value = previous_with_reading_value
@@ -115,28 +102,15 @@ def _normalize_veitur_history_rows(reading_rows: list[dict[str, Any]]) -> tuple[
             delta_days = (measured_at.date() - previous_measured_at.date()).days
 
             if usage_delta > 0 and delta_days > 0:
-                usage_value = round(usage_delta, 5)
-                interval_days = delta_days
-                interval_start_at = previous_measured_at
+                batch.period_usage_values[index] = round(usage_delta, 5)
+                batch.interval_days[index] = delta_days
+                batch.interval_start_at[index] = previous_measured_at
                 derived_usage_rows += 1
 
-        normalized_rows.append(
-            {
-                "row": item["row"],
-                "measured_at": measured_at,
-                "period_usage_value": usage_value,
-                "interval_start_at": interval_start_at,
-                "interval_end_at": interval_end_at,
-                "interval_days": interval_days,
-                "daily_estimation": item["daily_estimation"],
-                "reading_value": reading_value,
-            }
-        )
-
         if reading_value is not None:
             previous_with_reading_value = (measured_at, reading_value)
 
-    return normalized_rows, derived_usage_rows
+    return batch, derived_usage_rows
 
 
 async def _ingest_hsveitur(from_date: date, to_date: date, run_id: int) -> SourceWriteResult:
@@ -177,13 +151,10 @@ async def _ingest_hsveitur(from_date: date, to_date: date, run_id: int) -> Sourc
             message="No usage rows in payload",
         )
 
-    rows_written = 0
-    with get_connection() as connection:
-        for row in usage_rows:
-            if not isinstance(row, dict):
-                continue
-            upsert_electricity_row(connection, row=row, run_id=run_id)
-            rows_written += 1
+    with stage("normalize"):
+        batch = ElectricityBatch.from_usage_rows(usage_rows)
+    with stage("write"), get_connection() as connection:
+        rows_written = write_electricity_batch(connection, batch, run_id=run_id) if len(batch) else 0
         connection.commit()
 
     return SourceWriteResult(
@@ -211,7 +182,18 @@ async def _ingest_veitur(from_date: date, to_date: date, run_id: int) -> SourceW
         permanent_number=settings.veitur_permanent_number,
     )
 
-    history_fetch_from = from_date - timedelta(days=VEITUR_READING_HISTORY_LOOKBACK_DAYS)
+    # Seed the delta derivation from the last stored reading before the window so only
+    # readings from there onward are fetched. Without stored state, fall back to the lookback.
+    with get_connection() as connection:
+        previous_reading = get_latest_hot_water_reading(
+            connection,
+            permanent_number=settings.veitur_permanent_number,
+            before=datetime.combine(from_date, time.min, tzinfo=UTC),
+        )
+    if previous_reading:
+        history_fetch_from = previous_reading[0].date()
+    else:
+        history_fetch_from = from_date - timedelta(days=VEITUR_READING_HISTORY_LOOKBACK_DAYS)
 
     try:
         history_payload = await client.get_reading_history(date_from=history_fetch_from, date_to=to_date)
@@ -227,87 +209,73 @@ async def _ingest_veitur(from_date: date, to_date: date, run_id: int) -> SourceW
             )
         reading_rows = []
 
-    rows_written = 0
-    with get_connection() as connection:
-        if reading_rows:
-            normalized_rows, derived_usage_rows = _normalize_veitur_history_rows(
-                [row for row in reading_rows if isinstance(row, dict)]
-            )
+    if previous_reading and not reading_rows:
+        # Stored readings prove the meter reports through reading-history; nothing new was read yet.
+        return SourceWriteResult(
+            source_name="veitur",
+            status="empty",
+            rows_written=0,
+            message="No new readings since the last stored reading",
+            details={
+                "mode": "reading-history",
+                "raw_rows": 0,
+                "fetch_from": history_fetch_from.isoformat(),
+                "seeded_from": previous_reading[0].isoformat(),
+            },
+        )
 
-            for item in normalized_rows:
-                row = item["row"]
-                upsert_hot_water_row(
-                    connection,
-                    permanent_number=settings.veitur_permanent_number,
-                    measured_at=item["measured_at"],
-                    period_usage_value=item["period_usage_value"],
-                    interval_start_at=item["interval_start_at"],
-                    interval_end_at=item["interval_end_at"],
-                    interval_days=item["interval_days"],
-                    daily_estimation=item["daily_estimation"],
-                    reading_value=item["reading_value"],
-                    usage_unit=None,
-                    data_status=0,
-                    source_payload=row,
-                    run_id=run_id,
-                )
-                rows_written += 1
-            connection.commit()
-            return SourceWriteResult(
-                source_name="veitur",
-                status="success",
-                rows_written=rows_written,
-                details={
-                    "mode": "reading-history",
-                    "raw_rows": len(reading_rows),
-                    "derived_usage_rows": derived_usage_rows,
-                    "fetch_from": history_fetch_from.isoformat(),
-                },
+    if reading_rows:
+        with stage("normalize"):
+            batch, derived_usage_rows = _normalize_veitur_history_rows(
+                HotWaterBatch.from_reading_history(reading_rows),
+                previous_reading=previous_reading,
             )
-
-        try:
-            usage_payload = await client.get_usage_series(date_from=from_date, date_to=to_date)
-        except ProviderError as usage_error:
-            return SourceWriteResult(
-                source_name="veitur",
-                status="empty" if str(usage_error.category) == "empty" else "failed",
-                rows_written=0,
-                failure_category=None if str(usage_error.category) == "empty" else str(usage_error.category),
-                message=usage_error.message,
+        with stage("write"), get_connection() as connection:
+            rows_written = (
+                write_hot_water_batch(connection, settings.veitur_permanent_number, batch, run_id=run_id)
+                if len(batch)
+                else 0
             )
+            connection.commit()
+        return SourceWriteResult(
+            source_name="veitur",
+            status="success" if rows_written else "empty",
+            rows_written=rows_written,
+            details={
+                "mode": "reading-history",
+                "raw_rows": len(reading_rows),
+                "derived_usage_rows": derived_usage_rows,
+                "fetch_from": history_fetch_from.isoformat(),
+                "seeded_from": previous_reading[0].isoformat() if previous_reading else None,
+            },
+        )
+
+    try:
+        usage_payload = await client.get_usage_series(date_from=from_date, date_to=to_date)
+    except ProviderError as usage_error:
+        return SourceWriteResult(
+            source_name="veitur",
+            status="empty" if str(usage_error.category) == "empty" else "failed",
+            rows_written=0,
+            failure_category=None if str(usage_error.category) == "empty" else str(usage_error.category),
+            message=usage_error.message,
+        )
 
-        usage_unit = usage_payload.get("usageUnit") if isinstance(usage_payload, dict) else None
-        data_status = usage_payload.get("dataStatus") if isinstance(usage_payload, dict) else None
-        data = usage_payload.get("data", []) if isinstance(usage_payload, dict) else []
-        for meter_data in data:
-            usages = meter_data.get("usages", []) if isinstance(meter_data, dict) else []
-            for usage in usages:
-                if not isinstance(usage, dict):
-                    continue
-                measured_at = _parse_datetime(usage.get("timeStamp"))
-                upsert_hot_water_row(
-                    connection,
-                    permanent_number=settings.veitur_permanent_number,
-                    measured_at=measured_at,
-                    period_usage_value=usage.get("value"),
-                    interval_start_at=measured_at,
-                    interval_end_at=measured_at,
-                    interval_days=0,
-                    daily_estimation=None,
-                    reading_value=None,
-                    usage_unit=usage_unit,
-                    data_status=data_status,
-                    source_payload=usage,
-                    run_id=run_id,
-                )
-                rows_written += 1
+    with stage("normalize"):
+        batch = HotWaterBatch.from_usage_series(usage_payload)
+    with stage("write"), get_connection() as connection:
+        rows_written = (
+            write_hot_water_batch(connection, settings.veitur_permanent_number, batch, run_id=run_id)
+            if len(batch)
+            else 0
+        )
         connection.commit()
 
     return SourceWriteResult(
         source_name="veitur",
         status="success" if rows_written else "empty",
         rows_written=rows_written,
-        details={"mode": "usage-series-fallback", "raw_rows": rows_written},
+        details={"mode": "usage-series-fallback", "raw_rows": len(batch)},
     )
 
 
@@ -363,13 +331,10 @@ async def _ingest_zaptec(from_date: date, to_date: date, run_id: int) -> SourceW
             message="No charge history rows in payload",
         )
 
-    rows_written = 0
-    with get_connection() as connection:
-        for row in rows:
-            if not isinstance(row, dict):
-                continue
-            upsert_ev_charger_row(connection, row=row, run_id=run_id)
-            rows_written += 1
+    with stage("normalize"):
+        batch = EvChargerBatch.from_charge_history(rows)
+    with stage("write"), get_connection() as connection:
+        rows_written = write_ev_charger_batch(connection, batch, run_id=run_id) if len(batch) else 0
         connection.commit()
 
     return SourceWriteResult(
@@ -408,13 +373,9 @@ async def _ingest_weather(from_date: date, to_date: date, run_id: int) -> Source
             message=error.message,
         )
 
-    hourly = payload.get("hourly", {}) if isinstance(payload, dict) else {}
-    timestamps = hourly.get("time") if isinstance(hourly.get("time"), list) else []
-    temperatures = hourly.get("temperature_2m") if isinstance(hourly.get("temperature_2m"), list) else []
-    humidities = hourly.get("relative_humidity_2m") if isinstance(hourly.get("relative_humidity_2m"), list) else []
-    wind_speeds = hourly.get("wind_speed_10m") if isinstance(hourly.get("wind_speed_10m"), list) else []
-
-    if not timestamps:
+    with stage("normalize"):
+        batch = WeatherBatch.from_hourly(payload.get("hourly") if isinstance(payload, dict) else None)
+    if not len(batch):
         return SourceWriteResult(
             source_name="weather",
             status="empty",
@@ -422,30 +383,8 @@ async def _ingest_weather(from_date: date, to_date: date, run_id: int) -> Source
             message="No hourly weather rows in payload",
         )
 
-    rows_written = 0
-    with get_connection() as connection:
-        for index, timestamp in enumerate(timestamps):
-            measured_at = _parse_datetime(timestamp)
-            temperature = temperatures[index] if index < len(temperatures) else None
-            humidity = humidities[index] if index < len(humidities) else None
-            wind_speed = wind_speeds[index] if index < len(wind_speeds) else None
-
-            source_payload = {
-                "time": timestamp,
-                "temperature_2m": temperature,
-                "relative_humidity_2m": humidity,
-                "wind_speed_10m": wind_speed,
-            }
-            upsert_weather_row(
-                connection,
-                measured_at=measured_at,
-                temperature_c=temperature,
-                humidity_percent=humidity,
-                wind_speed_kmh=wind_speed,
-                source_payload=source_payload,
-                run_id=run_id,
-            )
-            rows_written += 1
+    with stage("write"), get_connection() as connection:
+        rows_written = write_weather_batch(connection, batch, run_id=run_id)
         connection.commit()
 
     return SourceWriteResult(
@@ -511,58 +450,202 @@ def _get_latest_loaded_dates() -> dict[str, date | None]:
         return latest_dates
 
 
-async def run_backfill(from_date: date, to_date: date) -> list[SourceWriteResult]:
+def _refresh_rollups_for_results(
+    results: list[SourceWriteResult], from_date: date, to_date: date
+) -> tuple[date, date] | None:
+    """Refresh rollups for the days the results wrote to, and return that range (None when nothing was written)."""
+    if not any(result.rows_written for result in results):
+        return None
+
+    refresh_from = from_date
+    for result in results:
+        details = result.details or {}
+        window_from = (details.get("sync_window") or {}).get("from")
+        for value in (details.get("fetch_from"), window_from):
+            if value:
+                refresh_from = min(refresh_from, date.fromisoformat(value))
+
     with get_connection() as connection:
-        run_id = create_ingestion_run(connection)
+        refresh_dashboard_rollups(connection, refresh_from, to_date)
+    return refresh_from, to_date
 
-    results: list[SourceWriteResult] = []
-    for ingest_func in (_ingest_hsveitur, _ingest_veitur, _ingest_zaptec, _ingest_weather):
-        result = await ingest_func(from_date, to_date, run_id)
-        results.append(result)
-        with get_connection() as connection:
-            write_source_status(connection, run_id, result)
 
+def _finalize_run(run_id: int, results: list[SourceWriteResult], touched_days: tuple[date, date] | None) -> None:
+    # KPI snapshots are refreshed first so they are in place when finalize listeners drop cached responses.
+    # A failed refresh is logged and never stops the run from being finalized and announced.
+    refresh_kpi_snapshots_after_change(date.today(), run_id)
     with get_connection() as connection:
-        finalize_ingestion_run(connection, run_id, results)
+        finalize_ingestion_run(connection, run_id, results, touched_days)
 
-    return results
 
+def _lock_skipped_results(source_names: list[str], message: str) -> list[SourceWriteResult]:
+    return [
+        SourceWriteResult(source_name=source_name, status="skipped", rows_written=0, message=message)
+        for source_name in source_names
+    ]
 
-async def run_incremental_sync(backtrack_days: int = 2, to_date: date | None = None) -> list[SourceWriteResult]:
-    sync_to_date = to_date or date.today()
-    default_from_date = date(sync_to_date.year, 1, 1)
-    latest_dates = _get_latest_loaded_dates()
 
-    with get_connection() as connection:
-        run_id = create_ingestion_run(connection)
+async def _timed_ingest(source_name: str, ingest: Callable[[], Awaitable[SourceWriteResult]]) -> SourceWriteResult:
+    with collect_stage_metrics() as metrics, profile_source(source_name):
+        result = await ingest()
+    if result.status != "skipped":
+        details = result.details or {"rows_written": result.rows_written}
+        result.details = {**details, "timing": metrics.to_details(result.rows_written)}
+    INGEST_METRICS.observe(result.source_name, result.status, result.rows_written, metrics)
+    return result
 
-    results: list[SourceWriteResult] = []
-    for source_name, ingest_func in SOURCE_INGESTERS.items():
-        latest_loaded_date = latest_dates.get(source_name)
-        if latest_loaded_date:
-            source_from_date = max(default_from_date, latest_loaded_date - timedelta(days=backtrack_days))
-        else:
-            source_from_date = default_from_date
-
-        if source_from_date > sync_to_date:
-            source_from_date = sync_to_date
-
-        result = await ingest_func(source_from_date, sync_to_date, run_id)
-        result.details = {
-            **(result.details or {}),
-            "sync_window": {
-                "from": source_from_date.isoformat(),
-                "to": sync_to_date.isoformat(),
-                "latest_loaded_date": latest_loaded_date.isoformat() if latest_loaded_date else None,
-            },
-        }
 
-        results.append(result)
+async def ingest_with_source_lock(
+    source_name: str,
+    lock_policy: LockPolicy,
+    ingest: Callable[[], Awaitable[SourceWriteResult]],
+) -> SourceWriteResult:
+    """Run one source's ingest, timed per stage, under its advisory lock when the policy is per source."""
+    if lock_policy.scope != "source":
+        return await _timed_ingest(source_name, ingest)
+
+    try:
+        with ingestion_lock(source_name, lock_policy.mode, lock_policy.timeout_seconds) as acquired:
+            if not acquired:
+                return _lock_skipped_results([source_name], f"Another ingestion run holds the {source_name} lock")[0]
+            return await _timed_ingest(source_name, ingest)
+    except IngestLockBusy as error:
+        return SourceWriteResult(
+            source_name=source_name,
+            status="failed",
+            rows_written=0,
+            failure_category="locked",
+            message=str(error),
+        )
+
+
+async def run_backfill(from_date: date, to_date: date, lock_policy: LockPolicy | None = None) -> list[SourceWriteResult]:
+    lock_policy = lock_policy or load_lock_policy()
+    with global_ingestion_lock(lock_policy) as acquired:
+        if not acquired:
+            return _lock_skipped_results(list(SOURCE_INGESTERS), "Another ingestion run holds the global lock")
+
         with get_connection() as connection:
-            write_source_status(connection, run_id, result)
+            run_id = create_ingestion_run(connection)
+
+        results: list[SourceWriteResult] = []
+        for source_name, ingest_func in SOURCE_INGESTERS.items():
+            result = await ingest_with_source_lock(
+                source_name,
+                lock_policy,
+                lambda: ingest_func(from_date, to_date, run_id),
+            )
+            results.append(result)
+            with get_connection() as connection:
+                write_source_status(connection, run_id, result)
+
+        touched_days = _refresh_rollups_for_results(results, from_date, to_date)
+
+        _finalize_run(run_id, results, touched_days)
 
+    return results
+
+
+async def _sync_source(
+    source_name: str,
+    ingest_func: SourceIngestFunction,
+    run_id: int,
+    default_from_date: date,
+    sync_to_date: date,
+    backtrack_days: int,
+    force: bool,
+) -> SourceWriteResult:
+    # Freshness and the watermark are read only once the source lock is held, so a
+    # run that waited behind another one sees what that run just loaded.
     with get_connection() as connection:
-        finalize_ingestion_run(connection, run_id, results)
+        freshness = get_source_freshness(connection).get(source_name, SourceFreshness(None, None))
+    reason = None if force else skip_reason(load_freshness_policies()[source_name], freshness, datetime.now(UTC))
+    if reason:
+        return SourceWriteResult(
+            source_name=source_name,
+            status="skipped",
+            rows_written=0,
+            message=reason,
+            details={
+                "latest_data_at": freshness.latest_data_at.isoformat() if freshness.latest_data_at else None,
+                "last_success_at": freshness.last_success_at.isoformat() if freshness.last_success_at else None,
+            },
+        )
+
+    latest_loaded_date = _get_latest_loaded_dates().get(source_name)
+    if latest_loaded_date:
+        source_from_date = max(default_from_date, latest_loaded_date - timedelta(days=backtrack_days))
+    else:
+        source_from_date = default_from_date
+
+    if source_from_date > sync_to_date:
+        source_from_date = sync_to_date
+
+    result = await ingest_func(source_from_date, sync_to_date, run_id)
+    result.details = {
+        **(result.details or {}),
+        "sync_window": {
+            "from": source_from_date.isoformat(),
+            "to": sync_to_date.isoformat(),
+            "latest_loaded_date": latest_loaded_date.isoformat() if latest_loaded_date else None,
+        },
+    }
+    return result
+
+
+async def run_incremental_sync(
+    backtrack_days: int = 2,
+    to_date: date | None = None,
+    force: bool = False,
+    on_result: Callable[[SourceWriteResult], None] | None = None,
+    lock_policy: LockPolicy | None = None,
+    sources: tuple[str, ...] | None = None,
+) -> list[SourceWriteResult]:
+    """Sync every source, or only `sources`, from its latest loaded day up to to_date."""
+    sync_to_date = to_date or date.today()
+    default_from_date = date(sync_to_date.year, 1, 1)
+    lock_policy = lock_policy or load_lock_policy()
+    ingesters = {
+        source_name: ingest_func
+        for source_name, ingest_func in SOURCE_INGESTERS.items()
+        if sources is None or source_name in sources
+    }
+
+    with global_ingestion_lock(lock_policy) as acquired:
+        if not acquired:
+            results = _lock_skipped_results(list(ingesters), "Another ingestion run holds the global lock")
+            for result in results:
+                if on_result:
+                    on_result(result)
+            return results
+
+        with get_connection() as connection:
+            run_id = create_ingestion_run(connection)
+
+        results: list[SourceWriteResult] = []
+        for source_name, ingest_func in ingesters.items():
+            result = await ingest_with_source_lock(
+                source_name,
+                lock_policy,
+                lambda: _sync_source(
+                    source_name,
+                    ingest_func,
+                    run_id,
+                    default_from_date,
+                    sync_to_date,
+                    backtrack_days,
+                    force,
+                ),
+            )
+            results.append(result)
+            with get_connection() as connection:
+                write_source_status(connection, run_id, result)
+            if on_result:
+                on_result(result)
+
+        touched_days = _refresh_rollups_for_results(results, sync_to_date, sync_to_date)
+
+        _finalize_run(run_id, results, touched_days)
 
     return results
 
@@ -573,7 +656,10 @@ def main() -> None:
 
     args = _parse_args()
     from_date, to_date = _resolve_date_range(args.from_date, args.to_date)
-    results = asyncio.run(run_backfill(from_date=from_date, to_date=to_date))
+    lock_policy = load_lock_policy(scope=args.lock_scope, mode=args.lock_mode)
+    profile_session = ProfileSession(output_dir=Path(args.profile_dir)) if args.profile_dir else None
+    with profiling(profile_session):
+        results = asyncio.run(run_backfill(from_date=from_date, to_date=to_date, lock_policy=lock_policy))
 
     print(f"Backfill completed for {from_date.isoformat()} to {to_date.isoformat()}")
     for result in results:
@@ -581,6 +667,8 @@ def main() -> None:
             f"- {result.source_name}: status={result.status}, rows_written={result.rows_written}"
             + (f", message={result.message}" if result.message else "")
         )
+    if profile_session:
+        print(f"Profiles written to {', '.join(str(path) for path in profile_session.files) or '(none)'}")
 
 
 if __name__ == "__main__":
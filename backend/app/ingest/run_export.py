@@ -0,0 +1,300 @@
+"""Stream raw tables and daily views out of Postgres as CSV, NDJSON or Parquet.
+
+Nothing is fetched whole, so memory stays constant however many years are exported:
+CSV is produced by Postgres itself through COPY TO STDOUT, NDJSON rows are rendered
+by row_to_json and read from a named server-side cursor in batches, and Parquet writes
+one row group per cursor batch. CSV and NDJSON can be gzip-compressed on the fly;
+Parquet needs pyarrow (`uv sync --extra binary`) and is compressed internally.
+Exports leave out raw source_payload columns unless asked for.
+
+    python -m app.ingest.run_export electricity_raw --from 2024-01-01 --to 2024-12-31 --format csv --gzip -o out.csv.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date
+import io
+from pathlib import Path
+import sys
+from typing import Any
+import zlib
+
+from dotenv import load_dotenv
+from psycopg import Connection, sql
+
+from app.ingest.db import get_connection
+
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+LOCAL_TZ = "Atlantic/Reykjavik"
+EXPORT_BATCH_ROWS = 5000
+CHUNK_BYTES = 64 * 1024
+
+# Export name -> time column; raw tables are filtered on local days of a timestamp, views on their day.
+EXPORT_SOURCES = {
+    "electricity_raw": "measured_at",
+    "ev_charger_raw": "started_at",
+    "hot_water_raw": "measured_at",
+    "weather_raw": "measured_at",
+    "electricity_daily": "day",
+    "ev_daily": "day",
+    "hot_water_daily": "day",
+    "weather_daily": "day",
+    "dashboard_daily": "day",
+}
+PAYLOAD_COLUMNS = ("source_payload",)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    name: str
+    media_type: str
+    extension: str
+
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("csv", "text/csv; charset=utf-8", "csv"),
+    "ndjson": ExportFormat("ndjson", "application/x-ndjson", "ndjson"),
+    "parquet": ExportFormat("parquet", "application/vnd.apache.parquet", "parquet"),
+}
+
+
+@dataclass(frozen=True)
+class ExportRequest:
+    source: str
+    from_date: date
+    to_date: date
+    format: str = "csv"
+    gzip: bool = False
+    include_payload: bool = False
+
+    def validate(self) -> None:
+        if self.source not in EXPORT_SOURCES:
+            raise ValueError(f"source must be one of: {', '.join(EXPORT_SOURCES)}")
+        if self.format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+        if self.from_date > self.to_date:
+            raise ValueError("from date must be <= to date")
+        if self.gzip and self.format == "parquet":
+            raise ValueError("Parquet files are compressed internally; gzip applies to csv and ndjson")
+        if self.format == "parquet" and _load_parquet() is None:
+            raise ValueError("Parquet export needs pyarrow, from the optional 'binary' dependencies")
+
+    @property
+    def filename(self) -> str:
+        name = f"{self.source}_{self.from_date.isoformat()}_{self.to_date.isoformat()}.{EXPORT_FORMATS[self.format].extension}"
+        return name + ".gz" if self.gzip else name
+
+    @property
+    def media_type(self) -> str:
+        return "application/gzip" if self.gzip else EXPORT_FORMATS[self.format].media_type
+
+
+def _load_parquet() -> tuple[Any, Any] | None:
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow, pyarrow.parquet
+
+
+def export_columns(connection: Connection, source: str, include_payload: bool = False) -> list[tuple[str, str]]:
+    """(column, data_type) pairs of the source, in table order."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            select column_name, data_type
+            from information_schema.columns
+            where table_schema = 'energy' and table_name = %s
+            order by ordinal_position
+            """,
+            (source,),
+        )
+        columns = [(str(name), str(data_type)) for name, data_type in cursor.fetchall()]
+    return [column for column in columns if include_payload or column[0] not in PAYLOAD_COLUMNS]
+
+
+def _select(source: str, expressions: list[sql.Composable]) -> sql.Composed:
+    time_column = sql.Identifier(EXPORT_SOURCES[source])
+    if EXPORT_SOURCES[source] == "day":
+        where = sql.SQL("{time} >= %(from)s and {time} <= %(to)s").format(time=time_column)
+    else:
+        where = sql.SQL(
+            "{time} >= %(from)s::timestamp at time zone %(tz)s"
+            " and {time} < (%(to)s::date + 1)::timestamp at time zone %(tz)s"
+        ).format(time=time_column)
+    return sql.SQL("select {columns} from {table} where {where} order by {time}").format(
+        columns=sql.SQL(", ").join(expressions),
+        table=sql.Identifier("energy", source),
+        where=where,
+        time=time_column,
+    )
+
+
+def _set_local_time_zone(connection: Connection) -> None:
+    # Timestamps are written in local time, like every day boundary in the schema.
+    connection.execute(sql.SQL("set local time zone {}").format(sql.Literal(LOCAL_TZ)))
+
+
+def _coalesce(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _csv_chunks(connection: Connection, request: ExportRequest, columns: list[tuple[str, str]]) -> Iterator[bytes]:
+    query = _select(request.source, [sql.Identifier(name) for name, _ in columns])
+    _set_local_time_zone(connection)
+    with connection.cursor() as cursor:
+        copy_query = sql.SQL("copy ({}) to stdout with (format csv, header)").format(query)
+        with cursor.copy(copy_query, {"from": request.from_date, "to": request.to_date, "tz": LOCAL_TZ}) as copy:
+            for data in copy:
+                yield bytes(data)
+
+
+def _ndjson_chunks(connection: Connection, request: ExportRequest, columns: list[tuple[str, str]]) -> Iterator[bytes]:
+    query = sql.SQL("select row_to_json(exported)::text from ({}) exported").format(
+        _select(request.source, [sql.Identifier(name) for name, _ in columns])
+    )
+    _set_local_time_zone(connection)
+    with connection.cursor(name="export_ndjson") as cursor:
+        cursor.execute(query, {"from": request.from_date, "to": request.to_date, "tz": LOCAL_TZ})
+        while batch := cursor.fetchmany(EXPORT_BATCH_ROWS):
+            yield ("\n".join(line for (line,) in batch) + "\n").encode("utf-8")
+
+
+def _arrow_type(pa: Any, data_type: str) -> tuple[Any, str | None]:
+    """Arrow type for a Postgres data_type, and the SQL cast that produces a matching Python value."""
+    if data_type in {"smallint", "integer", "bigint"}:
+        return pa.int64(), None
+    if data_type in {"numeric", "real", "double precision"}:
+        return pa.float64(), "float8"
+    if data_type == "timestamp with time zone":
+        return pa.timestamp("us", tz="UTC"), None
+    if data_type == "timestamp without time zone":
+        return pa.timestamp("us"), None
+    if data_type == "date":
+        return pa.date32(), None
+    if data_type == "boolean":
+        return pa.bool_(), None
+    return pa.string(), "text"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back as chunks while keeping absolute offsets for tell()."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
+
+
+def _parquet_chunks(connection: Connection, request: ExportRequest, columns: list[tuple[str, str]]) -> Iterator[bytes]:
+    pa, pq = _load_parquet()
+    types = [(name, *_arrow_type(pa, data_type)) for name, data_type in columns]
+    schema = pa.schema([pa.field(name, arrow_type) for name, arrow_type, _ in types])
+    expressions = [
+        sql.SQL("{}::{} as {}").format(sql.Identifier(name), sql.SQL(cast), sql.Identifier(name))
+        if cast
+        else sql.Identifier(name)
+        for name, _, cast in types
+    ]
+
+    sink = _ChunkSink()
+    with connection.cursor(name="export_parquet") as cursor:
+        cursor.execute(_select(request.source, expressions), {"from": request.from_date, "to": request.to_date, "tz": LOCAL_TZ})
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            while batch := cursor.fetchmany(EXPORT_BATCH_ROWS):
+                writer.write_batch(pa.record_batch(list(zip(*batch)), schema=schema))
+                yield sink.drain()
+    yield sink.drain()
+
+
+_CHUNK_WRITERS = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "parquet": _parquet_chunks}
+
+
+def stream_export(connection: Connection, request: ExportRequest) -> Iterator[bytes]:
+    """The encoded export, chunk by chunk; the connection must stay open until it is exhausted."""
+    request.validate()
+    columns = export_columns(connection, request.source, request.include_payload)
+    chunks = _coalesce(_CHUNK_WRITERS[request.format](connection, request, columns))
+    yield from _gzip(chunks) if request.gzip else chunks
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export a raw table or daily view for a date range")
+    parser.add_argument("source", choices=EXPORT_SOURCES, help="Raw table or daily view in the energy schema")
+    parser.add_argument("--from", dest="from_date", required=True, help="First local day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", required=True, help="Last local day (YYYY-MM-DD)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Output format (default csv)")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the csv or ndjson output")
+    parser.add_argument("--include-payload", action="store_true", help="Also export raw source_payload columns")
+    parser.add_argument("-o", "--output", default=None, help="Output file (default stdout)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    load_dotenv(REPO_ROOT / ".env")
+
+    args = _parse_args()
+    request = ExportRequest(
+        source=args.source,
+        from_date=date.fromisoformat(args.from_date),
+        to_date=date.fromisoformat(args.to_date),
+        format=args.format,
+        gzip=args.gzip,
+        include_payload=args.include_payload,
+    )
+    try:
+        request.validate()
+    except ValueError as error:
+        raise SystemExit(str(error)) from error
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        with get_connection() as connection:
+            for chunk in stream_export(connection, request):
+                output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+    if args.output:
+        print(f"Exported {request.source} to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from app.ingest.db import (
+    SourceWriteResult,
+    create_ingestion_run,
+    get_connection,
+    write_source_status,
+)
+from app.ingest.gaps import GAP_GRIDS, GapWindow, detect_gap_windows
+from app.ingest.locks import LockPolicy, add_lock_arguments, global_ingestion_lock, load_lock_policy
+from app.ingest.run_backfill import (
+    SOURCE_INGESTERS,
+    _finalize_run,
+    _lock_skipped_results,
+    _refresh_rollups_for_results,
+    ingest_with_source_lock,
+)
+
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_BRIDGE_DAYS = 1
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Refetch only the hours and days missing from loaded history")
+    parser.add_argument("--from", dest="from_date", default=None, help="Start date (YYYY-MM-DD), default first loaded day")
+    parser.add_argument("--to", dest="to_date", default=None, help="End date (YYYY-MM-DD), default yesterday")
+    parser.add_argument(
+        "--source",
+        dest="sources",
+        action="append",
+        choices=tuple(GAP_GRIDS),
+        help="Source to repair; repeat for several (default all with a gap grid)",
+    )
+    parser.add_argument(
+        "--bridge-days",
+        type=int,
+        default=DEFAULT_BRIDGE_DAYS,
+        help="Join gap windows separated by at most this many loaded days into one fetch",
+    )
+    parser.add_argument("--max-window-days", type=int, default=None, help="Split fetch windows longer than this")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the fetch windows")
+    add_lock_arguments(parser)
+    return parser.parse_args()
+
+
+async def run_gap_repair(windows: list[GapWindow], lock_policy: LockPolicy | None = None) -> list[SourceWriteResult]:
+    if not windows:
+        return []
+
+    lock_policy = lock_policy or load_lock_policy()
+    with global_ingestion_lock(lock_policy) as acquired:
+        if not acquired:
+            return _lock_skipped_results(
+                [window.source_name for window in windows],
+                "Another ingestion run holds the global lock",
+            )
+
+        with get_connection() as connection:
+            run_id = create_ingestion_run(connection)
+
+        results: list[SourceWriteResult] = []
+        for window in windows:
+            ingest_func = SOURCE_INGESTERS[window.source_name]
+            result = await ingest_with_source_lock(
+                window.source_name,
+                lock_policy,
+                lambda: ingest_func(window.from_date, window.to_date, run_id),
+            )
+            result.details = {
+                **(result.details or {}),
+                "gap_window": {
+                    "from": window.from_date.isoformat(),
+                    "to": window.to_date.isoformat(),
+                    "missing_slots": window.missing_slots,
+                },
+            }
+            results.append(result)
+            with get_connection() as connection:
+                write_source_status(connection, run_id, result)
+
+        touched_days = _refresh_rollups_for_results(
+            results,
+            min(window.from_date for window in windows),
+            max(window.to_date for window in windows),
+        )
+
+        _finalize_run(run_id, results, touched_days)
+
+    return results
+
+
+def main() -> None:
+    load_dotenv(REPO_ROOT / ".env")
+
+    args = _parse_args()
+    from_date = date.fromisoformat(args.from_date) if args.from_date else date(1970, 1, 1)
+    to_date = date.fromisoformat(args.to_date) if args.to_date else date.today() - timedelta(days=1)
+
+    with get_connection() as connection:
+        windows = detect_gap_windows(
+            connection,
+            sources=tuple(args.sources) if args.sources else tuple(GAP_GRIDS),
+            from_date=from_date,
+            to_date=to_date,
+            bridge_days=args.bridge_days,
+            max_window_days=args.max_window_days,
+        )
+
+    print(f"Found {len(windows)} gap window(s)")
+    for window in windows:
+        print(
+            f"- {window.source_name}: {window.from_date.isoformat()}..{window.to_date.isoformat()}, "
+            f"missing_slots={window.missing_slots}"
+        )
+
+    if args.dry_run:
+        return
+
+    lock_policy = load_lock_policy(scope=args.lock_scope, mode=args.lock_mode)
+    results = asyncio.run(run_gap_repair(windows, lock_policy))
+    print("Gap repair completed")
+    for result, window in zip(results, windows):
+        print(
+            f"- {result.source_name} {window.from_date.isoformat()}..{window.to_date.isoformat()}: "
+            f"status={result.status}, rows_written={result.rows_written}"
+            + (f", message={result.message}" if result.message else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, UTC
+from pathlib import Path
+import time as clock
+
+from dotenv import load_dotenv
+from psycopg import Connection
+
+from app.dashboard.kpi_snapshots import refresh_kpi_snapshots_after_change
+from app.ingest.db import get_connection, notify_data_changed, refresh_dashboard_rollups
+from app.ingest.locks import IngestLockBusy, LockPolicy, exclusive_ingestion_lock, load_lock_policy
+from app.ingest.run_retention import RAW_TABLE_TIME_COLUMNS
+
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_CHUNK_DAYS = 90
+DEFAULT_WORKERS = 4
+
+_NUMBER_PATTERN = r"^\s*[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?\s*$"
+
+
+def _number(text_expression: str, sql_type: str = "numeric") -> str:
+    # Same forgiveness as parsing.to_float: anything that is not a number becomes null.
+    return f"(case when {text_expression} ~ '{_NUMBER_PATTERN}' then ({text_expression})::{sql_type} end)"
+
+
+def _first_text(*keys: str) -> str:
+    # Mirrors `row.get(a) or row.get(b)`: empty strings fall through to the next key.
+    expressions = [f"nullif(source_payload ->> '{key}', '')" for key in keys[:-1]]
+    expressions.append(f"source_payload ->> '{keys[-1]}'")
+    return f"coalesce({', '.join(expressions)})"
+
+
+_HOT_WATER_READING_VALUE = f"""(
+    case
+      when source_payload_archived_at is not null then reading_value
+      else {_number("source_payload ->> 'readingValue'")}
+    end
+)"""
+_HOT_WATER_PAYLOAD_COLUMNS = f"""
+    id,
+    permanent_number,
+    measured_at,
+    source_payload_archived_at is not null as archived,
+    source_payload ? 'readingDate' as is_reading_history,
+    case
+      when source_payload ? 'readingDate' then {_number("source_payload ->> 'usage'")}
+      else {_number("source_payload ->> 'value'")}
+    end as payload_usage,
+    case
+      when source_payload ? 'readingDate'
+        then greatest(coalesce(trunc({_number("source_payload ->> 'readingDays'")})::integer, 0), 0)
+      else 0
+    end as payload_days,
+    {_number("source_payload ->> 'dailyEstimation'")} as daily_estimation,
+    {_HOT_WATER_READING_VALUE} as reading_value
+"""
+
+# Each entry derives the typed columns of one raw table from source_payload for
+# rows in [%(from)s, %(to)s). Conflict-key columns (meter, session and measured_at
+# keys) are never rewritten, so reprocessing cannot collide with other rows.
+_DERIVED_ROWS_SQL = {
+    "electricity_raw": f"""
+        select
+          id,
+          source_payload ->> 'delivery_point_name' as delivery_point_name,
+          {_number("source_payload ->> 'delta_value'")}::numeric(12, 4) as delta_kwh,
+          {_number("source_payload ->> 'index_value'")}::numeric(14, 4) as index_value,
+          {_number("source_payload ->> 'temperature'")}::numeric(8, 3) as ambient_temperature_c,
+          source_payload ->> 'unitcode' as unit_code,
+          {_first_text("type_data", "type")} as utility_type
+        from energy.electricity_raw
+        where measured_at >= %(from)s and measured_at < %(to)s
+          and source_payload_archived_at is null
+    """,
+    "ev_charger_raw": f"""
+        select
+          id,
+          charger_name,
+          started_at,
+          finished_at,
+          energy_kwh,
+          case
+            when finished_at >= started_at then floor(extract(epoch from finished_at - started_at))::integer
+            else 0
+          end as duration_seconds
+        from (
+          select
+            id,
+            {_first_text("DeviceName", "ChargerName")} as charger_name,
+            coalesce(nullif({_first_text("StartDateTime", "startDateTime")}, '')::timestamptz, started_at) as started_at,
+            coalesce(
+              nullif({_first_text("EndDateTime", "endDateTime")}, '')::timestamptz,
+              nullif({_first_text("StartDateTime", "startDateTime")}, '')::timestamptz,
+              started_at
+            ) as finished_at,
+            {_number(
+                "case when jsonb_typeof(source_payload -> 'Energy') <> 'null' "
+                "then source_payload ->> 'Energy' else source_payload ->> 'TotalChargeKwh' end"
+            )}::numeric(12, 4) as energy_kwh
+          from energy.ev_charger_raw
+          where started_at >= %(from)s and started_at < %(to)s
+            and source_payload_archived_at is null
+        ) session
+    """,
+    # Reading-history rows repeat the delta derivation from run_backfill._normalize_veitur_history_rows:
+    # a missing or zero usage is replaced by the reading-value increase since the previous reading.
+    # Only the chunk's rows are parsed; per meter, the latest earlier row with a reading value
+    # (archived ones through their stored reading_value) seeds the window.
+    "hot_water_raw": f"""
+        with payload as (
+          select {_HOT_WATER_PAYLOAD_COLUMNS}
+          from energy.hot_water_raw
+          where measured_at >= %(from)s and measured_at < %(to)s
+        ), seed as (
+          select earlier.*
+          from (select distinct permanent_number from payload) meter
+          cross join lateral (
+            select {_HOT_WATER_PAYLOAD_COLUMNS}
+            from energy.hot_water_raw
+            where permanent_number is not distinct from meter.permanent_number
+              and measured_at < %(from)s
+              and {_HOT_WATER_READING_VALUE} is not null
+            order by measured_at desc
+            limit 1
+          ) earlier
+        ), candidates as (
+          select * from payload
+          union all
+          select * from seed
+        ), with_previous as (
+          select
+            *,
+            lag(measured_at) over readings as previous_measured_at,
+            lag(reading_value) over readings as previous_reading_value
+          from candidates
+          where reading_value is not null
+          window readings as (partition by permanent_number order by measured_at)
+          union all
+          select *, null, null
+          from candidates
+          where reading_value is null
+        ), flagged as (
+          select
+            *,
+            is_reading_history
+              and (payload_usage is null or payload_usage <= 0)
+              and previous_reading_value is not null
+              and reading_value - previous_reading_value > 0
+              and (measured_at at time zone 'UTC')::date > (previous_measured_at at time zone 'UTC')::date
+              as derived
+          from with_previous
+          where measured_at >= %(from)s and not archived
+        )
+        select
+          id,
+          (case when derived then round(reading_value - previous_reading_value, 5) else payload_usage end)::numeric(14, 5)
+            as usage_value,
+          (case when derived then round(reading_value - previous_reading_value, 5) else payload_usage end)::numeric(14, 5)
+            as period_usage_value,
+          case when derived then previous_measured_at else measured_at - make_interval(days => payload_days) end
+            as interval_start_at,
+          measured_at as interval_end_at,
+          case
+            when derived then (measured_at at time zone 'UTC')::date - (previous_measured_at at time zone 'UTC')::date
+            else payload_days
+          end as interval_days,
+          daily_estimation::numeric(14, 5) as daily_estimation,
+          reading_value::numeric(14, 5) as reading_value
+        from flagged
+    """,
+    "weather_raw": f"""
+        select
+          id,
+          {_number("source_payload ->> 'temperature_2m'")}::numeric(8, 3) as temperature_c,
+          {_number("source_payload ->> 'relative_humidity_2m'")}::numeric(8, 3) as humidity_percent,
+          {_number("source_payload ->> 'wind_speed_10m'")}::numeric(8, 3) as wind_speed_kmh
+        from energy.weather_raw
+        where measured_at >= %(from)s and measured_at < %(to)s
+          and source_payload_archived_at is null
+    """,
+}
+
+_DERIVED_COLUMNS = {
+    "electricity_raw": (
+        "delivery_point_name", "delta_kwh", "index_value", "ambient_temperature_c", "unit_code", "utility_type",
+    ),
+    "ev_charger_raw": ("charger_name", "started_at", "finished_at", "energy_kwh", "duration_seconds"),
+    "hot_water_raw": (
+        "usage_value", "period_usage_value", "interval_start_at", "interval_end_at", "interval_days",
+        "daily_estimation", "reading_value",
+    ),
+    "weather_raw": ("temperature_c", "humidity_percent", "wind_speed_kmh"),
+}
+
+REPROCESS_TABLES = tuple(_DERIVED_ROWS_SQL)
+
+
+@dataclass(slots=True)
+class ReprocessResult:
+    table_name: str
+    from_date: date
+    to_date: date
+    chunks: int
+    rows_updated: int
+
+
+def chunk_date_range(from_date: date, to_date: date, chunk_days: int) -> list[tuple[date, date]]:
+    """Split the inclusive range into inclusive (from, to) chunks of at most chunk_days days."""
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be >= 1")
+
+    chunks: list[tuple[date, date]] = []
+    chunk_start = from_date
+    while chunk_start <= to_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), to_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _reprocess_sql(table_name: str, dry_run: bool) -> str:
+    columns = _DERIVED_COLUMNS[table_name]
+    target_columns = ", ".join(f"target.{column}" for column in columns)
+    derived_columns = ", ".join(f"derived.{column}" for column in columns)
+    changed_rows = f"""
+        from energy.{table_name} target
+        join ({_DERIVED_ROWS_SQL[table_name]}) derived on derived.id = target.id
+        where ({target_columns}) is distinct from ({derived_columns})
+    """
+    if dry_run:
+        return f"select count(*) {changed_rows}"
+
+    return f"""
+        update energy.{table_name} target
+        set ({", ".join(columns)}) = ({derived_columns})
+        from ({_DERIVED_ROWS_SQL[table_name]}) derived
+        where derived.id = target.id
+          and ({target_columns}) is distinct from ({derived_columns})
+    """
+
+
+def reprocess_chunk(connection: Connection, table_name: str, from_date: date, to_date: date, dry_run: bool = False) -> int:
+    """Recompute typed columns for one table and inclusive day range; returns rows changed."""
+    bounds = {
+        "from": datetime.combine(from_date, time.min, tzinfo=UTC),
+        "to": datetime.combine(to_date + timedelta(days=1), time.min, tzinfo=UTC),
+    }
+    with connection.cursor() as cursor:
+        # Payload timestamps without an offset are UTC, as in the ingest parsers.
+        cursor.execute("set local time zone 'UTC'")
+        cursor.execute(_reprocess_sql(table_name, dry_run), bounds)
+        rows_changed = int(cursor.fetchone()[0]) if dry_run else cursor.rowcount
+    connection.commit()
+    return rows_changed
+
+
+def _table_day_bounds(connection: Connection, table_name: str) -> tuple[date, date] | None:
+    time_column = RAW_TABLE_TIME_COLUMNS[table_name]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            select
+              (min({time_column}) at time zone 'Atlantic/Reykjavik')::date,
+              (max({time_column}) at time zone 'Atlantic/Reykjavik')::date
+            from energy.{table_name}
+            where source_payload_archived_at is null
+            """
+        )
+        first_day, last_day = cursor.fetchone()
+    return (first_day, last_day) if first_day is not None else None
+
+
+def _run_chunk(table_name: str, from_date: date, to_date: date, dry_run: bool) -> int:
+    with get_connection() as connection:
+        return reprocess_chunk(connection, table_name, from_date, to_date, dry_run)
+
+
+def run_reprocess(
+    tables: tuple[str, ...] = REPROCESS_TABLES,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    chunk_days: int = DEFAULT_CHUNK_DAYS,
+    workers: int = DEFAULT_WORKERS,
+    dry_run: bool = False,
+    lock_policy: LockPolicy | None = None,
+) -> list[ReprocessResult]:
+    """Recompute typed columns in parallel chunks, then refresh rollups for the changed days.
+
+    Runs under the exclusive global ingestion lock, so no sync or retention run writes
+    the same rows meanwhile. A dry run only counts and takes no lock.
+    """
+    lock = nullcontext() if dry_run else exclusive_ingestion_lock(lock_policy or load_lock_policy())
+    with lock:
+        return _reprocess_tables(tables, from_date, to_date, chunk_days, workers, dry_run)
+
+
+def _reprocess_tables(
+    tables: tuple[str, ...],
+    from_date: date | None,
+    to_date: date | None,
+    chunk_days: int,
+    workers: int,
+    dry_run: bool,
+) -> list[ReprocessResult]:
+    with get_connection() as connection:
+        table_ranges: dict[str, tuple[date, date]] = {}
+        for table_name in tables:
+            bounds = _table_day_bounds(connection, table_name)
+            if bounds is None:
+                continue
+            table_ranges[table_name] = (max(bounds[0], from_date or bounds[0]), min(bounds[1], to_date or bounds[1]))
+
+    chunks_by_table = {
+        table_name: chunk_date_range(table_from, table_to, chunk_days) if table_from <= table_to else []
+        for table_name, (table_from, table_to) in table_ranges.items()
+    }
+    # Chunks of all tables share one pool, so a large table does not serialize behind a small one.
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures_by_table = {
+            table_name: [
+                executor.submit(_run_chunk, table_name, chunk_from, chunk_to, dry_run)
+                for chunk_from, chunk_to in chunks
+            ]
+            for table_name, chunks in chunks_by_table.items()
+        }
+        results = [
+            ReprocessResult(
+                table_name=table_name,
+                from_date=table_ranges[table_name][0],
+                to_date=table_ranges[table_name][1],
+                chunks=len(futures),
+                rows_updated=sum(future.result() for future in futures),
+            )
+            for table_name, futures in futures_by_table.items()
+        ]
+
+    changed = [result for result in results if result.rows_updated]
+    if changed and not dry_run:
+        touched_days = (min(result.from_date for result in changed), max(result.to_date for result in changed))
+        with get_connection() as connection:
+            refresh_dashboard_rollups(connection, *touched_days)
+            connection.commit()
+        refresh_kpi_snapshots_after_change(date.today())
+        with get_connection() as connection:
+            notify_data_changed(connection, None, touched_days)
+            connection.commit()
+
+    return results
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Recompute typed raw-table columns from stored source_payload")
+    parser.add_argument("--from", dest="from_date", default=None, help="Start date (YYYY-MM-DD), default earliest row")
+    parser.add_argument("--to", dest="to_date", default=None, help="End date (YYYY-MM-DD), default latest row")
+    parser.add_argument(
+        "--table",
+        dest="tables",
+        action="append",
+        choices=REPROCESS_TABLES,
+        help="Raw table to reprocess; repeat for several (default all)",
+    )
+    parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS, help="Days per parallel chunk")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel database connections")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would change")
+    return parser.parse_args()
+
+
+def main() -> None:
+    load_dotenv(REPO_ROOT / ".env")
+
+    args = _parse_args()
+    started = clock.perf_counter()
+    try:
+        results = run_reprocess(
+            tables=tuple(args.tables) if args.tables else REPROCESS_TABLES,
+            from_date=date.fromisoformat(args.from_date) if args.from_date else None,
+            to_date=date.fromisoformat(args.to_date) if args.to_date else None,
+            chunk_days=args.chunk_days,
+            workers=args.workers,
+            dry_run=args.dry_run,
+        )
+    except IngestLockBusy as error:
+        raise SystemExit(str(error)) from error
+    elapsed_seconds = clock.perf_counter() - started
+
+    print(f"Reprocess {'dry run' if args.dry_run else 'completed'} in {elapsed_seconds:.2f}s")
+    for result in results:
+        print(
+            f"- {result.table_name}: {result.from_date}..{result.to_date}, chunks={result.chunks}, "
+            f"{'rows_to_change' if args.dry_run else 'rows_updated'}={result.rows_updated}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import argparse
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+import gzip
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from psycopg import Connection
+
+from app.ingest.db import get_connection, refresh_dashboard_rollups
+from app.ingest.locks import IngestLockBusy, LockPolicy, exclusive_ingestion_lock, load_lock_policy
+
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_ARCHIVE_DIR = REPO_ROOT / "data" / "archive"
+DEFAULT_BATCH_SIZE = 5000
+
+RAW_TABLE_TIME_COLUMNS = {
+    "electricity_raw": "measured_at",
+    "ev_charger_raw": "started_at",
+    "hot_water_raw": "measured_at",
+    "weather_raw": "measured_at",
+}
+DOWNSAMPLED_TABLES = ("electricity_raw", "weather_raw")
+
+
+@dataclass(frozen=True)
+class TableRetentionPolicy:
+    table_name: str
+    payload_days: int | None
+    archive_payload: bool
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    tables: tuple[TableRetentionPolicy, ...]
+    archive_dir: Path
+    downsample_after_years: int | None
+    batch_size: int = DEFAULT_BATCH_SIZE
+
+
+@dataclass(slots=True)
+class RetentionResult:
+    table_name: str
+    action: str
+    rows_affected: int
+    archive_files: list[str] = field(default_factory=list)
+
+
+def _env_int(name: str, default: int | None) -> int | None:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    if value.strip().lower() in {"off", "never", "none"}:
+        return None
+    return int(value)
+
+
+def load_retention_policy() -> RetentionPolicy:
+    # Weather payloads only repeat the typed columns, so they are dropped quickly and never archived.
+    return RetentionPolicy(
+        tables=(
+            TableRetentionPolicy("electricity_raw", _env_int("RETENTION_ELECTRICITY_PAYLOAD_DAYS", 365), True),
+            TableRetentionPolicy("ev_charger_raw", _env_int("RETENTION_EV_CHARGER_PAYLOAD_DAYS", 365), True),
+            TableRetentionPolicy("hot_water_raw", _env_int("RETENTION_HOT_WATER_PAYLOAD_DAYS", 365), True),
+            TableRetentionPolicy("weather_raw", _env_int("RETENTION_WEATHER_PAYLOAD_DAYS", 7), False),
+        ),
+        archive_dir=Path(os.getenv("RETENTION_ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR),
+        downsample_after_years=_env_int("RETENTION_DOWNSAMPLE_AFTER_YEARS", None),
+        batch_size=_env_int("RETENTION_BATCH_SIZE", DEFAULT_BATCH_SIZE) or DEFAULT_BATCH_SIZE,
+    )
+
+
+def _write_archive_file(archive_dir: Path, table_name: str, kind: str, lines: list[str], first_id: int, last_id: int) -> Path:
+    table_dir = archive_dir / table_name
+    table_dir.mkdir(parents=True, exist_ok=True)
+    output_path = table_dir / f"{table_name}-{kind}-{first_id}-{last_id}.ndjson.gz"
+    partial_path = output_path.with_suffix(".partial")
+
+    with gzip.open(partial_path, "wt", encoding="utf-8") as archive_file:
+        archive_file.writelines(lines)
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+    partial_path.replace(output_path)
+    return output_path
+
+
+def strip_payloads(
+    connection: Connection,
+    policy: TableRetentionPolicy,
+    cutoff_day: date,
+    archive_dir: Path,
+    batch_size: int,
+    dry_run: bool = False,
+) -> RetentionResult:
+    time_column = RAW_TABLE_TIME_COLUMNS[policy.table_name]
+    action = "archive_payload" if policy.archive_payload else "strip_payload"
+    result = RetentionResult(table_name=policy.table_name, action=action, rows_affected=0)
+
+    if dry_run:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                select count(*)
+                from energy.{policy.table_name}
+                where {time_column} < %s::timestamp at time zone 'Atlantic/Reykjavik'
+                  and source_payload_archived_at is null
+                """,
+                (cutoff_day,),
+            )
+            result.rows_affected = int(cursor.fetchone()[0])
+        return result
+
+    last_id = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                select id, {time_column}, source_payload::text
+                from energy.{policy.table_name}
+                where id > %s
+                  and {time_column} < %s::timestamp at time zone 'Atlantic/Reykjavik'
+                  and source_payload_archived_at is null
+                order by id
+                limit %s
+                """,
+                (last_id, cutoff_day, batch_size),
+            )
+            rows = cursor.fetchall()
+
+        if not rows:
+            break
+
+        row_ids = [row_id for row_id, _, _ in rows]
+        if policy.archive_payload:
+            # The payload text is copied verbatim, so archiving never re-encodes JSON.
+            lines = [
+                f'{{"id": {row_id}, "{time_column}": "{row_time.isoformat() if row_time else ""}", "source_payload": {payload}}}\n'
+                for row_id, row_time, payload in rows
+            ]
+            archive_path = _write_archive_file(archive_dir, policy.table_name, "payload", lines, row_ids[0], row_ids[-1])
+            result.archive_files.append(str(archive_path))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                update energy.{policy.table_name}
+                set source_payload = '{{}}'::jsonb,
+                    source_payload_archived_at = now()
+                where id = any(%s)
+                """,
+                (row_ids,),
+            )
+        connection.commit()
+
+        result.rows_affected += len(row_ids)
+        last_id = row_ids[-1]
+
+    return result
+
+
+def downsample_hourly_rows(
+    connection: Connection,
+    table_name: str,
+    cutoff_day: date,
+    archive_dir: Path | None,
+    batch_size: int,
+    dry_run: bool = False,
+) -> RetentionResult:
+    result = RetentionResult(table_name=table_name, action="downsample", rows_affected=0)
+    cutoff_filter = "measured_at < %s::timestamp at time zone 'Atlantic/Reykjavik'"
+
+    if dry_run:
+        with connection.cursor() as cursor:
+            cursor.execute(f"select count(*) from energy.{table_name} where {cutoff_filter}", (cutoff_day,))
+            result.rows_affected = int(cursor.fetchone()[0])
+        return result
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            insert into energy.retention_state (source_table, downsampled_before)
+            values (%s, %s)
+            on conflict (source_table)
+            do update set
+              downsampled_before = greatest(energy.retention_state.downsampled_before, excluded.downsampled_before),
+              updated_at = now()
+            """,
+            (table_name, cutoff_day),
+        )
+    connection.commit()
+
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                select id, row_to_json(raw_row)::text
+                from energy.{table_name} raw_row
+                where {cutoff_filter}
+                order by id
+                limit %s
+                """,
+                (cutoff_day, batch_size),
+            )
+            rows = cursor.fetchall()
+
+        if not rows:
+            break
+
+        row_ids = [row_id for row_id, _ in rows]
+        if archive_dir is not None:
+            lines = [f"{row_json}\n" for _, row_json in rows]
+            archive_path = _write_archive_file(archive_dir, table_name, "rows", lines, row_ids[0], row_ids[-1])
+            result.archive_files.append(str(archive_path))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"delete from energy.{table_name} where id = any(%s)", (row_ids,))
+        connection.commit()
+        result.rows_affected += len(row_ids)
+
+    return result
+
+
+def _earliest_hourly_day(connection: Connection) -> date | None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            select min(day) from (
+              select min((measured_at at time zone 'Atlantic/Reykjavik')::date) as day from energy.electricity_raw
+              union all
+              select min((measured_at at time zone 'Atlantic/Reykjavik')::date) as day from energy.weather_raw
+            ) earliest
+            """
+        )
+        return cursor.fetchone()[0]
+
+
+def run_retention(
+    policy: RetentionPolicy,
+    today: date | None = None,
+    dry_run: bool = False,
+    lock_policy: LockPolicy | None = None,
+) -> list[RetentionResult]:
+    """Strip old payloads and downsample old hourly rows.
+
+    Runs under the exclusive global ingestion lock, so no sync or reprocess upserts the
+    rows it rewrites or deletes. A dry run only counts and takes no lock.
+    """
+    current_day = today or date.today()
+    results: list[RetentionResult] = []
+    lock = nullcontext() if dry_run else exclusive_ingestion_lock(lock_policy or load_lock_policy())
+
+    with lock, get_connection() as connection:
+        for table_policy in policy.tables:
+            if table_policy.payload_days is None:
+                continue
+            cutoff_day = current_day - timedelta(days=table_policy.payload_days)
+            results.append(
+                strip_payloads(connection, table_policy, cutoff_day, policy.archive_dir, policy.batch_size, dry_run)
+            )
+
+        if policy.downsample_after_years is not None:
+            downsample_cutoff = date(current_day.year - policy.downsample_after_years, current_day.month, 1)
+            earliest_day = _earliest_hourly_day(connection)
+            if earliest_day is not None and earliest_day < downsample_cutoff:
+                if not dry_run:
+                    # Make sure every day that is about to lose its raw rows has up-to-date rollups first.
+                    refresh_dashboard_rollups(connection, earliest_day, downsample_cutoff - timedelta(days=1))
+                for table_name in DOWNSAMPLED_TABLES:
+                    results.append(
+                        downsample_hourly_rows(
+                            connection,
+                            table_name,
+                            downsample_cutoff,
+                            policy.archive_dir,
+                            policy.batch_size,
+                            dry_run,
+                        )
+                    )
+
+    return results
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Apply payload retention and downsampling to the raw energy tables")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows each step would touch")
+    parser.add_argument(
+        "--downsample-after-years",
+        type=int,
+        default=None,
+        help="Delete hourly electricity and weather rows older than this many years (overrides env)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    load_dotenv(REPO_ROOT / ".env")
+
+    args = _parse_args()
+    policy = load_retention_policy()
+    if args.downsample_after_years is not None:
+        policy = replace(policy, downsample_after_years=args.downsample_after_years)
+
+    try:
+        results = run_retention(policy, dry_run=args.dry_run)
+    except IngestLockBusy as error:
+        raise SystemExit(str(error)) from error
+
+    print("Retention dry run" if args.dry_run else "Retention completed")
+    for result in results:
+        print(
+            f"- {result.table_name}: action={result.action}, rows={result.rows_affected}"
+            + (f", archive_files={len(result.archive_files)}" if result.archive_files else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
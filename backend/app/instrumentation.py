@@ -0,0 +1,224 @@
+"""Per-stage ingestion timing and its Prometheus text exposition.
+
+Each source ingest runs inside `collect_stage_metrics()`, which puts a StageMetrics in
+a context variable. Provider clients time their HTTP calls with `timed_request`, and
+ingesters wrap parsing, normalization and database writes in `stage(...)`. Outside a
+collection both are no-ops, so clients and batches stay usable on their own.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any
+
+import httpx
+
+
+STAGES = ("http", "parse", "normalize", "write")
+HTTP_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass(slots=True)
+class StageMetrics:
+    http_requests: int = 0
+    http_bytes: int = 0
+    http_latencies: list[float] = field(default_factory=list)
+    seconds: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    total_seconds: float = 0.0
+
+    def to_details(self, rows_written: int) -> dict[str, Any]:
+        details: dict[str, Any] = {
+            "http_requests": self.http_requests,
+            "http_bytes": self.http_bytes,
+            **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self.seconds.items()},
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "rows_per_second": round(rows_written / self.total_seconds, 1) if self.total_seconds else None,
+        }
+        if self.http_latencies:
+            details["http_max_ms"] = round(max(self.http_latencies) * 1000, 1)
+        return details
+
+
+_current: ContextVar[StageMetrics | None] = ContextVar("stage_metrics", default=None)
+
+
+@contextmanager
+def collect_stage_metrics() -> Iterator[StageMetrics]:
+    metrics = StageMetrics()
+    token = _current.set(metrics)
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.total_seconds = time.perf_counter() - started
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.seconds[name] += time.perf_counter() - started
+
+
+async def timed_request(request: Awaitable[httpx.Response]) -> httpx.Response:
+    """Await a (non-streamed) httpx request and record its count, latency and body size."""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        response = await request
+    finally:
+        if metrics is not None:
+            elapsed = time.perf_counter() - started
+            metrics.http_requests += 1
+            metrics.http_latencies.append(elapsed)
+            metrics.seconds["http"] += elapsed
+    if metrics is not None:
+        metrics.http_bytes += len(response.content)
+    return response
+
+
+def sum_timing_details(timings: list[dict[str, Any]]) -> dict[str, Any]:
+    """Add up per-source timing details into one run-level summary."""
+    keys = ["http_requests", "http_bytes", *(f"{name}_ms" for name in STAGES), "total_ms"]
+    summary: dict[str, Any] = {key: 0 for key in keys}
+    for timing in timings:
+        for key in keys:
+            summary[key] += timing.get(key) or 0
+    for key in keys:
+        if key.endswith("_ms"):
+            summary[key] = round(summary[key], 1)
+    return summary
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+class IngestMetrics:
+    """Process-wide counters for ingests run in this process, rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._runs: dict[tuple[str, str], int] = {}
+        self._rows: dict[str, int] = {}
+        self._http_requests: dict[str, int] = {}
+        self._http_bytes: dict[str, int] = {}
+        self._stage_seconds: dict[tuple[str, str], float] = {}
+        self._latency_buckets: dict[str, list[int]] = {}
+        self._latency_sum: dict[str, float] = {}
+        self._last_run_at: dict[str, float] = {}
+        self._last_rows_per_second: dict[str, float] = {}
+
+    def observe(self, source_name: str, status: str, rows_written: int, metrics: StageMetrics) -> None:
+        with self._lock:
+            self._runs[(source_name, status)] = self._runs.get((source_name, status), 0) + 1
+            self._rows[source_name] = self._rows.get(source_name, 0) + rows_written
+            self._http_requests[source_name] = self._http_requests.get(source_name, 0) + metrics.http_requests
+            self._http_bytes[source_name] = self._http_bytes.get(source_name, 0) + metrics.http_bytes
+            for name, seconds in metrics.seconds.items():
+                self._stage_seconds[(source_name, name)] = self._stage_seconds.get((source_name, name), 0.0) + seconds
+
+            buckets = self._latency_buckets.setdefault(source_name, [0] * (len(HTTP_LATENCY_BUCKETS) + 1))
+            for latency in metrics.http_latencies:
+                for index, bound in enumerate(HTTP_LATENCY_BUCKETS):
+                    if latency <= bound:
+                        buckets[index] += 1
+                buckets[-1] += 1
+                self._latency_sum[source_name] = self._latency_sum.get(source_name, 0.0) + latency
+
+            self._last_run_at[source_name] = time.time()
+            if metrics.total_seconds and rows_written:
+                self._last_rows_per_second[source_name] = rows_written / metrics.total_seconds
+
+    def render(self) -> str:
+        lines: list[str] = []
+
+        def family(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {_number(value)}" for labels, value in samples)
+
+        with self._lock:
+            family(
+                "orku_ingest_source_runs_total",
+                "counter",
+                "Source ingests by final status.",
+                [(_labels(source=source, status=status), count) for (source, status), count in sorted(self._runs.items())],
+            )
+            family(
+                "orku_ingest_rows_written_total",
+                "counter",
+                "Rows written per source.",
+                [(_labels(source=source), rows) for source, rows in sorted(self._rows.items())],
+            )
+            family(
+                "orku_ingest_http_requests_total",
+                "counter",
+                "Provider HTTP requests per source.",
+                [(_labels(source=source), count) for source, count in sorted(self._http_requests.items())],
+            )
+            family(
+                "orku_ingest_http_response_bytes_total",
+                "counter",
+                "Provider response body bytes per source.",
+                [(_labels(source=source), count) for source, count in sorted(self._http_bytes.items())],
+            )
+            family(
+                "orku_ingest_stage_seconds_total",
+                "counter",
+                "Time spent per ingest stage (http, parse, normalize, write).",
+                [
+                    (_labels(source=source, stage=name), seconds)
+                    for (source, name), seconds in sorted(self._stage_seconds.items())
+                ],
+            )
+
+            latency_samples: list[tuple[str, float]] = []
+            for source, buckets in sorted(self._latency_buckets.items()):
+                for bound, count in zip(HTTP_LATENCY_BUCKETS, buckets):
+                    latency_samples.append((_labels(source=source, le=f"{bound:g}"), count))
+                latency_samples.append((_labels(source=source, le="+Inf"), buckets[-1]))
+            lines.append("# HELP orku_ingest_http_request_duration_seconds Provider HTTP request latency.")
+            lines.append("# TYPE orku_ingest_http_request_duration_seconds histogram")
+            lines.extend(f"orku_ingest_http_request_duration_seconds_bucket{labels} {_number(value)}" for labels, value in latency_samples)
+            for source, buckets in sorted(self._latency_buckets.items()):
+                lines.append(f"orku_ingest_http_request_duration_seconds_sum{_labels(source=source)} {_number(self._latency_sum.get(source, 0.0))}")
+                lines.append(f"orku_ingest_http_request_duration_seconds_count{_labels(source=source)} {buckets[-1]}")
+
+            family(
+                "orku_ingest_last_run_timestamp_seconds",
+                "gauge",
+                "Unix time of the last ingest per source.",
+                [(_labels(source=source), value) for source, value in sorted(self._last_run_at.items())],
+            )
+            family(
+                "orku_ingest_last_rows_per_second",
+                "gauge",
+                "Rows written per second of the last ingest that wrote rows.",
+                [(_labels(source=source), value) for source, value in sorted(self._last_rows_per_second.items())],
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+INGEST_METRICS = IngestMetrics()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, time
+import json
+import os
+from typing import Any
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    name: str
+    loads: Callable[[bytes | str], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _encode_temporal(value: Any) -> str:
+    # orjson writes date, datetime and time natively as ISO 8601; the stdlib path must accept the same values.
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Built once: json.dumps with any keyword argument constructs a new encoder on every call.
+_STDLIB_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_encode_temporal)
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return _STDLIB_ENCODER.encode(value).encode("utf-8")
+
+
+STDLIB_CODEC = JsonCodec(name="stdlib", loads=json.loads, dumps=_stdlib_dumps)
+
+
+def _load_orjson_codec() -> JsonCodec | None:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    def orjson_dumps(value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    return JsonCodec(name="orjson", loads=orjson.loads, dumps=orjson_dumps)
+
+
+def select_codec(backend: str | None = None) -> JsonCodec:
+    """Pick the codec named by backend or JSON_CODEC_BACKEND ("auto", "orjson" or "stdlib")."""
+    requested = (backend or os.getenv("JSON_CODEC_BACKEND") or "auto").strip().lower()
+    if requested == "stdlib":
+        return STDLIB_CODEC
+
+    fast_codec = _load_orjson_codec()
+    if fast_codec is None and requested == "orjson":
+        raise RuntimeError("JSON_CODEC_BACKEND=orjson but orjson is not installed")
+    return fast_codec or STDLIB_CODEC
+
+
+codec = select_codec()
+
+
+def loads(data: bytes | str) -> Any:
+    return codec.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    return codec.dumps(value)
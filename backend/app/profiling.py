@@ -0,0 +1,202 @@
+"""Opt-in per-source profiling of ingests.
+
+While a ProfileSession is active (see `profiling`), every source ingest is profiled
+twice: a deterministic cProfile of the CPU work, and a wall-clock sampler that every
+few milliseconds records the ingest thread's stack plus the await chain of each
+suspended asyncio task, so time spent waiting on providers or the database shows
+up too. Samples are kept as folded stacks ("outer;inner count"), which flamegraph.pl
+and speedscope read directly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import cProfile
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+import io
+from pathlib import Path
+import pstats
+import sys
+import threading
+from types import FrameType
+from typing import Any
+
+
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 0.005
+REPORT_TOP_FUNCTIONS = 30
+REPORT_TOP_STACKS = 20
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+
+def _thread_stack(frame: FrameType | None) -> list[str]:
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return labels[::-1]
+
+
+def _await_chain(task: asyncio.Task[Any]) -> list[str]:
+    labels: list[str] = []
+    awaitable: Any = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return labels
+
+
+class WallClockSampler:
+    """Sample one thread's stack and its event loop's suspended tasks from a helper thread."""
+
+    def __init__(self, interval_seconds: float = DEFAULT_SAMPLE_INTERVAL_SECONDS) -> None:
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target_thread_id = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        self._target_thread_id = threading.get_ident()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="wall-clock-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    def _sample(self) -> None:
+        self.samples += 1
+        frame = sys._current_frames().get(self._target_thread_id)
+        if frame is not None:
+            self.stacks["thread;" + ";".join(_thread_stack(frame))] += 1
+
+        if self._loop is None:
+            return
+        try:
+            tasks = list(asyncio.all_tasks(self._loop))
+        except RuntimeError:
+            # The task set changed while it was copied; the next tick will catch up.
+            return
+        for task in tasks:
+            coroutine = task.get_coro()
+            # The running task is already in the thread stack above.
+            if task.done() or getattr(coroutine, "cr_running", False):
+                continue
+            chain = _await_chain(task)
+            if chain:
+                self.stacks[f"task:{task.get_name()};" + ";".join(chain)] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _cpu_top(profile: cProfile.Profile, limit: int) -> list[dict[str, Any]]:
+    stats = pstats.Stats(profile)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]  # type: ignore[attr-defined]
+    return [
+        {
+            "function": f"{function} ({Path(filename).name}:{line})",
+            "calls": calls,
+            "total_ms": round(total_time * 1000, 2),
+            "cumulative_ms": round(cumulative_time * 1000, 2),
+        }
+        for (filename, line, function), (_, calls, total_time, cumulative_time, _) in rows
+    ]
+
+
+@dataclass(slots=True)
+class ProfileSession:
+    output_dir: Path | None = None
+    sample_interval_seconds: float = DEFAULT_SAMPLE_INTERVAL_SECONDS
+    started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    sources: dict[str, dict[str, Any]] = field(default_factory=dict)
+    files: list[Path] = field(default_factory=list)
+
+    def record(self, source_name: str, profile: cProfile.Profile, sampler: WallClockSampler) -> None:
+        self.sources[source_name] = {
+            "cpu_top": _cpu_top(profile, REPORT_TOP_FUNCTIONS),
+            "wall_samples": sampler.samples,
+            "wall_interval_ms": sampler.interval_seconds * 1000,
+            "wall_top_stacks": [
+                {"stack": stack, "samples": count} for stack, count in sampler.stacks.most_common(REPORT_TOP_STACKS)
+            ],
+        }
+        if self.output_dir is None:
+            return
+
+        run_dir = self.output_dir / self.started_at.strftime("%Y%m%dT%H%M%SZ")
+        run_dir.mkdir(parents=True, exist_ok=True)
+        cpu_path = run_dir / f"{source_name}.prof"
+        profile.dump_stats(cpu_path)
+        folded_path = run_dir / f"{source_name}.folded"
+        folded_path.write_text(sampler.folded(), encoding="utf-8")
+
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(REPORT_TOP_FUNCTIONS)
+        summary_path = run_dir / f"{source_name}.txt"
+        summary_path.write_text(summary.getvalue(), encoding="utf-8")
+        self.files.extend([cpu_path, folded_path, summary_path])
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "sources": self.sources,
+            "files": [str(path) for path in self.files],
+        }
+
+
+_session: ContextVar[ProfileSession | None] = ContextVar("profile_session", default=None)
+
+
+@contextmanager
+def profiling(session: ProfileSession | None) -> Iterator[ProfileSession | None]:
+    """Profile every source ingest run in this context; a None session disables profiling."""
+    token = _session.set(session)
+    try:
+        yield session
+    finally:
+        _session.reset(token)
+
+
+@contextmanager
+def profile_source(source_name: str) -> Iterator[None]:
+    session = _session.get()
+    if session is None:
+        yield
+        return
+
+    profile = cProfile.Profile()
+    sampler = WallClockSampler(session.sample_interval_seconds)
+    sampler.start()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        sampler.stop()
+        session.record(source_name, profile, sampler)
@@ -4,6 +4,8 @@ from datetime import date, datetime, time
 
 import httpx
 
+from app import json_codec
+from app.instrumentation import stage, timed_request
 from app.providers.types import FailureCategory, ProviderError, raise_for_response
 
 
@@ -95,12 +97,13 @@ class HsVeiturClient:
 
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, params=query_params)
+                response = await timed_request(client.post(url, params=query_params))
         except httpx.RequestError as exc:
             raise ProviderError("hsveitur", FailureCategory.NETWORK, str(exc)) from exc
 
         raise_for_response("hsveitur", response)
-        payload = response.json()
+        with stage("parse"):
+            payload = json_codec.loads(response.content)
 
         if not isinstance(payload, (dict, list)):
             raise ProviderError("hsveitur", FailureCategory.SCHEMA, "Unexpected response shape")
@@ -4,6 +4,8 @@ from datetime import date
 
 import httpx
 
+from app import json_codec
+from app.instrumentation import stage, timed_request
 from app.providers.types import FailureCategory, ProviderError, raise_for_response
 
 
@@ -26,12 +28,13 @@ class OpenMeteoClient:
 
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(self._base_url, params=params)
+                response = await timed_request(client.get(self._base_url, params=params))
         except httpx.RequestError as exc:
             raise ProviderError("open_meteo", FailureCategory.NETWORK, str(exc)) from exc
 
         raise_for_response("open_meteo", response)
-        payload = response.json()
+        with stage("parse"):
+            payload = json_codec.loads(response.content)
 
         if not isinstance(payload, dict):
             raise ProviderError("open_meteo", FailureCategory.SCHEMA, "Unexpected response shape")
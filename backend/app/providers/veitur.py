@@ -4,6 +4,8 @@ from datetime import date, datetime, time
 
 import httpx
 
+from app import json_codec
+from app.instrumentation import stage, timed_request
 from app.providers.types import FailureCategory, ProviderError, raise_for_response
 
 
@@ -73,12 +75,13 @@ class VeiturClient:
 
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=headers, params=params)
+                response = await timed_request(client.get(url, headers=headers, params=params))
         except httpx.RequestError as exc:
             raise ProviderError("veitur", FailureCategory.NETWORK, str(exc)) from exc
 
         raise_for_response("veitur", response)
-        payload = response.json()
+        with stage("parse"):
+            payload = json_codec.loads(response.content)
 
         if not isinstance(payload, (dict, list)):
             raise ProviderError("veitur", FailureCategory.SCHEMA, "Unexpected response shape")
@@ -4,6 +4,8 @@ from datetime import date
 
 import httpx
 
+from app import json_codec
+from app.instrumentation import stage, timed_request
 from app.providers.types import FailureCategory, ProviderError, raise_for_response
 
 
@@ -23,12 +25,13 @@ class ZaptecClient:
 
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self._token_url, data=data)
+                response = await timed_request(client.post(self._token_url, data=data))
         except httpx.RequestError as exc:
             raise ProviderError("zaptec", FailureCategory.NETWORK, str(exc)) from exc
 
         raise_for_response("zaptec", response)
-        payload = response.json()
+        with stage("parse"):
+            payload = json_codec.loads(response.content)
 
         access_token = payload.get("access_token") if isinstance(payload, dict) else None
         if not access_token:
@@ -53,12 +56,13 @@ class ZaptecClient:
 
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=headers, params=params)
+                response = await timed_request(client.get(url, headers=headers, params=params))
         except httpx.RequestError as exc:
             raise ProviderError("zaptec", FailureCategory.NETWORK, str(exc)) from exc
 
         raise_for_response("zaptec", response)
-        payload = response.json()
+        with stage("parse"):
+            payload = json_codec.loads(response.content)
 
         if payload in ({}, []):
             raise ProviderError("zaptec", FailureCategory.EMPTY, "No rows returned", status_code=200)
@@ -0,0 +1,134 @@
+"""Compare BRIN and btree indexes on a time-ordered table shaped like energy.electricity_raw.
+
+Seeds a throwaway schema with hourly rows, builds both index kinds and reports
+index size plus range-scan latency for a few typical dashboard windows.
+
+    .venv/bin/python -m benchmarks.brin_vs_btree --years 10 --meters 4
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+import random
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+from app.ingest.db import get_connection
+
+
+BENCH_SCHEMA = "bench_brin"
+RANGE_WINDOWS = {
+    "1 day": "1 day",
+    "30 days": "30 days",
+    "1 year": "1 year",
+}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark BRIN vs btree indexes on time-ordered raw rows")
+    parser.add_argument("--years", type=int, default=10, help="Years of hourly rows to seed per meter")
+    parser.add_argument("--meters", type=int, default=4, help="Number of meters to seed")
+    parser.add_argument("--repeats", type=int, default=20, help="Range scans per window and index kind")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schema afterwards")
+    return parser.parse_args()
+
+
+def _seed(cursor, years: int, meters: int) -> int:
+    cursor.execute(f"drop schema if exists {BENCH_SCHEMA} cascade")
+    cursor.execute(f"create schema {BENCH_SCHEMA}")
+    cursor.execute(
+        f"""
+        create table {BENCH_SCHEMA}.electricity_raw (
+          id bigint generated always as identity primary key,
+          meter_id text,
+          measured_at timestamptz not null,
+          delta_kwh numeric(12, 4),
+          source_payload jsonb not null
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        insert into {BENCH_SCHEMA}.electricity_raw (meter_id, measured_at, delta_kwh, source_payload)
+        select
+          'meter-' || meter,
+          hour,
+          round((random() * 3)::numeric, 4),
+          jsonb_build_object('date', hour, 'meter_id', 'meter-' || meter, 'delta_value', 1.0)
+        from generate_series(now() - make_interval(years => %s), now(), interval '1 hour') as hour,
+             generate_series(1, %s) as meter
+        order by hour
+        """,
+        (years, meters),
+    )
+    cursor.execute(f"analyze {BENCH_SCHEMA}.electricity_raw")
+    cursor.execute(f"select count(*) from {BENCH_SCHEMA}.electricity_raw")
+    return int(cursor.fetchone()[0])
+
+
+def _create_index(cursor, kind: str) -> tuple[str, int]:
+    index_name = f"idx_bench_measured_at_{kind}"
+    if kind == "brin":
+        cursor.execute(
+            f"""
+            create index {index_name} on {BENCH_SCHEMA}.electricity_raw
+            using brin (measured_at) with (pages_per_range = 32)
+            """
+        )
+    else:
+        cursor.execute(f"create index {index_name} on {BENCH_SCHEMA}.electricity_raw (measured_at desc)")
+    cursor.execute(f"analyze {BENCH_SCHEMA}.electricity_raw")
+    cursor.execute("select pg_relation_size(%s::regclass)", (f"{BENCH_SCHEMA}.{index_name}",))
+    return index_name, int(cursor.fetchone()[0])
+
+
+def _time_range_scan(cursor, window: str, repeats: int) -> float:
+    durations: list[float] = []
+    for _ in range(repeats):
+        range_end = datetime.now(UTC) - timedelta(days=random.randint(0, 180))
+        started = time.perf_counter()
+        cursor.execute(
+            f"""
+            select sum(delta_kwh)
+            from {BENCH_SCHEMA}.electricity_raw
+            where measured_at >= %s::timestamptz - %s::interval
+              and measured_at < %s::timestamptz
+            """,
+            (range_end, window, range_end),
+        )
+        cursor.fetchone()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def main() -> None:
+    repo_root = Path(__file__).resolve().parents[2]
+    load_dotenv(repo_root / ".env")
+    args = _parse_args()
+
+    with get_connection() as connection:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            row_count = _seed(cursor, args.years, args.meters)
+            print(f"Seeded {row_count} rows into {BENCH_SCHEMA}.electricity_raw")
+            # Force index usage so the comparison measures the index, not the planner's choice.
+            cursor.execute("set enable_seqscan = off")
+
+            for kind in ("btree", "brin"):
+                index_name, index_bytes = _create_index(cursor, kind)
+                print(f"\n{kind}: index size {index_bytes / 1024:.1f} KiB")
+                for label, window in RANGE_WINDOWS.items():
+                    median_ms = _time_range_scan(cursor, window, args.repeats)
+                    print(f"  range scan {label:>8}: median {median_ms:.2f} ms")
+                cursor.execute(f"drop index {BENCH_SCHEMA}.{index_name}")
+
+            if not args.keep:
+                cursor.execute(f"drop schema {BENCH_SCHEMA} cascade")
+
+
+if __name__ == "__main__":
+    main()
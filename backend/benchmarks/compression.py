@@ -0,0 +1,195 @@
+"""Measure the CPU and latency trade-off of response compression.
+
+Part one compresses representative dashboard bodies (multi-year daily rows, their
+columnar layout and a year of hourly points) with each gzip level and, when brotli is
+installed, each brotli quality, reporting size, compression and decompression time.
+Part two serves one cached body through CompressionMiddleware three ways: uncompressed,
+compressed on every request, and precompressed once in the cache entry, which is
+what the dashboard endpoints do. This one needs no database.
+
+    .venv/bin/python -m benchmarks.compression --years 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+import statistics
+import time
+import timeit
+import zlib
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.compression import CompressionMiddleware, CompressionSettings, brotli, compress
+from app.dashboard.cache import CachedResponse, strong_etag
+from app.dashboard.formats import SeriesStream, encode_json_columns, encode_json_rows
+from app.dashboard.series import METRIC_COLUMNS
+
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 6, 9, 11)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark gzip and brotli on dashboard response bodies")
+    parser.add_argument("--years", type=int, default=5, help="Years of daily rows in the daily bodies")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per codec setting")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per serving mode")
+    return parser.parse_args()
+
+
+def _daily_stream(years: int) -> SeriesStream:
+    start = date(2026, 1, 1) - timedelta(days=365 * years)
+    rows = [
+        (
+            start + timedelta(days=index),
+            *(round(10 + (index * 7 + column * 13) % 23 * 0.731, 2) for column in range(len(METRIC_COLUMNS))),
+        )
+        for index in range(365 * years)
+    ]
+    return SeriesStream(
+        meta={"from": rows[0][0].isoformat(), "to": rows[-1][0].isoformat(), "data_version": 1},
+        rows_key="rows",
+        columns=("day", *METRIC_COLUMNS),
+        batches=[rows],
+    )
+
+
+def _hourly_body() -> bytes:
+    start = datetime(2025, 1, 1)
+    rows = [
+        (start + timedelta(hours=index), round(0.25 + (index % 17) * 0.113, 3), round(-3.5 + (index % 11) * 0.7, 1))
+        for index in range(24 * 365)
+    ]
+    stream = SeriesStream(
+        meta={"resolution": "hour"}, rows_key="points", columns=("bucket_start", "kwh", "temperature_c"), batches=[rows]
+    )
+    return b"".join(encode_json_rows(stream))
+
+
+def build_bodies(years: int) -> dict[str, bytes]:
+    return {
+        f"daily {years}y json": b"".join(encode_json_rows(_daily_stream(years))),
+        f"daily {years}y columnar": b"".join(encode_json_columns(_daily_stream(years))),
+        "hourly 1y json": _hourly_body(),
+    }
+
+
+def _settings() -> list[tuple[str, str, CompressionSettings]]:
+    settings = [(f"gzip -{level}", "gzip", CompressionSettings(gzip_level=level)) for level in GZIP_LEVELS]
+    if brotli is not None:
+        settings += [(f"br q{quality}", "br", CompressionSettings(brotli_quality=quality)) for quality in BROTLI_QUALITIES]
+    return settings
+
+
+def _decompress(encoding: str) -> Callable[[bytes], bytes]:
+    return brotli.decompress if encoding == "br" else lambda body: zlib.decompress(body, 31)
+
+
+def _best_ms(function: Callable[[], object], repeats: int) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeats)) * 1000
+
+
+def measure_codecs(bodies: dict[str, bytes], repeats: int) -> None:
+    for name, body in bodies.items():
+        print(f"\n{name}: {len(body) / 1024:.1f} KiB")
+        print(f"  {'setting':<10} {'size KiB':>9} {'ratio':>6} {'compress ms':>12} {'decompress ms':>14}")
+        for label, encoding, settings in _settings():
+            compressed = compress(body, encoding, settings)
+            compress_ms = _best_ms(lambda: compress(body, encoding, settings), repeats)
+            decompress = _decompress(encoding)
+            decompress_ms = _best_ms(lambda: decompress(compressed), repeats)
+            print(
+                f"  {label:<10} {len(compressed) / 1024:>9.1f} {len(body) / len(compressed):>6.1f}"
+                f" {compress_ms:>12.2f} {decompress_ms:>14.2f}"
+            )
+
+
+def _serving_app(body: bytes, settings: CompressionSettings) -> CompressionMiddleware:
+    cached = CachedResponse(body=body, etag=strong_etag(body), data_version=1)
+
+    def on_the_fly(_: Request) -> Response:
+        return Response(cached.body, media_type=cached.media_type)
+
+    def precompressed(request: Request) -> Response:
+        encoding = request.headers.get("x-encoding")
+        if encoding is None:
+            return Response(cached.body, media_type=cached.media_type)
+        return Response(
+            cached.encoded_body(encoding, settings), media_type=cached.media_type, headers={"Content-Encoding": encoding}
+        )
+
+    routes = [Route("/on-the-fly", on_the_fly), Route("/precompressed", precompressed)]
+    return CompressionMiddleware(Starlette(routes=routes), settings=settings)
+
+
+async def _request(app: CompressionMiddleware, path: str, accept_encoding: str | None) -> int:
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    if accept_encoding:
+        headers.append((b"x-encoding", accept_encoding.encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "server": ("bench", 80),
+        "client": ("bench", 1),
+    }
+    sent = 0
+
+    async def receive() -> dict[str, object]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict[str, object]) -> None:
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return sent
+
+
+async def measure_serving(body: bytes, requests: int) -> None:
+    settings = CompressionSettings()
+    app = _serving_app(body, settings)
+    modes = [("identity", "/precompressed", None)]
+    for encoding in settings.encodings:
+        modes += [(f"{encoding} per request", "/on-the-fly", encoding), (f"{encoding} precompressed", "/precompressed", encoding)]
+
+    print(f"\nServing a cached {len(body) / 1024:.1f} KiB body ({requests} requests each)")
+    print(f"  {'mode':<20} {'bytes sent':>11} {'median ms':>10} {'p95 ms':>8}")
+    for label, path, encoding in modes:
+        sent = await _request(app, path, encoding)
+        durations: list[float] = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            await _request(app, path, encoding)
+            durations.append((time.perf_counter() - started) * 1000)
+        durations.sort()
+        p95 = durations[int(len(durations) * 0.95) - 1]
+        print(f"  {label:<20} {sent:>11} {statistics.median(durations):>10.3f} {p95:>8.3f}")
+
+
+def main() -> None:
+    args = _parse_args()
+    bodies = build_bodies(args.years)
+    if brotli is None:
+        print("brotli is not installed (uv sync --extra compression); measuring gzip only")
+    measure_codecs(bodies, args.repeats)
+    asyncio.run(measure_serving(next(iter(bodies.values())), args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measure the JSON codec on a 1000-row HS Veitur UsageData page.
+
+Compares stdlib json with the fast backend (when installed) for the two hot paths:
+decoding the provider response body and encoding every row's source_payload.
+
+    .venv/bin/python -m benchmarks.json_codec
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import json
+import timeit
+
+from app.json_codec import STDLIB_CODEC, JsonCodec, select_codec
+
+
+ROWS_PER_PAGE = 1000
+
+
+def build_usage_page(row_count: int = ROWS_PER_PAGE) -> bytes:
+    start = datetime(2026, 1, 1)
+    usage_rows = [
+        {
+            "date": (start + timedelta(hours=index)).strftime("%Y-%m-%d %H:%M:%S"),
+            "meter_id": "12345678",
+            "delivery_point_name": "Hvassaberg 10",
+            "delta_value": round(0.25 + (index % 17) * 0.113, 3),
+            "index_value": round(41000 + index * 0.61, 3),
+            "temperature": round(-3.5 + (index % 11) * 0.7, 1),
+            "unitcode": "kWh",
+            "type_data": "Rafmagn",
+        }
+        for index in range(row_count)
+    ]
+    page = {
+        "Info": {"TotalNoRows": row_count, "NextPage": "None", "Page": 1},
+        "UsageData": usage_rows,
+    }
+    return json.dumps(page).encode("utf-8")
+
+
+def _measure(codec: JsonCodec, body: bytes, repeats: int) -> tuple[float, float]:
+    rows = codec.loads(body)["UsageData"]
+    decode_seconds = min(timeit.repeat(lambda: codec.loads(body), number=repeats, repeat=5)) / repeats
+    encode_seconds = min(
+        timeit.repeat(lambda: [codec.dumps(row) for row in rows], number=repeats, repeat=5)
+    ) / repeats
+    return decode_seconds * 1000, encode_seconds * 1000
+
+
+def _legacy_encode_ms(body: bytes, repeats: int) -> float:
+    rows = json.loads(body)["UsageData"]
+    seconds = min(timeit.repeat(lambda: [json.dumps(row) for row in rows], number=repeats, repeat=5)) / repeats
+    return seconds * 1000
+
+
+def main() -> None:
+    body = build_usage_page()
+    repeats = 50
+    print(f"HS Veitur page: {ROWS_PER_PAGE} rows, {len(body) / 1024:.1f} KiB")
+    print(f"  legacy json.dumps(row) -> str : encode {_legacy_encode_ms(body, repeats):.2f} ms")
+
+    codecs = [STDLIB_CODEC]
+    fast_codec = select_codec("auto")
+    if fast_codec.name != STDLIB_CODEC.name:
+        codecs.append(fast_codec)
+    else:
+        print("  (orjson not installed; install the 'fast' extra to compare)")
+
+    for codec in codecs:
+        decode_ms, encode_ms = _measure(codec, body, repeats)
+        print(f"  {codec.name:<7} decode page {decode_ms:.2f} ms, encode rows -> bytes {encode_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Microbenchmark: columnar row batches vs the previous dict-per-row ingest path.
+
+Times and measures peak allocations for turning provider rows into write-ready
+parameters. The database round trip is left out so only the Python side is compared.
+
+    .venv/bin/python -m benchmarks.row_batches --rows 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, UTC
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from app.ingest.batches import ElectricityBatch, HotWaterBatch
+from app.ingest.parsing import parse_timestamp, to_float
+from app.ingest.run_backfill import _normalize_veitur_history_rows
+
+
+def _usage_rows(row_count: int) -> list[dict[str, Any]]:
+    start = datetime(2020, 1, 1)
+    return [
+        {
+            "date": (start + timedelta(hours=index)).strftime("%Y-%m-%d %H:%M:%S"),
+            "meter_id": "12345678",
+            "delivery_point_name": "Hvassaberg 10",
+            "delta_value": 0.25 + (index % 17) * 0.113,
+            "index_value": 41000 + index * 0.61,
+            "temperature": -3.5 + (index % 11) * 0.7,
+            "unitcode": "kWh",
+            "type_data": "Rafmagn",
+        }
+        for index in range(row_count)
+    ]
+
+
+def _reading_rows(row_count: int) -> list[dict[str, Any]]:
+    start = datetime(2000, 1, 1)
+    return [
+        {
+            "readingDate": (start + timedelta(days=index)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "readingValue": 100 + index * 0.4,
+            "usage": 0 if index % 3 else 0.4,
+            "readingDays": 1,
+            "dailyEstimation": 0.4,
+        }
+        for index in range(row_count)
+    ]
+
+
+def _dict_path_electricity(usage_rows: list[dict[str, Any]]) -> list[tuple[Any, ...]]:
+    # Equivalent of the former upsert_electricity_row parameter building, one tuple per row.
+    return [
+        (
+            str(row.get("meter_id") or "unknown"),
+            row.get("delivery_point_name"),
+            parse_timestamp(row.get("date")),
+            row.get("delta_value"),
+            row.get("index_value"),
+            row.get("temperature"),
+            row.get("unitcode"),
+            row.get("type_data") or row.get("type"),
+            row,
+        )
+        for row in usage_rows
+    ]
+
+
+def _dict_path_hot_water(reading_rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Equivalent of the former two-dicts-per-reading normalizer.
+    prepared_rows = [
+        {
+            "row": row,
+            "measured_at": parse_timestamp(row.get("readingDate")),
+            "usage": to_float(row.get("usage")),
+            "reading_value": to_float(row.get("readingValue")),
+            "daily_estimation": to_float(row.get("dailyEstimation")),
+            "interval_days": int(row.get("readingDays") or 0),
+        }
+        for row in reading_rows
+    ]
+    prepared_rows.sort(key=lambda item: item["measured_at"])
+
+    normalized_rows: list[dict[str, Any]] = []
+    previous: tuple[datetime, float] | None = None
+    for item in prepared_rows:
+        usage_value = item["usage"]
+        interval_days = item["interval_days"]
+        interval_start_at = item["measured_at"] - timedelta(days=interval_days)
+        if (usage_value is None or usage_value <= 0) and previous and item["reading_value"] is not None:
+            delta = item["reading_value"] - previous[1]
+            delta_days = (item["measured_at"].date() - previous[0].date()).days
+            if delta > 0 and delta_days > 0:
+                usage_value = round(delta, 5)
+                interval_days = delta_days
+                interval_start_at = previous[0]
+        normalized_rows.append(
+            {
+                "row": item["row"],
+                "measured_at": item["measured_at"],
+                "period_usage_value": usage_value,
+                "interval_start_at": interval_start_at,
+                "interval_end_at": item["measured_at"],
+                "interval_days": interval_days,
+                "daily_estimation": item["daily_estimation"],
+                "reading_value": item["reading_value"],
+            }
+        )
+        if item["reading_value"] is not None:
+            previous = (item["measured_at"], item["reading_value"])
+    return normalized_rows
+
+
+def _batch_path_electricity(usage_rows: list[dict[str, Any]]) -> ElectricityBatch:
+    return ElectricityBatch.from_usage_rows(usage_rows).prepared_for_write()
+
+
+def _batch_path_hot_water(reading_rows: list[dict[str, Any]]) -> HotWaterBatch:
+    batch, _ = _normalize_veitur_history_rows(HotWaterBatch.from_reading_history(reading_rows))
+    return batch.prepared_for_write()
+
+
+def _measure(label: str, func: Callable[[Any], Any], rows: list[dict[str, Any]]) -> None:
+    started = time.perf_counter()
+    func(rows)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    tracemalloc.start()
+    result = func(rows)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    print(f"  {label:<22} {elapsed_ms:8.1f} ms  peak {peak_bytes / 1024 / 1024:7.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare columnar row batches with dict-per-row ingest")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    usage_rows = _usage_rows(args.rows)
+    reading_rows = _reading_rows(args.rows)
+    print(f"{args.rows} rows per source ({datetime.now(UTC):%Y-%m-%d %H:%M} UTC)")
+
+    print("electricity (HS Veitur)")
+    _measure("dict per row", _dict_path_electricity, usage_rows)
+    _measure("ElectricityBatch", _batch_path_electricity, usage_rows)
+
+    print("hot water (Veitur reading-history)")
+    _measure("two dicts per reading", _dict_path_hot_water, reading_rows)
+    _measure("HotWaterBatch", _batch_path_hot_water, reading_rows)
+
+
+if __name__ == "__main__":
+    main()
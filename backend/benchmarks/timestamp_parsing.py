@@ -0,0 +1,58 @@
+"""Microbenchmark: per-value vs column timestamp and float parsing.
+
+Covers the string formats each provider sends. No database needed.
+
+    .venv/bin/python -m benchmarks.timestamp_parsing --rows 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+import time
+from typing import Any, Callable
+
+from app.ingest.parsing import parse_float_column, parse_timestamp, parse_timestamp_column, to_float
+
+
+PROVIDER_FORMATS = {
+    "HS Veitur date": "%Y-%m-%d %H:%M:%S",
+    "Veitur readingDate": "%Y-%m-%dT%H:%M:%S",
+    "Zaptec StartDateTime": "%Y-%m-%dT%H:%M:%S.000Z",
+    "Open-Meteo time": "%Y-%m-%dT%H:%M",
+}
+
+
+def _best_of(repeats: int, func: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-value and column parsing of provider values")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    start = datetime(2020, 1, 1)
+    moments = [start + timedelta(hours=index) for index in range(args.rows)]
+    print(f"{args.rows} values, best of {args.repeats}")
+
+    for label, fmt in PROVIDER_FORMATS.items():
+        texts = [moment.strftime(fmt) for moment in moments]
+        per_value_ms = _best_of(args.repeats, lambda: [parse_timestamp(text) for text in texts])
+        column_ms = _best_of(args.repeats, lambda: parse_timestamp_column(texts))
+        print(f"  {label:<22} per value {per_value_ms:7.1f} ms  column {column_ms:7.1f} ms")
+
+    numbers = [0.25 + (index % 17) * 0.113 if index % 5 else index for index in range(args.rows)]
+    per_value_ms = _best_of(args.repeats, lambda: [to_float(number) for number in numbers])
+    column_ms = _best_of(args.repeats, lambda: parse_float_column(numbers))
+    print(f"  {'floats (int/float mix)':<22} per value {per_value_ms:7.1f} ms  column {column_ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
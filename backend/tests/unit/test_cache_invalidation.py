@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.dashboard.cache import DashboardCache
+from app.dashboard.invalidation import DataChangeListener, apply_data_change, parse_data_changed
+
+
+def test_payload_carries_run_id_and_touched_days() -> None:
+    assert parse_data_changed('{"run_id": 12, "from": "2026-02-01", "to": "2026-02-03"}') == (
+        12,
+        (date(2026, 2, 1), date(2026, 2, 3)),
+    )
+    assert parse_data_changed('{"run_id": 13, "from": null, "to": null}') == (13, None)
+
+
+def test_malformed_payload_drops_every_entry() -> None:
+    cache = DashboardCache()
+    version = cache.data_version(lambda: 1)
+    cache.get_or_build("january", version, lambda: {}, (date(2026, 1, 1), date(2026, 1, 31)))
+
+    DataChangeListener(cache).handle("not json")
+
+    assert len(cache) == 0
+
+
+def test_notification_without_days_keeps_dated_entries() -> None:
+    cache = DashboardCache()
+    version = cache.data_version(lambda: 1)
+    cache.get_or_build("january", version, lambda: {}, (date(2026, 1, 1), date(2026, 1, 31)))
+    cache.get_or_build("bundle", version, lambda: {})
+
+    DataChangeListener(cache).handle('{"run_id": 2, "from": null, "to": null}')
+
+    assert len(cache) == 1
+
+
+def test_daily_store_is_updated_before_entries_are_evicted() -> None:
+    cache = DashboardCache()
+    version = cache.data_version(lambda: 1)
+    cache.get_or_build("bundle", version, lambda: {})
+    seen: list[tuple[object, int]] = []
+
+    class Store:
+        def apply_change(self, touched_days: object) -> None:
+            seen.append((touched_days, len(cache)))
+
+    apply_data_change(cache, Store(), 2, (date(2026, 2, 1), date(2026, 2, 1)))  # type: ignore[arg-type]
+
+    assert seen == [((date(2026, 2, 1), date(2026, 2, 1)), 1)]
+    assert len(cache) == 0
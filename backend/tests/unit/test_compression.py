@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+import gzip
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from app.compression import CompressionMiddleware, CompressionSettings, choose_encoding, compress
+from app.dashboard.cache import CachedResponse, encoded_etag, etag_matches, strong_etag
+
+
+GZIP_ONLY = CompressionSettings(minimum_size=100, brotli_enabled=False)
+BODY = b'{"rows":[' + b",".join(b'{"day":"2026-01-%02d","kwh":12.5}' % day for day in range(1, 29)) + b"]}"
+
+
+def test_choose_encoding_honours_quality_values() -> None:
+    assert choose_encoding("gzip, deflate", GZIP_ONLY) == "gzip"
+    assert choose_encoding("*", GZIP_ONLY) == "gzip"
+    assert choose_encoding("gzip;q=0, identity", GZIP_ONLY) is None
+    assert choose_encoding("br", GZIP_ONLY) is None
+    assert choose_encoding(None, GZIP_ONLY) is None
+
+
+def test_brotli_is_preferred_when_installed() -> None:
+    brotli = pytest.importorskip("brotli")
+    settings = CompressionSettings(minimum_size=100)
+
+    assert choose_encoding("gzip, deflate, br", settings) == "br"
+    assert choose_encoding("gzip, br;q=0.5", settings) == "gzip"
+    assert brotli.decompress(compress(BODY, "br", settings)) == BODY
+
+
+def test_cached_variants_are_compressed_once() -> None:
+    cached = CachedResponse(body=BODY, etag=strong_etag(BODY), data_version=7)
+
+    first = cached.encoded_body("gzip", GZIP_ONLY)
+
+    assert gzip.decompress(first) == BODY
+    assert cached.encoded_body("gzip", GZIP_ONLY) is first
+
+
+def test_compressed_variants_have_their_own_etag_and_still_revalidate() -> None:
+    etag = strong_etag(BODY)
+    gzip_etag = encoded_etag(etag, "gzip")
+
+    assert gzip_etag != etag and encoded_etag(etag, None) == etag
+    assert etag_matches(gzip_etag, etag)
+    assert etag_matches(f'W/{encoded_etag(etag, "br")}', etag)
+    assert not etag_matches(encoded_etag(strong_etag(b"{}"), "gzip"), etag)
+
+
+def _app() -> CompressionMiddleware:
+    def chunks() -> Iterator[bytes]:
+        for _ in range(4):
+            yield BODY
+
+    routes = [
+        Route("/large", lambda _: Response(BODY, media_type="application/json")),
+        Route("/small", lambda _: Response(b'{"ok":true}', media_type="application/json")),
+        Route("/stream", lambda _: StreamingResponse(chunks(), media_type="application/json")),
+        Route("/events", lambda _: StreamingResponse(chunks(), media_type="text/event-stream")),
+        Route(
+            "/encoded",
+            lambda _: Response(gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"}),
+        ),
+    ]
+    return CompressionMiddleware(Starlette(routes=routes), settings=GZIP_ONLY)
+
+
+@pytest.mark.asyncio
+async def test_middleware_compresses_large_and_streamed_bodies_only() -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=_app()), base_url="http://api.test") as client:
+        large = await client.get("/large", headers={"Accept-Encoding": "gzip"})
+        small = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        stream = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        events = await client.get("/events", headers={"Accept-Encoding": "gzip"})
+        encoded = await client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+        identity = await client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert large.headers["content-encoding"] == "gzip" and large.content == BODY
+    assert int(large.headers["content-length"]) < len(BODY)
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in small.headers
+    assert stream.headers["content-encoding"] == "gzip" and stream.content == BODY * 4
+    assert "content-encoding" not in events.headers and events.content == BODY * 4
+    # Already encoded upstream, so not compressed twice.
+    assert encoded.content == BODY
+    assert "content-encoding" not in identity.headers and identity.content == BODY
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.dashboard.daily_store import DailyStore  # noqa: E402
+
+
+class FakeRollups:
+    """Day rollup rows keyed by day, served through the connection protocol the store uses."""
+
+    def __init__(self, rows: dict[date, tuple[float | None, ...]]) -> None:
+        self.rows = rows
+        self.queries: list[tuple[date | None, date | None]] = []
+
+    def __call__(self) -> FakeRollups:
+        return self
+
+    def __enter__(self) -> FakeRollups:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def cursor(self) -> FakeRollups:
+        return self
+
+    def execute(self, _sql: str, params: dict[str, Any]) -> None:
+        self.queries.append((params["from"], params["to"]))
+        self._result = [
+            (day, *values)
+            for day, values in sorted(self.rows.items())
+            if (params["from"] is None or day >= params["from"]) and (params["to"] is None or day <= params["to"])
+        ]
+
+    def fetchall(self) -> list[tuple[Any, ...]]:
+        return self._result
+
+
+def _metrics(brutto: float | None, temperature: float | None = 1.0) -> tuple[float | None, ...]:
+    return (brutto, 0.0, brutto, 0.1, temperature)
+
+
+def _store(rows: dict[date, tuple[float | None, ...]]) -> tuple[DailyStore, FakeRollups]:
+    rollups = FakeRollups(rows)
+    store = DailyStore(connect=rollups)
+    store.load()
+    return store, rollups
+
+
+def test_daily_batches_skip_days_without_rows_and_keep_nulls() -> None:
+    store, _ = _store({date(2026, 1, 1): _metrics(1.0), date(2026, 1, 3): _metrics(3.0, temperature=None)})
+
+    rows = [row for batch in store.daily_batches(date(2025, 12, 1), date(2026, 1, 31)) for row in batch]
+
+    assert rows == [(date(2026, 1, 1), 1.0, 0.0, 1.0, 0.1, 1.0), (date(2026, 1, 3), 3.0, 0.0, 3.0, 0.1, None)]
+
+
+def test_sum_and_mean_ignore_missing_days() -> None:
+    store, _ = _store({date(2026, 1, 1): _metrics(1.0), date(2026, 1, 3): _metrics(3.0)})
+
+    assert store.sum("brutto_kwh", date(2026, 1, 1), date(2026, 1, 3)) == 4.0
+    assert store.mean("brutto_kwh", date(2026, 1, 1), date(2026, 1, 3)) == 2.0
+    assert store.mean("brutto_kwh", date(2027, 1, 1), date(2027, 1, 3)) is None
+
+
+def test_changes_reread_only_the_touched_days_and_extend_the_arrays() -> None:
+    store, rollups = _store({date(2026, 1, 1): _metrics(1.0), date(2026, 1, 2): _metrics(2.0)})
+    rollups.rows[date(2026, 1, 2)] = _metrics(20.0)
+    rollups.rows[date(2026, 1, 5)] = _metrics(5.0)
+    rollups.rows[date(2025, 12, 30)] = _metrics(0.5)
+    del rollups.rows[date(2026, 1, 1)]
+
+    store.apply_change((date(2025, 12, 30), date(2026, 1, 5)))
+
+    assert rollups.queries[-1] == (date(2025, 12, 30), date(2026, 1, 5))
+    days = [row[0] for batch in store.daily_batches(date(2025, 1, 1), date(2026, 12, 31)) for row in batch]
+    assert days == [date(2025, 12, 30), date(2026, 1, 2), date(2026, 1, 5)]
+    assert store.sum("brutto_kwh", date(2025, 1, 1), date(2026, 12, 31)) == 25.5
+
+
+def test_rolling_comparison_counts_preceding_rows_and_pairs_the_previous_period() -> None:
+    start = date(2026, 1, 1)
+    store, _ = _store({start + timedelta(days=offset): _metrics(float(offset)) for offset in range(20)})
+
+    result = store.rolling_comparison(date(2026, 1, 11), date(2026, 1, 15), "brutto_kwh", window=3, min_points=3)
+
+    assert result["series"][0] == {"day": "2026-01-11", "value": 10.0, "rolling_average": 8.0, "previous_value": 5.0}
+    assert result["totals"] == {
+        "current": 60.0,
+        "previous": 35.0,
+        "previous_from": "2026-01-06",
+        "previous_to": "2026-01-10",
+        "delta_percent": 71.4,
+    }
+
+
+def test_store_is_only_live_once_marked_by_the_listener() -> None:
+    store, _ = _store({})
+
+    assert not store.live
+    store.set_live(True)
+    assert store.live
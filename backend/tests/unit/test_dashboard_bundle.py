@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from datetime import date, datetime, UTC
+from typing import Any
+
+import pytest
+
+from app.dashboard import kpi_snapshots
+from app.dashboard.bundle import fetch_dashboard_bundle
+from app.dashboard.kpi_snapshots import SNAPSHOT_COLUMNS
+
+
+TODAY = date(2026, 3, 14)
+
+# A snapshot as Postgres returns it from row_to_json: dates as ISO strings, numerics as numbers.
+STORED_SNAPSHOT: dict[str, Any] = {
+    "preset": "thisMonth",
+    "as_of": "2026-03-14",
+    "run_id": 7,
+    "range_start": "2026-03-01",
+    "range_end": "2026-03-14",
+    "compare_start": "2026-02-01",
+    "compare_end": "2026-02-14",
+    "rolling_start": "2025-12-01",
+    "day_count": 14,
+    "brutto_kwh": 320.5,
+    "netto_kwh": 250.0,
+    "ev_kwh": 70.5,
+    "hot_water_usage": 12.25,
+    "latest_temperature_c": 2.5,
+    "latest_temperature_day": "2026-03-14",
+    "previous_brutto_kwh": 300.0,
+    "previous_netto_kwh": 240.0,
+    "previous_ev_kwh": 60.0,
+    "previous_hot_water_usage": 11.0,
+    "brutto_delta_percent": 6.8,
+    "netto_delta_percent": 4.2,
+    "ev_delta_percent": 17.5,
+    "hot_water_delta_percent": 11.4,
+    "rolling_average_kwh": 22.1,
+    "rolling_series": [{"day": "2026-03-14", "average_kwh": 22.1}],
+    "computed_at": "2026-03-14T06:00:00+00:00",
+}
+DAILY = [
+    {
+        "day": "2026-03-14",
+        "brutto_kwh": 22.5,
+        "ev_kwh": 5.0,
+        "netto_kwh": 17.5,
+        "hot_water_usage": 0.9,
+        "avg_temperature_c": 2.5,
+    }
+]
+SOURCE_STATUS = [
+    {"source_name": "weather", "checked_at": "2026-03-14T06:00:00+00:00", "status": "success", "message": None}
+]
+
+
+class _FakeCursor:
+    def __init__(self, connection: _FakeConnection) -> None:
+        self._connection = connection
+
+    def __enter__(self) -> _FakeCursor:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def execute(self, sql: str, params: object = None) -> None:
+        self._connection.statements.append((" ".join(sql.split()), params))
+
+    def fetchone(self) -> Any:
+        return self._connection.rows.pop(0)
+
+
+class _FakeConnection:
+    def __init__(self, rows: list[Any]) -> None:
+        self.rows = rows
+        self.statements: list[tuple[str, object]] = []
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self)
+
+    def commit(self) -> None:
+        return None
+
+
+def _bundle_row(snapshot: dict[str, Any] | None) -> tuple[dict[str, Any]]:
+    return ({"daily": DAILY, "source_status": SOURCE_STATUS, "ingestion_runs": [], "kpi_snapshot": snapshot},)
+
+
+def _assert_frontend_shape(bundle: dict[str, Any]) -> None:
+    # The keys mapBundle in frontend/src/data/dashboardAdapter.ts reads.
+    assert bundle["daily"] == DAILY
+    assert bundle["source_status"] == SOURCE_STATUS
+    assert bundle["ingestion_runs"] == []
+    assert "kpi_snapshot" not in bundle
+    kpis = bundle["kpis"]
+    assert kpis["range"] == {
+        "start": "2026-03-01",
+        "end": "2026-03-14",
+        "compare_start": "2026-02-01",
+        "compare_end": "2026-02-14",
+        "rolling_start": "2025-12-01",
+    }
+    assert kpis["rolling_series"] == [{"day": "2026-03-14", "average_kwh": 22.1}]
+    assert [(card["key"], card["value"], card["delta_percent"]) for card in kpis["kpis"]] == [
+        ("brutto", 320.5, 6.8),
+        ("netto", 250.0, 4.2),
+        ("ev", 70.5, 17.5),
+        ("hot_water", 12.25, 11.4),
+        ("weather", 2.5, None),
+    ]
+    assert kpis["kpis"][-1]["as_of_day"] == "2026-03-14"
+    assert all({"key", "label", "value", "unit", "delta_percent"} <= card.keys() for card in kpis["kpis"])
+
+
+def test_bundle_uses_the_stored_snapshot_in_one_round_trip() -> None:
+    connection = _FakeConnection([_bundle_row(STORED_SNAPSHOT)])
+
+    bundle = fetch_dashboard_bundle(connection, "thisMonth", TODAY)
+
+    assert (bundle["preset"], bundle["as_of"]) == ("thisMonth", "2026-03-14")
+    _assert_frontend_shape(bundle)
+    [(_, params)] = connection.statements
+    assert params["preset"] == "thisMonth" and params["today"] == TODAY
+    assert (params["from"], params["to"]) == (date(2026, 3, 1), TODAY)
+
+
+def test_bundle_computes_a_missing_snapshot_without_storing_it(monkeypatch: pytest.MonkeyPatch) -> None:
+    computed: list[tuple[str, date]] = []
+
+    def fake_compute(_: object, preset: str, today: date, run_id: int | None = None) -> dict[str, Any]:
+        computed.append((preset, today))
+        # compute_kpi_snapshot returns Python dates and numbers, which must be serialized like a stored row.
+        return {
+            column: date.fromisoformat(value) if column.endswith(("_start", "_end", "as_of")) else value
+            for column, value in STORED_SNAPSHOT.items()
+            if column in SNAPSHOT_COLUMNS
+        }
+
+    monkeypatch.setattr(kpi_snapshots, "compute_kpi_snapshot", fake_compute)
+    connection = _FakeConnection([_bundle_row(None)])
+
+    bundle = fetch_dashboard_bundle(connection, "thisMonth", TODAY)
+
+    assert computed == [("thisMonth", TODAY)]
+    # One round trip for the bundle and no write: a read-only role can serve a cold read.
+    assert len(connection.statements) == 1
+    _assert_frontend_shape(bundle)
+    assert datetime.fromisoformat(bundle["kpis"]["computed_at"]).tzinfo is not None
+
+
+def test_kpi_read_miss_computes_without_writing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        kpi_snapshots,
+        "compute_kpi_snapshot",
+        lambda *_: {column: STORED_SNAPSHOT[column] for column in SNAPSHOT_COLUMNS},
+    )
+    connection = _FakeConnection([None])
+
+    snapshot = kpi_snapshots.get_kpi_snapshot(connection, "thisMonth", TODAY)
+
+    [(sql, params)] = connection.statements
+    assert sql.startswith("select") and params == ("thisMonth", TODAY)
+    assert snapshot["brutto_kwh"] == 320.5 and snapshot["range_start"] == "2026-03-01"
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.dashboard.cache import DashboardCache, etag_matches, strong_etag
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_are_reused_until_the_data_version_changes() -> None:
+    clock = FakeClock()
+    cache = DashboardCache(version_ttl_seconds=30, clock=clock)
+    builds: list[int] = []
+    versions = iter([7, 8])
+
+    def build() -> dict[str, int]:
+        builds.append(1)
+        return {"rows": len(builds)}
+
+    version = cache.data_version(lambda: next(versions))
+    first = cache.get_or_build(("daily", "2026-01"), version, build)
+    second = cache.get_or_build(("daily", "2026-01"), cache.data_version(lambda: 99), build)
+
+    assert second is first and len(builds) == 1
+
+    clock.now = 31
+    version = cache.data_version(lambda: next(versions))
+    third = cache.get_or_build(("daily", "2026-01"), version, build)
+
+    assert version == 8
+    assert third.etag != first.etag and len(builds) == 2
+
+
+def test_finalized_run_invalidates_without_a_database_round_trip() -> None:
+    cache = DashboardCache(clock=FakeClock())
+    version = cache.data_version(lambda: 7)
+    cache.get_or_build("key", version, lambda: {"a": 1})
+
+    cache.invalidate(8)
+
+    assert len(cache) == 0
+    assert cache.data_version(lambda: 1 / 0) == 8
+
+
+def test_builds_for_a_superseded_version_are_not_stored() -> None:
+    cache = DashboardCache(clock=FakeClock())
+    version = cache.data_version(lambda: 7)
+    cache.invalidate(8)
+
+    cache.get_or_build("key", version, lambda: {"a": 1})
+
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted() -> None:
+    cache = DashboardCache(max_entries=2, clock=FakeClock())
+    version = cache.data_version(lambda: 1)
+    for key in ("a", "b"):
+        cache.get_or_build(key, version, lambda: {})
+    cache.get_or_build("a", version, lambda: {})
+    cache.get_or_build("c", version, lambda: {})
+
+    rebuilt: list[str] = []
+    cache.get_or_build("a", version, lambda: rebuilt.append("a") or {})
+    cache.get_or_build("b", version, lambda: rebuilt.append("b") or {})
+
+    assert rebuilt == ["b"]
+
+
+def test_data_changes_evict_only_overlapping_and_undated_entries() -> None:
+    cache = DashboardCache(clock=FakeClock())
+    version = cache.data_version(lambda: 7)
+    cache.get_or_build("january", version, lambda: {}, (date(2026, 1, 1), date(2026, 1, 31)))
+    cache.get_or_build("february", version, lambda: {}, (date(2026, 2, 1), date(2026, 2, 28)))
+    cache.get_or_build("kpis", version, lambda: {})
+
+    evicted = cache.evict(8, (date(2026, 2, 27), date(2026, 3, 1)))
+
+    rebuilt: list[str] = []
+    for key in ("january", "february", "kpis"):
+        cache.get_or_build(key, 8, lambda key=key: rebuilt.append(key) or {})
+    assert evicted == 2
+    assert rebuilt == ["february", "kpis"]
+    assert cache.data_version(lambda: 1 / 0) == 8
+
+
+def test_builds_that_straddle_an_eviction_are_not_stored() -> None:
+    cache = DashboardCache(clock=FakeClock())
+    version = cache.data_version(lambda: 7)
+
+    def build() -> dict[str, int]:
+        cache.evict(None, (date(2026, 1, 1), date(2026, 1, 1)))
+        return {}
+
+    cache.get_or_build("january", version, build, (date(2026, 1, 1), date(2026, 1, 31)))
+
+    assert len(cache) == 0
+
+
+def test_listening_cache_does_not_poll_the_version() -> None:
+    clock = FakeClock()
+    cache = DashboardCache(version_ttl_seconds=30, clock=clock)
+    cache.data_version(lambda: 7)
+    cache.set_listening(True)
+
+    clock.now = 3600
+
+    assert cache.data_version(lambda: 1 / 0) == 7
+
+
+def test_etag_matching() -> None:
+    etag = strong_etag(b'{"rows":[]}')
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
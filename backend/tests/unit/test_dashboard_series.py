@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.dashboard.series import choose_resolution, count_buckets, fetch_rolling_comparison
+
+
+def test_short_range_uses_hourly_buckets() -> None:
+    assert choose_resolution(date(2026, 2, 13), date(2026, 2, 14)) == "hour"
+
+
+def test_three_month_preset_uses_daily_buckets() -> None:
+    assert choose_resolution(date(2025, 11, 15), date(2026, 2, 14)) == "day"
+
+
+def test_five_year_range_uses_about_sixty_monthly_buckets() -> None:
+    assert choose_resolution(date(2021, 3, 1), date(2026, 2, 28)) == "month"
+    assert count_buckets(date(2021, 3, 1), date(2026, 2, 28), "month") == 60
+
+
+def test_week_buckets_count_partial_iso_weeks() -> None:
+    assert count_buckets(date(2026, 2, 1), date(2026, 2, 2), "week") == 2
+
+
+class _FakeCursor:
+    def __init__(self, results: list[object]) -> None:
+        self._results = results
+        self.params: list[dict[str, object]] = []
+
+    def __enter__(self) -> _FakeCursor:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def execute(self, _sql: str, params: dict[str, object]) -> None:
+        self.params.append(params)
+
+    def fetchall(self) -> object:
+        return self._results.pop(0)
+
+    def fetchone(self) -> object:
+        return self._results.pop(0)
+
+
+class _FakeConnection:
+    def __init__(self, cursor: _FakeCursor) -> None:
+        self._cursor = cursor
+
+    def cursor(self) -> _FakeCursor:
+        return self._cursor
+
+
+def test_rolling_comparison_pairs_each_day_with_the_previous_period() -> None:
+    cursor = _FakeCursor(
+        [
+            [(date(2026, 2, 1), Decimal("12.5"), Decimal("10.00"), Decimal("8")), (date(2026, 2, 2), None, None, None)],
+            (Decimal("25"), Decimal("20")),
+        ]
+    )
+
+    result = fetch_rolling_comparison(_FakeConnection(cursor), date(2026, 2, 1), date(2026, 2, 28))
+
+    assert cursor.params[0]["span"] == 28
+    assert result["series"][0] == {"day": "2026-02-01", "value": 12.5, "rolling_average": 10.0, "previous_value": 8.0}
+    assert result["series"][1]["rolling_average"] is None
+    assert result["totals"] == {
+        "current": 25.0,
+        "previous": 20.0,
+        "previous_from": "2026-01-04",
+        "previous_to": "2026-01-31",
+        "delta_percent": 25.0,
+    }
+
+
+def test_rolling_comparison_rejects_unknown_metrics() -> None:
+    with pytest.raises(ValueError):
+        fetch_rolling_comparison(_FakeConnection(_FakeCursor([])), date(2026, 2, 1), date(2026, 2, 2), metric="1; drop")
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import date
+import gzip
+
+import pytest
+
+from app.ingest import run_export
+from app.ingest.run_export import ExportRequest
+
+
+def test_requests_are_validated_before_any_query() -> None:
+    with pytest.raises(ValueError, match="source must be one of"):
+        ExportRequest("ingestion_runs", date(2026, 1, 1), date(2026, 1, 2)).validate()
+    with pytest.raises(ValueError, match="from date"):
+        ExportRequest("weather_raw", date(2026, 1, 2), date(2026, 1, 1)).validate()
+    with pytest.raises(ValueError, match="compressed internally"):
+        ExportRequest("weather_raw", date(2026, 1, 1), date(2026, 1, 2), format="parquet", gzip=True).validate()
+
+
+def test_parquet_is_refused_without_pyarrow(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run_export, "_load_parquet", lambda: None)
+
+    with pytest.raises(ValueError, match="pyarrow"):
+        ExportRequest("weather_raw", date(2026, 1, 1), date(2026, 1, 2), format="parquet").validate()
+
+
+def test_filename_and_media_type_follow_format_and_gzip() -> None:
+    plain = ExportRequest("dashboard_daily", date(2026, 1, 1), date(2026, 1, 31), format="ndjson")
+    packed = ExportRequest("dashboard_daily", date(2026, 1, 1), date(2026, 1, 31), gzip=True)
+
+    assert (plain.filename, plain.media_type) == ("dashboard_daily_2026-01-01_2026-01-31.ndjson", "application/x-ndjson")
+    assert (packed.filename, packed.media_type) == ("dashboard_daily_2026-01-01_2026-01-31.csv.gz", "application/gzip")
+
+
+def test_raw_tables_filter_on_local_days_and_views_on_day() -> None:
+    raw = run_export._select("ev_charger_raw", []).as_string(None)
+    view = run_export._select("weather_daily", []).as_string(None)
+
+    assert '"started_at" >= %(from)s::timestamp at time zone %(tz)s' in raw
+    assert 'from "energy"."ev_charger_raw"' in raw
+    assert '"day" >= %(from)s and "day" <= %(to)s' in view
+
+
+def test_chunks_are_coalesced_and_gzipped_as_one_stream(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run_export, "CHUNK_BYTES", 10)
+    chunks = list(run_export._coalesce(iter([b"day,kwh\n", b"2026-01-01,1\n", b"2026-01-02,2\n"])))
+
+    assert chunks == [b"day,kwh\n2026-01-01,1\n", b"2026-01-02,2\n"]
+    assert gzip.decompress(b"".join(run_export._gzip(iter(chunks)))) == b"".join(chunks)
+
+
+def test_chunk_sink_reports_absolute_offsets_after_draining() -> None:
+    sink = run_export._ChunkSink()
+    sink.write(b"PAR1")
+    assert sink.drain() == b"PAR1"
+    sink.write(b"row group")
+
+    assert sink.tell() == 13
+    assert sink.drain() == b"row group"
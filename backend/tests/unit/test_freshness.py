@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, UTC
+
+from app.ingest.freshness import FreshnessPolicy, SourceFreshness, load_freshness_policies, skip_reason
+
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=UTC)
+HSVEITUR = FreshnessPolicy("hsveitur", timedelta(minutes=60), publication_lag=timedelta(hours=24))
+
+
+def test_recent_successful_check_skips_source() -> None:
+    freshness = SourceFreshness(latest_data_at=None, last_success_at=NOW - timedelta(minutes=5))
+
+    assert skip_reason(HSVEITUR, freshness, NOW).startswith("Checked 5 min ago")
+
+
+def test_watermark_within_publication_lag_skips_source() -> None:
+    freshness = SourceFreshness(latest_data_at=NOW - timedelta(hours=24), last_success_at=NOW - timedelta(hours=3))
+
+    assert skip_reason(HSVEITUR, freshness, NOW) is not None
+
+
+def test_source_is_fetched_once_a_new_slot_can_exist() -> None:
+    freshness = SourceFreshness(latest_data_at=NOW - timedelta(hours=26), last_success_at=NOW - timedelta(hours=3))
+
+    assert skip_reason(HSVEITUR, freshness, NOW) is None
+    assert skip_reason(HSVEITUR, SourceFreshness(None, None), NOW) is None
+
+
+def test_policies_read_overrides_from_env(monkeypatch) -> None:
+    monkeypatch.setenv("FRESHNESS_HSVEITUR_PUBLICATION_LAG_HOURS", "off")
+    monkeypatch.setenv("FRESHNESS_ZAPTEC_MIN_CHECK_MINUTES", "0")
+
+    policies = load_freshness_policies()
+
+    assert policies["hsveitur"].publication_lag is None
+    assert policies["zaptec"].min_check_interval == timedelta(0)
+    assert policies["veitur"].publication_lag is None
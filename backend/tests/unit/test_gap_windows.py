@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.ingest.gaps import merge_gap_days
+
+
+def test_consecutive_missing_days_share_one_window() -> None:
+    missing_days = {date(2024, 1, 2): 24, date(2024, 1, 3): 5, date(2024, 1, 10): 1}
+
+    assert merge_gap_days(missing_days) == [
+        (date(2024, 1, 2), date(2024, 1, 3), 29),
+        (date(2024, 1, 10), date(2024, 1, 10), 1),
+    ]
+
+
+def test_bridge_days_join_windows_across_short_loaded_runs() -> None:
+    missing_days = {date(2024, 1, 1): 1, date(2024, 1, 3): 1, date(2024, 1, 6): 1}
+
+    assert merge_gap_days(missing_days, bridge_days=1) == [
+        (date(2024, 1, 1), date(2024, 1, 3), 2),
+        (date(2024, 1, 6), date(2024, 1, 6), 1),
+    ]
+    assert len(merge_gap_days(missing_days, bridge_days=2)) == 1
+
+
+def test_max_window_days_splits_long_windows() -> None:
+    missing_days = {date(2024, 1, day): 24 for day in range(1, 8)}
+
+    assert merge_gap_days(missing_days, max_window_days=3) == [
+        (date(2024, 1, 1), date(2024, 1, 3), 72),
+        (date(2024, 1, 4), date(2024, 1, 6), 72),
+        (date(2024, 1, 7), date(2024, 1, 7), 24),
+    ]
+
+
+def test_no_missing_days_means_no_windows() -> None:
+    assert merge_gap_days({}) == []
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.ingest.db import SourceWriteResult
+from app.ingest.locks import LockPolicy
+from app.ingest.run_backfill import ingest_with_source_lock
+from app.instrumentation import (
+    INGEST_METRICS,
+    IngestMetrics,
+    StageMetrics,
+    collect_stage_metrics,
+    stage,
+    sum_timing_details,
+    timed_request,
+)
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b'{"rows":[1,2,3]}')))
+
+
+@pytest.mark.asyncio
+async def test_requests_and_stages_are_recorded_inside_a_collection() -> None:
+    async with _client() as client:
+        with collect_stage_metrics() as metrics:
+            await timed_request(client.get("https://provider.test/a"))
+            await timed_request(client.get("https://provider.test/b"))
+            with stage("parse"):
+                pass
+
+    assert metrics.http_requests == 2
+    assert metrics.http_bytes == 32
+    assert len(metrics.http_latencies) == 2
+    assert metrics.seconds["http"] > 0 and metrics.seconds["parse"] >= 0
+    assert metrics.total_seconds >= metrics.seconds["http"]
+
+
+@pytest.mark.asyncio
+async def test_outside_a_collection_nothing_is_recorded() -> None:
+    async with _client() as client:
+        response = await timed_request(client.get("https://provider.test/a"))
+    with stage("write"):
+        pass
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_ingest_results_carry_timing_details_and_feed_the_registry() -> None:
+    async def ingest() -> SourceWriteResult:
+        with stage("write"):
+            pass
+        return SourceWriteResult(source_name="test_source", status="success", rows_written=10, details={"raw_rows": 10})
+
+    result = await ingest_with_source_lock("test_source", LockPolicy(scope="global"), ingest)
+
+    assert result.details["raw_rows"] == 10
+    assert set(result.details["timing"]) >= {"http_requests", "parse_ms", "normalize_ms", "write_ms", "rows_per_second"}
+    assert 'orku_ingest_rows_written_total{source="test_source"} 10' in INGEST_METRICS.render()
+
+
+def test_render_emits_prometheus_counters_and_histogram() -> None:
+    registry = IngestMetrics()
+    metrics = StageMetrics(http_requests=2, http_bytes=3_000_000, http_latencies=[0.05, 3.0], total_seconds=4.0)
+    metrics.seconds.update(http=3.05, write=0.5)
+    registry.observe("hsveitur", "success", 48, metrics)
+
+    text = registry.render()
+
+    assert "# TYPE orku_ingest_http_request_duration_seconds histogram" in text
+    assert 'orku_ingest_source_runs_total{source="hsveitur",status="success"} 1' in text
+    assert 'orku_ingest_http_response_bytes_total{source="hsveitur"} 3000000' in text
+    assert 'orku_ingest_stage_seconds_total{source="hsveitur",stage="write"} 0.5' in text
+    assert 'orku_ingest_http_request_duration_seconds_bucket{source="hsveitur",le="0.1"} 1' in text
+    assert 'orku_ingest_http_request_duration_seconds_bucket{source="hsveitur",le="2.5"} 1' in text
+    assert 'orku_ingest_http_request_duration_seconds_bucket{source="hsveitur",le="+Inf"} 2' in text
+    assert 'orku_ingest_last_rows_per_second{source="hsveitur"} 12' in text
+
+
+def test_sum_timing_details_adds_sources_up() -> None:
+    summary = sum_timing_details(
+        [
+            {"http_requests": 3, "http_bytes": 100, "http_ms": 120.5, "write_ms": 10.0, "total_ms": 140.0},
+            {"http_requests": 1, "http_bytes": 50, "http_ms": 80.0, "parse_ms": 1.2, "total_ms": 90.0},
+        ]
+    )
+
+    assert summary["http_requests"] == 4
+    assert summary["http_bytes"] == 150
+    assert summary["http_ms"] == 200.5
+    assert summary["normalize_ms"] == 0
+    assert summary["total_ms"] == 230.0
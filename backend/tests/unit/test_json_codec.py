@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from datetime import date, datetime, UTC
+
+import pytest
+
+from app.json_codec import STDLIB_CODEC, select_codec
+
+
+SYNC_EVENT = {
+    "job_id": "3f2a",
+    "sources": ["hsveitur", "open_meteo"],
+    "started_at": datetime(2026, 3, 14, 6, 0, 5, 120000, tzinfo=UTC),
+    "days": [date(2026, 3, 13), date(2026, 3, 14)],
+    "measured_at": datetime(2026, 3, 14, 6),
+    "message": "Hafnarfjörður: 24 rows",
+    "rows_written": 24,
+    "delta_value": 0.125,
+    "failure_category": None,
+    "counts": {1: 3, "ok": True},
+}
+
+
+def test_stdlib_codec_round_trips_bytes_without_ascii_escaping() -> None:
+    codec = select_codec("stdlib")
+    encoded = codec.dumps({"delivery_point_name": "Hvassaberg 10, Hafnarfjörður", "delta_value": 0.25})
+
+    assert isinstance(encoded, bytes)
+    assert "Hafnarfjörður".encode("utf-8") in encoded
+    assert codec.loads(encoded) == {"delivery_point_name": "Hvassaberg 10, Hafnarfjörður", "delta_value": 0.25}
+
+
+def test_auto_codec_decodes_the_same_as_stdlib() -> None:
+    body = b'{"UsageData": [{"date": "2026-01-01 00:00:00", "delta_value": 1.5, "meter_id": null}]}'
+    assert select_codec("auto").loads(body) == select_codec("stdlib").loads(body)
+
+
+def test_invalid_payload_raises_value_error_for_every_backend() -> None:
+    for backend in ("stdlib", "auto"):
+        with pytest.raises(ValueError):
+            select_codec(backend).loads(b"<html>")
+
+
+def test_stdlib_codec_writes_dates_and_datetimes_as_iso_8601() -> None:
+    assert STDLIB_CODEC.loads(STDLIB_CODEC.dumps(SYNC_EVENT))["started_at"] == "2026-03-14T06:00:05.120000+00:00"
+
+    with pytest.raises(TypeError):
+        STDLIB_CODEC.dumps({"value": object()})
+
+
+def test_both_codecs_encode_the_same_input_to_the_same_bytes() -> None:
+    pytest.importorskip("orjson")
+    fast_codec = select_codec("orjson")
+
+    assert fast_codec.dumps(SYNC_EVENT) == STDLIB_CODEC.dumps(SYNC_EVENT)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from app.dashboard import kpi_snapshots
+from app.dashboard.kpi_snapshots import refresh_kpi_snapshots_after_change
+from app.ingest import db, run_backfill
+from app.ingest.db import SourceWriteResult
+
+
+class _FakeConnection:
+    def __init__(self, events: list[str]) -> None:
+        self._events = events
+
+    def __enter__(self) -> _FakeConnection:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def cursor(self) -> _FakeConnection:
+        return self
+
+    def execute(self, sql: str, _params: object = None) -> None:
+        self._events.append(" ".join(sql.split()))
+
+    def commit(self) -> None:
+        self._events.append("commit")
+
+
+def _failing_refresh(*_: object) -> int:
+    raise RuntimeError("snapshot query failed")
+
+
+def test_failed_refresh_discards_todays_snapshots(monkeypatch: pytest.MonkeyPatch) -> None:
+    events: list[str] = []
+    monkeypatch.setattr(kpi_snapshots, "refresh_kpi_snapshots", _failing_refresh)
+
+    refreshed = refresh_kpi_snapshots_after_change(date(2026, 3, 14), 42, connect=lambda: _FakeConnection(events))
+
+    assert not refreshed
+    assert events == ["delete from energy.dashboard_kpi_snapshots where as_of = %s", "commit"]
+
+
+def test_refresh_never_raises_even_without_a_database() -> None:
+    def unreachable() -> _FakeConnection:
+        raise OSError("connection refused")
+
+    assert not refresh_kpi_snapshots_after_change(date(2026, 3, 14), connect=unreachable)
+
+
+def test_run_is_finalized_when_the_snapshot_refresh_fails(monkeypatch: pytest.MonkeyPatch) -> None:
+    finalized: list[int] = []
+    monkeypatch.setattr(kpi_snapshots, "refresh_kpi_snapshots", _failing_refresh)
+    monkeypatch.setattr(
+        run_backfill,
+        "refresh_kpi_snapshots_after_change",
+        lambda today, run_id: refresh_kpi_snapshots_after_change(today, run_id, connect=lambda: _FakeConnection([])),
+    )
+    monkeypatch.setattr(run_backfill, "get_connection", lambda: _FakeConnection([]))
+    monkeypatch.setattr(
+        run_backfill, "finalize_ingestion_run", lambda _, run_id, results, touched_days: finalized.append(run_id)
+    )
+
+    results = [SourceWriteResult(source_name="weather", status="success", rows_written=24)]
+    run_backfill._finalize_run(7, results, (date(2026, 3, 13), date(2026, 3, 14)))
+
+    assert finalized == [7]
+
+
+def test_a_failing_finalize_listener_does_not_fail_the_committed_run(monkeypatch: pytest.MonkeyPatch) -> None:
+    events: list[str] = []
+    called: list[int] = []
+
+    def failing_listener(run_id: int, touched_days: object) -> None:
+        raise RuntimeError("daily store reload failed")
+
+    monkeypatch.setattr(db, "_run_finalized_listeners", [failing_listener, lambda run_id, _: called.append(run_id)])
+    results = [SourceWriteResult(source_name="weather", status="success", rows_written=24)]
+
+    db.finalize_ingestion_run(_FakeConnection(events), 7, results, (date(2026, 3, 14), date(2026, 3, 14)))
+
+    assert events[-1] == "commit"
+    assert called == [7]
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+import pytest
+
+from app.ingest import locks, run_backfill
+from app.ingest.db import SourceWriteResult
+from app.ingest.locks import IngestLockBusy, LockPolicy, global_ingestion_lock, lock_key
+
+
+async def _ingest() -> SourceWriteResult:
+    return SourceWriteResult(source_name="hsveitur", status="success", rows_written=3)
+
+
+def _fake_lock(acquired: bool | None):
+    @contextmanager
+    def fake_lock(name: str, mode: str, timeout_seconds: float | None):
+        if acquired is None:
+            raise IngestLockBusy(f"Ingestion lock '{name}' is held by another run")
+        yield acquired
+
+    return fake_lock
+
+
+class _AdvisoryLocks:
+    """Session advisory locks as Postgres grants them: any number of shared holders or one exclusive one."""
+
+    def __init__(self) -> None:
+        self.holders: dict[tuple[int, int], list[bool]] = {}
+
+    def try_lock(self, key: tuple[int, int], shared: bool) -> bool:
+        holders = self.holders.setdefault(key, [])
+        if holders and not (shared and all(holders)):
+            return False
+        holders.append(shared)
+        return True
+
+    def unlock(self, key: tuple[int, int], shared: bool) -> None:
+        self.holders[key].remove(shared)
+
+
+class _LockConnection:
+    def __init__(self, advisory_locks: _AdvisoryLocks) -> None:
+        self._locks = advisory_locks
+        self._result = False
+        self.autocommit = False
+        self.closed = False
+
+    def __enter__(self) -> _LockConnection:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def cursor(self) -> _LockConnection:
+        return self
+
+    def execute(self, sql: str, key: tuple[int, int]) -> None:
+        function = sql.removeprefix("select ").split("(")[0]
+        shared = function.endswith("_shared")
+        if function.startswith("pg_try_advisory_lock"):
+            self._result = self._locks.try_lock(key, shared)
+        elif function.startswith("pg_advisory_unlock"):
+            self._locks.unlock(key, shared)
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def fetchone(self) -> tuple[bool]:
+        return (self._result,)
+
+
+@pytest.fixture
+def advisory_locks(monkeypatch: pytest.MonkeyPatch) -> _AdvisoryLocks:
+    advisory_locks = _AdvisoryLocks()
+    monkeypatch.setattr(locks, "get_connection", lambda: _LockConnection(advisory_locks))
+    return advisory_locks
+
+
+def test_lock_policy_rejects_unknown_modes() -> None:
+    with pytest.raises(ValueError):
+        LockPolicy(mode="retry")
+    with pytest.raises(ValueError):
+        LockPolicy(scope="table")
+
+
+def test_lock_keys_are_stable_and_distinct_per_source() -> None:
+    assert lock_key("hsveitur") == lock_key("hsveitur")
+    assert lock_key("hsveitur") != lock_key("veitur")
+    assert all(0 <= part < 2**31 for part in lock_key("global"))
+
+
+@pytest.mark.asyncio
+async def test_source_lock_outcomes(monkeypatch: pytest.MonkeyPatch) -> None:
+    policy = LockPolicy(scope="source", mode="skip")
+
+    monkeypatch.setattr(run_backfill, "ingestion_lock", _fake_lock(True))
+    assert (await run_backfill.ingest_with_source_lock("hsveitur", policy, _ingest)).status == "success"
+
+    monkeypatch.setattr(run_backfill, "ingestion_lock", _fake_lock(False))
+    skipped = await run_backfill.ingest_with_source_lock("hsveitur", policy, _ingest)
+    assert (skipped.status, skipped.rows_written) == ("skipped", 0)
+
+    monkeypatch.setattr(run_backfill, "ingestion_lock", _fake_lock(None))
+    failed = await run_backfill.ingest_with_source_lock("hsveitur", LockPolicy(mode="fail"), _ingest)
+    assert (failed.status, failed.failure_category) == ("failed", "locked")
+
+
+@pytest.mark.asyncio
+async def test_global_scope_does_not_take_source_locks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run_backfill, "ingestion_lock", _fake_lock(None))
+
+    result = await run_backfill.ingest_with_source_lock("hsveitur", LockPolicy(scope="global"), _ingest)
+
+    assert result.status == "success"
+
+
+def test_global_run_and_source_scope_runs_exclude_each_other(advisory_locks: _AdvisoryLocks) -> None:
+    global_scope = LockPolicy(scope="global", mode="skip")
+    source_scope = LockPolicy(scope="source", mode="skip")
+
+    with global_ingestion_lock(global_scope) as acquired:
+        assert acquired
+        with global_ingestion_lock(source_scope) as source_acquired:
+            assert not source_acquired
+
+    with global_ingestion_lock(source_scope) as acquired:
+        assert acquired
+        with global_ingestion_lock(source_scope) as other_source_acquired:
+            assert other_source_acquired
+        with global_ingestion_lock(global_scope) as global_acquired:
+            assert not global_acquired
+
+    assert all(not holders for holders in advisory_locks.holders.values())
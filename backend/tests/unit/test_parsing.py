@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone, UTC
+
+import pytest
+
+from app.ingest.parsing import parse_float_column, parse_timestamp_column
+
+
+def test_timestamp_column_handles_each_provider_format_as_utc() -> None:
+    expected = datetime(2026, 1, 2, 3, 0, tzinfo=UTC)
+
+    assert parse_timestamp_column(["2026-01-02 03:00:00"]) == [expected]  # HS Veitur date
+    assert parse_timestamp_column(["2026-01-02T03:00:00"]) == [expected]  # Veitur readingDate
+    assert parse_timestamp_column(["2026-01-02T03:00:00.000Z"]) == [expected]  # Zaptec StartDateTime
+    assert parse_timestamp_column(["2026-01-02T03:00"]) == [expected]  # Open-Meteo time
+
+
+def test_timestamp_column_falls_back_per_value_on_mixed_formats() -> None:
+    parsed = parse_timestamp_column(["2026-01-02T03:00:00", "2026-01-02T04:00:00+01:00", "2026-01-02T05:00:00Z"])
+
+    assert parsed[0] == datetime(2026, 1, 2, 3, 0, tzinfo=UTC)
+    assert parsed[1].utcoffset() == timedelta(hours=1)
+    assert parsed[2] == datetime(2026, 1, 2, 5, 0, tzinfo=UTC)
+
+
+def test_aware_column_never_returns_naive_values() -> None:
+    parsed = parse_timestamp_column(["2026-01-02T03:00:00+00:00", "2026-01-02T04:00:00+00:00", "2026-01-02T05:00:00"])
+
+    assert all(item.tzinfo is not None for item in parsed)
+    assert parsed[0].tzinfo == timezone.utc
+
+
+def test_missing_timestamps_raise_unless_optional() -> None:
+    with pytest.raises(ValueError):
+        parse_timestamp_column(["2026-01-02T03:00:00", None])
+
+    assert parse_timestamp_column(["2026-01-02T03:00:00", None, ""], optional=True)[1:] == [None, None]
+
+
+def test_float_column_normalizes_ints_and_drops_unparsable_values() -> None:
+    assert parse_float_column([1, 2.5, None]) == [1.0, 2.5, None]
+    assert parse_float_column(["1.5", "n/a", 3]) == [1.5, None, 3.0]
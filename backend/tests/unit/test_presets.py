@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.dashboard.presets import build_kpi_snapshot, kpi_cards, preset_range
+
+
+def _rows(first_day: date, count: int, brutto: float = 10.0) -> list[dict[str, object]]:
+    return [
+        {
+            "day": (first_day + timedelta(days=offset)).isoformat(),
+            "brutto_kwh": brutto,
+            "ev_kwh": 2.004,
+            "netto_kwh": brutto - 2.004,
+            "hot_water_usage": None,
+            "avg_temperature_c": 1.26 + offset,
+        }
+        for offset in range(count)
+    ]
+
+
+def test_this_month_compares_with_the_same_number_of_preceding_days() -> None:
+    window = preset_range("thisMonth", date(2026, 3, 10))
+
+    assert (window.start, window.end) == (date(2026, 3, 1), date(2026, 3, 10))
+    assert (window.compare_start, window.compare_end) == (date(2026, 2, 19), date(2026, 2, 28))
+    assert window.rolling_start == date(2025, 11, 1)
+
+
+def test_last_3_months_rolls_month_overflow_forward_like_javascript() -> None:
+    # new Date(2026, 4, 31).setMonth(1) lands on March 3, so the range starts March 4.
+    window = preset_range("last3Months", date(2026, 5, 31))
+
+    assert window.start == date(2026, 3, 4)
+    assert window.compare_end == date(2026, 3, 3)
+    assert (window.compare_end - window.compare_start).days == (window.end - window.start).days
+
+
+def test_unknown_preset_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        preset_range("lastYear", date(2026, 3, 10))
+
+
+def test_snapshot_totals_deltas_and_rolling_average() -> None:
+    window = preset_range("last30Days", date(2026, 3, 30))
+    rows = _rows(window.compare_start, 30, brutto=8.0) + _rows(window.start, 30, brutto=10.0)
+
+    snapshot = build_kpi_snapshot(window, rows)
+
+    assert snapshot["day_count"] == 30
+    assert snapshot["brutto_kwh"] == 300.0
+    assert snapshot["ev_kwh"] == 60.0
+    assert snapshot["hot_water_usage"] == 0.0
+    assert snapshot["brutto_delta_percent"] == 25.0
+    assert snapshot["hot_water_delta_percent"] is None
+    assert snapshot["latest_temperature_c"] == 30.3
+    assert snapshot["rolling_series"][0] == {"day": window.start.isoformat(), "average_kwh": 8.0}
+    assert snapshot["rolling_average_kwh"] == round((30 * 8.0 + 29 * 10.0) / 59, 2)
+
+
+def test_rolling_average_needs_seven_preceding_days() -> None:
+    window = preset_range("last30Days", date(2026, 3, 30))
+
+    series = build_kpi_snapshot(window, _rows(window.start, 30))["rolling_series"]
+
+    assert [point["average_kwh"] for point in series[:8]] == [None] * 7 + [10.0]
+
+
+def test_cards_follow_dashboard_order() -> None:
+    window = preset_range("thisMonth", date(2026, 3, 10))
+    cards = kpi_cards(build_kpi_snapshot(window, _rows(window.start, 10)))
+
+    assert [card["key"] for card in cards] == ["brutto", "netto", "ev", "hot_water", "weather"]
+    assert cards[-1]["as_of_day"] == "2026-03-10"
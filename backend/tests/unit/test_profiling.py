@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.api.main import app
+from app.profiling import ProfileSession, profile_source, profiling
+
+
+async def _slow_provider_call() -> None:
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_profile_source_records_cpu_and_awaiting_tasks(tmp_path: Path) -> None:
+    session = ProfileSession(output_dir=tmp_path, sample_interval_seconds=0.002)
+
+    with profiling(session):
+        with profile_source("weather"):
+            await asyncio.gather(_slow_provider_call(), asyncio.create_task(_slow_provider_call()))
+            sum(index * index for index in range(20_000))
+
+    report = session.report()["sources"]["weather"]
+    assert report["wall_samples"] > 0
+    assert report["cpu_top"]
+    assert any("_slow_provider_call" in entry["stack"] for entry in report["wall_top_stacks"])
+    assert sorted(path.suffix for path in session.files) == [".folded", ".prof", ".txt"]
+    assert all(path.exists() for path in session.files)
+
+
+@pytest.mark.asyncio
+async def test_profile_source_is_a_no_op_without_a_session() -> None:
+    with profile_source("weather"):
+        await _slow_provider_call()
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_is_hidden_without_token_and_guarded_with_one(monkeypatch: pytest.MonkeyPatch) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.test") as client:
+        monkeypatch.delenv("PROFILING_TOKEN", raising=False)
+        assert (await client.post("/debug/profile-next-sync")).status_code == 404
+
+        monkeypatch.setenv("PROFILING_TOKEN", "expected")
+        assert (await client.post("/debug/profile-next-sync")).status_code == 401
+        wrong = await client.post("/debug/profile-next-sync", headers={"Authorization": "Bearer wrong"})
+        assert wrong.status_code == 401
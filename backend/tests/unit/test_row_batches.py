@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import datetime, UTC
+
+from app.ingest.batches import ElectricityBatch, EvChargerBatch, WeatherBatch
+
+
+def test_electricity_batch_parses_usage_rows_into_columns() -> None:
+    batch = ElectricityBatch.from_usage_rows(
+        [
+            {"date": "2026-01-01 01:00:00", "meter_id": 42, "delta_value": "1.25", "type": "Rafmagn"},
+            "not-a-row",
+            {"date": "2026-01-01T00:00:00Z", "delta_value": None},
+        ]
+    )
+
+    assert len(batch) == 2
+    assert batch.meter_ids == ["42", "unknown"]
+    assert batch.delta_kwh == [1.25, None]
+    assert batch.utility_types == ["Rafmagn", None]
+    assert batch.measured_at[1] == datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def test_prepared_batch_is_time_ordered_and_keeps_the_last_duplicate() -> None:
+    batch = ElectricityBatch.from_usage_rows(
+        [
+            {"date": "2026-01-01 02:00:00", "meter_id": "m1", "delta_value": 1},
+            {"date": "2026-01-01 01:00:00", "meter_id": "m1", "delta_value": 2},
+            {"date": "2026-01-01 02:00:00", "meter_id": "m1", "delta_value": 3},
+        ]
+    ).prepared_for_write()
+
+    assert [measured_at.hour for measured_at in batch.measured_at] == [1, 2]
+    assert batch.delta_kwh == [2.0, 3.0]
+
+
+def test_ev_batch_falls_back_to_start_time_when_session_has_no_end() -> None:
+    batch = EvChargerBatch.from_charge_history(
+        [{"Id": "s1", "ChargerId": "c1", "StartDateTime": "2026-01-01T20:00:00", "TotalChargeKwh": 11}]
+    )
+
+    assert batch.finished_at == batch.started_at
+    assert batch.duration_seconds == [0]
+    assert batch.energy_kwh == [11.0]
+
+
+def test_weather_batch_keeps_open_meteo_arrays_without_copying() -> None:
+    hourly = {"time": ["2026-01-01T00:00"], "temperature_2m": [1.5], "relative_humidity_2m": "bad"}
+    batch = WeatherBatch.from_hourly(hourly)
+
+    assert batch.timestamps is hourly["time"]
+    assert batch.humidities_percent == []
+    assert len(batch) == 1
+
+
+def test_prepared_batch_keeps_meters_sharing_a_timestamp_and_skips_copy_when_clean() -> None:
+    batch = ElectricityBatch.from_usage_rows(
+        [
+            {"date": "2026-01-01 01:00:00", "meter_id": "m1", "delta_value": 1},
+            {"date": "2026-01-01 01:00:00", "meter_id": "m2", "delta_value": 2},
+            {"date": "2026-01-01 02:00:00", "meter_id": "m1", "delta_value": 3},
+        ]
+    )
+
+    assert batch.prepared_for_write() is batch
+
+
+def test_ordered_batch_with_a_repeated_reading_still_keeps_the_last_one() -> None:
+    batch = ElectricityBatch.from_usage_rows(
+        [
+            {"date": "2026-01-01 01:00:00", "meter_id": "m1", "delta_value": 1},
+            {"date": "2026-01-01 01:00:00", "meter_id": "m2", "delta_value": 2},
+            {"date": "2026-01-01 01:00:00", "meter_id": "m1", "delta_value": 3},
+            {"date": "2026-01-01 02:00:00", "meter_id": "m1", "delta_value": 4},
+        ]
+    ).prepared_for_write()
+
+    assert batch.meter_ids == ["m1", "m2", "m1"]
+    assert batch.delta_kwh == [3.0, 2.0, 4.0]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, UTC
+
+import pytest
+
+from app.ingest import run_reprocess
+from app.ingest.locks import IngestLockBusy, LockPolicy
+from app.ingest.run_reprocess import chunk_date_range, reprocess_chunk
+
+
+def test_chunk_date_range_covers_range_without_overlap() -> None:
+    chunks = chunk_date_range(date(2024, 1, 1), date(2024, 3, 5), 30)
+
+    assert chunks == [
+        (date(2024, 1, 1), date(2024, 1, 30)),
+        (date(2024, 1, 31), date(2024, 2, 29)),
+        (date(2024, 3, 1), date(2024, 3, 5)),
+    ]
+    assert chunk_date_range(date(2024, 1, 1), date(2024, 1, 1), 90) == [(date(2024, 1, 1), date(2024, 1, 1))]
+
+
+def test_chunk_date_range_rejects_empty_chunks() -> None:
+    with pytest.raises(ValueError):
+        chunk_date_range(date(2024, 1, 1), date(2024, 1, 2), 0)
+
+
+class _FakeCursor:
+    def __init__(self, connection: _FakeConnection) -> None:
+        self._connection = connection
+        self.rowcount = -1
+        self._row: tuple[object, ...] = ()
+
+    def __enter__(self) -> _FakeCursor:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def execute(self, sql: str, params: object = None) -> None:
+        statement = " ".join(sql.split())
+        self._connection.statements.append((statement, params))
+        if statement.startswith("select count(*)"):
+            self._row = (3,)
+        elif statement.startswith("select (min("):
+            self._row = self._connection.bounds[statement.split("from energy.")[1].split()[0]]
+        elif statement.startswith("update"):
+            self.rowcount = 5
+
+    def fetchone(self) -> tuple[object, ...]:
+        return self._row
+
+
+class _FakeConnection:
+    def __init__(self, bounds: dict[str, tuple[date | None, date | None]] | None = None) -> None:
+        self.bounds = bounds or {}
+        self.statements: list[tuple[str, object]] = []
+        self.commits = 0
+
+    def __enter__(self) -> _FakeConnection:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+def test_chunk_bounds_are_utc_midnights_with_an_exclusive_end() -> None:
+    connection = _FakeConnection()
+
+    assert reprocess_chunk(connection, "hot_water_raw", date(2024, 1, 1), date(2024, 1, 31)) == 5
+    assert reprocess_chunk(connection, "hot_water_raw", date(2024, 1, 1), date(2024, 1, 31), dry_run=True) == 3
+
+    (set_zone, _), (update_sql, bounds), _, (count_sql, _) = connection.statements
+    assert set_zone == "set local time zone 'UTC'"
+    assert update_sql.startswith("update energy.hot_water_raw") and count_sql.startswith("select count(*)")
+    assert bounds == {"from": datetime(2024, 1, 1, tzinfo=UTC), "to": datetime(2024, 2, 1, tzinfo=UTC)}
+    assert connection.commits == 2
+
+
+def test_run_reprocess_dispatches_clipped_chunks_and_refreshes_only_changed_days(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    connection = _FakeConnection(
+        {
+            "electricity_raw": (date(2024, 1, 1), date(2024, 3, 31)),
+            "weather_raw": (date(2023, 6, 1), date(2024, 12, 31)),
+            "hot_water_raw": (None, None),
+        }
+    )
+    dispatched: list[tuple[str, date, date, bool]] = []
+    refreshed: list[tuple[date, date]] = []
+    notified: list[tuple[date, date] | None] = []
+
+    locked: list[str] = []
+
+    @contextmanager
+    def fake_lock(_: LockPolicy) -> Iterator[None]:
+        locked.append("held")
+        yield
+        locked.append("released")
+
+    def fake_run_chunk(table_name: str, from_date: date, to_date: date, dry_run: bool) -> int:
+        assert locked == ["held"]
+        dispatched.append((table_name, from_date, to_date, dry_run))
+        return 2 if table_name == "electricity_raw" else 0
+
+    def fake_notify(_: object, __: object, days: tuple[date, date]) -> None:
+        assert locked == ["held"]
+        notified.append(days)
+
+    monkeypatch.setattr(run_reprocess, "exclusive_ingestion_lock", fake_lock)
+    monkeypatch.setattr(run_reprocess, "get_connection", lambda: connection)
+    monkeypatch.setattr(run_reprocess, "_run_chunk", fake_run_chunk)
+    monkeypatch.setattr(run_reprocess, "refresh_dashboard_rollups", lambda _, *days: refreshed.append(days))
+    monkeypatch.setattr(run_reprocess, "refresh_kpi_snapshots_after_change", lambda *_: True)
+    monkeypatch.setattr(run_reprocess, "notify_data_changed", fake_notify)
+
+    results = run_reprocess.run_reprocess(
+        tables=("electricity_raw", "weather_raw", "hot_water_raw"),
+        from_date=date(2024, 2, 1),
+        to_date=date(2024, 6, 30),
+        chunk_days=30,
+        workers=2,
+        lock_policy=LockPolicy(),
+    )
+
+    weather_chunks = chunk_date_range(date(2024, 2, 1), date(2024, 6, 30), 30)
+    assert sorted(dispatched) == [
+        ("electricity_raw", date(2024, 2, 1), date(2024, 3, 1), False),
+        ("electricity_raw", date(2024, 3, 2), date(2024, 3, 31), False),
+        *(("weather_raw", chunk_from, chunk_to, False) for chunk_from, chunk_to in weather_chunks),
+    ]
+    # hot_water_raw has no unarchived rows, so it gets no chunks and no result.
+    assert [(result.table_name, result.chunks, result.rows_updated) for result in results] == [
+        ("electricity_raw", 2, 4),
+        ("weather_raw", 6, 0),
+    ]
+    # Only electricity changed, so only its days are refreshed and announced.
+    assert refreshed == [(date(2024, 2, 1), date(2024, 3, 31))]
+    assert notified == [(date(2024, 2, 1), date(2024, 3, 31))]
+    assert locked == ["held", "released"]
+
+
+def test_reprocess_does_not_start_while_another_run_holds_the_global_lock(monkeypatch: pytest.MonkeyPatch) -> None:
+    @contextmanager
+    def busy_lock(_: LockPolicy) -> Iterator[None]:
+        raise IngestLockBusy("Ingestion lock 'global' is held by another run")
+        yield
+
+    monkeypatch.setattr(run_reprocess, "exclusive_ingestion_lock", busy_lock)
+    monkeypatch.setattr(run_reprocess, "get_connection", lambda: pytest.fail("reprocess ran without the lock"))
+
+    with pytest.raises(IngestLockBusy):
+        run_reprocess.run_reprocess(tables=("weather_raw",), lock_policy=LockPolicy(mode="skip"))
+
+
+def test_dry_run_neither_refreshes_nor_notifies(monkeypatch: pytest.MonkeyPatch) -> None:
+    connection = _FakeConnection({"weather_raw": (date(2024, 1, 1), date(2024, 1, 10))})
+    monkeypatch.setattr(run_reprocess, "get_connection", lambda: connection)
+    monkeypatch.setattr(run_reprocess, "_run_chunk", lambda *_: 7)
+    monkeypatch.setattr(run_reprocess, "refresh_dashboard_rollups", lambda *_: pytest.fail("dry run refreshed rollups"))
+    monkeypatch.setattr(run_reprocess, "notify_data_changed", lambda *_: pytest.fail("dry run notified"))
+
+    [result] = run_reprocess.run_reprocess(tables=("weather_raw",), chunk_days=90, dry_run=True)
+
+    assert (result.chunks, result.rows_updated) == (1, 7)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, UTC
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from app.ingest import run_retention
+from app.ingest.locks import IngestLockBusy, LockPolicy
+from app.ingest.run_retention import (
+    RetentionPolicy,
+    TableRetentionPolicy,
+    load_retention_policy,
+    strip_payloads,
+)
+
+
+class _FakeCursor:
+    def __init__(self, connection: _FakeConnection) -> None:
+        self._connection = connection
+        self._result: list[tuple[object, ...]] = []
+
+    def __enter__(self) -> _FakeCursor:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        statement = " ".join(sql.split())
+        self._connection.statements.append(statement)
+        self._result = self._connection.respond(statement, params)
+
+    def fetchall(self) -> list[tuple[object, ...]]:
+        return self._result
+
+    def fetchone(self) -> tuple[object, ...]:
+        return self._result[0]
+
+
+class _FakeConnection:
+    """Answers the retention queries from canned rows and records every statement in order."""
+
+    def __init__(
+        self, tmp_path: Path, payload_rows: list[tuple[object, ...]], hourly_rows: list[tuple[object, ...]]
+    ) -> None:
+        self._tmp_path = tmp_path
+        self._payload_rows = payload_rows
+        self._hourly_rows = {"electricity_raw": list(hourly_rows), "weather_raw": list(hourly_rows)}
+        self.statements: list[str] = []
+        self.events: list[str] = []
+
+    def __enter__(self) -> _FakeConnection:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        return None
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self)
+
+    def commit(self) -> None:
+        self.events.append("commit")
+
+    def respond(self, statement: str, params: tuple[object, ...]) -> list[tuple[object, ...]]:
+        if statement.startswith("select id, measured_at, source_payload::text"):
+            rows, self._payload_rows = self._payload_rows, []
+            return rows
+        if statement.startswith("update energy.electricity_raw set source_payload"):
+            # The archive must be on disk before any payload is overwritten.
+            archived = list(self._tmp_path.rglob("*.ndjson.gz"))
+            self.events.append(f"strip archived_files={len(archived)}")
+            return []
+        if statement.startswith("select min(day)"):
+            return [(date(2019, 6, 1),)]
+        if statement.startswith("insert into energy.retention_state"):
+            self.events.append(f"watermark {params[0]} {params[1]}")
+            return []
+        if statement.startswith("select id, row_to_json(raw_row)::text"):
+            table_name = statement.split("from energy.")[1].split()[0]
+            rows, self._hourly_rows[table_name] = self._hourly_rows[table_name], []
+            return rows
+        if statement.startswith("delete from energy."):
+            self.events.append(f"delete {statement.split('from energy.')[1].split()[0]} {params[0]}")
+            return []
+        raise AssertionError(f"unexpected statement: {statement}")
+
+
+def test_policy_reads_days_from_env_and_turns_steps_off(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("RETENTION_ELECTRICITY_PAYLOAD_DAYS", "30")
+    monkeypatch.setenv("RETENTION_EV_CHARGER_PAYLOAD_DAYS", "off")
+    monkeypatch.setenv("RETENTION_HOT_WATER_PAYLOAD_DAYS", " ")
+    monkeypatch.delenv("RETENTION_WEATHER_PAYLOAD_DAYS", raising=False)
+    monkeypatch.setenv("RETENTION_DOWNSAMPLE_AFTER_YEARS", "3")
+    monkeypatch.setenv("RETENTION_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.delenv("RETENTION_BATCH_SIZE", raising=False)
+
+    policy = load_retention_policy()
+
+    assert [(table.table_name, table.payload_days, table.archive_payload) for table in policy.tables] == [
+        ("electricity_raw", 30, True),
+        ("ev_charger_raw", None, True),
+        ("hot_water_raw", 365, True),
+        ("weather_raw", 7, False),
+    ]
+    assert policy.downsample_after_years == 3
+    assert policy.archive_dir == tmp_path
+    assert policy.batch_size == run_retention.DEFAULT_BATCH_SIZE
+
+
+def test_downsampling_is_off_unless_configured(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("RETENTION_DOWNSAMPLE_AFTER_YEARS", raising=False)
+    assert load_retention_policy().downsample_after_years is None
+
+    monkeypatch.setenv("RETENTION_DOWNSAMPLE_AFTER_YEARS", "never")
+    assert load_retention_policy().downsample_after_years is None
+
+
+def test_payloads_are_archived_before_they_are_stripped(tmp_path: Path) -> None:
+    measured_at = datetime(2024, 1, 5, 12, tzinfo=UTC)
+    payload_rows = [(11, measured_at, '{"delta_value": 1.5}'), (12, measured_at, '{"delta_value": 2.0}')]
+    connection = _FakeConnection(tmp_path, payload_rows=payload_rows, hourly_rows=[])
+
+    result = strip_payloads(
+        connection, TableRetentionPolicy("electricity_raw", 365, True), date(2025, 1, 1), tmp_path, batch_size=100
+    )
+
+    assert connection.events == ["strip archived_files=1", "commit"]
+    assert result.rows_affected == 2
+    [archive_file] = result.archive_files
+    with gzip.open(archive_file, "rt", encoding="utf-8") as lines:
+        archived = [json.loads(line) for line in lines]
+    assert [(row["id"], row["source_payload"]) for row in archived] == [
+        (11, {"delta_value": 1.5}),
+        (12, {"delta_value": 2.0}),
+    ]
+
+
+def test_downsampling_refreshes_rollups_and_records_the_watermark_before_deleting(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    connection = _FakeConnection(tmp_path, payload_rows=[], hourly_rows=[(1, '{"id": 1}'), (2, '{"id": 2}')])
+    refreshed: list[tuple[date, date]] = []
+
+    def fake_refresh(_: object, date_from: date, date_to: date) -> None:
+        refreshed.append((date_from, date_to))
+        connection.events.append("refresh rollups")
+
+    @contextmanager
+    def fake_lock(_: LockPolicy) -> Iterator[None]:
+        connection.events.append("lock global")
+        yield
+        connection.events.append("unlock global")
+
+    monkeypatch.setattr(run_retention, "exclusive_ingestion_lock", fake_lock)
+    monkeypatch.setattr(run_retention, "get_connection", lambda: connection)
+    monkeypatch.setattr(run_retention, "refresh_dashboard_rollups", fake_refresh)
+    policy = RetentionPolicy(
+        tables=(TableRetentionPolicy("electricity_raw", None, True),),
+        archive_dir=tmp_path,
+        downsample_after_years=2,
+        batch_size=100,
+    )
+
+    results = run_retention.run_retention(policy, today=date(2026, 3, 14), lock_policy=LockPolicy())
+
+    cutoff = date(2024, 3, 1)
+    assert refreshed == [(date(2019, 6, 1), date(2024, 2, 29))]
+    assert connection.events == [
+        "lock global",
+        "refresh rollups",
+        f"watermark electricity_raw {cutoff}",
+        "commit",
+        "delete electricity_raw [1, 2]",
+        "commit",
+        f"watermark weather_raw {cutoff}",
+        "commit",
+        "delete weather_raw [1, 2]",
+        "commit",
+        "unlock global",
+    ]
+    assert [(result.table_name, result.action, result.rows_affected) for result in results] == [
+        ("electricity_raw", "downsample", 2),
+        ("weather_raw", "downsample", 2),
+    ]
+    # Deleted rows are archived whole before the delete.
+    assert all(len(result.archive_files) == 1 for result in results)
+
+
+def test_retention_does_not_start_while_another_run_holds_the_global_lock(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    @contextmanager
+    def busy_lock(_: LockPolicy) -> Iterator[None]:
+        raise IngestLockBusy("Ingestion lock 'global' is held by another run")
+        yield
+
+    monkeypatch.setattr(run_retention, "exclusive_ingestion_lock", busy_lock)
+    monkeypatch.setattr(run_retention, "get_connection", lambda: pytest.fail("retention ran without the lock"))
+    policy = RetentionPolicy(
+        tables=(TableRetentionPolicy("electricity_raw", 365, True),), archive_dir=tmp_path, downsample_after_years=None
+    )
+
+    with pytest.raises(IngestLockBusy):
+        run_retention.run_retention(policy, today=date(2026, 3, 14), lock_policy=LockPolicy(mode="skip"))
+
+
+def test_dry_run_only_counts(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    class _CountingConnection(_FakeConnection):
+        def respond(self, statement: str, params: tuple[object, ...]) -> list[tuple[object, ...]]:
+            if statement.startswith("select count(*)"):
+                return [(4,)]
+            return super().respond(statement, params)
+
+    connection = _CountingConnection(tmp_path, payload_rows=[], hourly_rows=[])
+    monkeypatch.setattr(run_retention, "get_connection", lambda: connection)
+    monkeypatch.setattr(run_retention, "refresh_dashboard_rollups", lambda *_: pytest.fail("dry run refreshed rollups"))
+    policy = RetentionPolicy(
+        tables=(TableRetentionPolicy("electricity_raw", 365, True),),
+        archive_dir=tmp_path,
+        downsample_after_years=2,
+    )
+
+    results = run_retention.run_retention(policy, today=date(2026, 3, 14), dry_run=True)
+
+    assert [result.rows_affected for result in results] == [4, 4, 4]
+    assert connection.events == []
+    assert not any(statement.startswith(("update", "delete", "insert")) for statement in connection.statements)
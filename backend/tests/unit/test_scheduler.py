@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, UTC
+
+import pytest
+
+from app.api import scheduler
+from app.api.scheduler import (
+    CronSchedule,
+    LOCAL_TZ,
+    ScheduledSync,
+    SchedulerSettings,
+    SyncScheduler,
+    load_scheduler_settings,
+    missed_fire,
+)
+from app.api.sync_jobs import SyncJobManager
+from app.ingest.run_retention import RetentionPolicy
+
+
+def _local(text: str) -> datetime:
+    return datetime.fromisoformat(text).replace(tzinfo=LOCAL_TZ)
+
+
+def test_daily_schedule_fires_today_or_tomorrow() -> None:
+    schedule = CronSchedule.parse("20 7 * * *")
+
+    assert schedule.next_after(_local("2026-03-10T06:59:30")) == _local("2026-03-10T07:20")
+    assert schedule.next_after(_local("2026-03-10T07:20")) == _local("2026-03-11T07:20")
+
+
+def test_step_range_list_and_month_rollover() -> None:
+    assert CronSchedule.parse("*/30 * * * *").next_after(_local("2026-03-10T10:31")) == _local("2026-03-10T11:00")
+    assert CronSchedule.parse("0 6-8/2 * * *").next_after(_local("2026-03-10T06:00")) == _local("2026-03-10T08:00")
+    assert CronSchedule.parse("15 3 1 1,7 *").next_after(_local("2026-07-01T04:00")) == _local("2027-01-01T03:15")
+
+
+def test_weekday_uses_sunday_zero_and_ors_with_day_of_month() -> None:
+    # 2026-03-10 is a Tuesday.
+    assert CronSchedule.parse("0 9 * * 0").next_after(_local("2026-03-10T00:00")) == _local("2026-03-15T09:00")
+    assert CronSchedule.parse("0 9 12 * 0").next_after(_local("2026-03-10T00:00")) == _local("2026-03-12T09:00")
+
+
+def test_next_after_accepts_utc_datetimes() -> None:
+    moment = datetime(2026, 3, 10, 7, 0, tzinfo=UTC)
+    assert CronSchedule.parse("20 7 * * *").next_after(moment) == _local("2026-03-10T07:20")
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *", "0 0 31 2 *"])
+def test_invalid_expressions_are_rejected(expression: str) -> None:
+    with pytest.raises(ValueError):
+        CronSchedule.parse(expression).next_after(_local("2026-03-10T00:00"))
+
+
+def test_sources_with_the_same_schedule_share_an_entry(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SCHEDULE_HSVEITUR", "0 7 * * *")
+    monkeypatch.setenv("SCHEDULE_VEITUR", "0  7 * * *")
+    monkeypatch.setenv("SCHEDULE_ZAPTEC", "off")
+    monkeypatch.setenv("SCHEDULE_WEATHER", "5 * * * *")
+    monkeypatch.delenv("SCHEDULER_ENABLED", raising=False)
+    monkeypatch.delenv("SCHEDULE_RETENTION", raising=False)
+
+    settings = load_scheduler_settings()
+
+    assert not settings.enabled
+    assert settings.retention is None
+    assert [(entry.schedule.expression, entry.sources) for entry in settings.entries] == [
+        ("0 7 * * *", ("hsveitur", "veitur")),
+        ("5 * * * *", ("weather",)),
+    ]
+
+
+def test_missed_fire_when_a_slot_passed_since_last_success() -> None:
+    entry = ScheduledSync(schedule=CronSchedule.parse("20 7 * * *"), sources=("hsveitur", "veitur"))
+    now = _local("2026-03-10T09:00")
+
+    assert not missed_fire(entry, {"hsveitur": _local("2026-03-10T07:21"), "veitur": _local("2026-03-10T07:25")}, now)
+    assert missed_fire(entry, {"hsveitur": _local("2026-03-10T07:21"), "veitur": _local("2026-03-09T07:25")}, now)
+    assert missed_fire(entry, {"hsveitur": _local("2026-03-10T07:21"), "veitur": None}, now)
+
+
+def test_retention_schedule_is_opt_in(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SCHEDULE_RETENTION", "off")
+    assert load_scheduler_settings().retention is None
+
+    monkeypatch.setenv("SCHEDULE_RETENTION", "15  3 * * *")
+    assert load_scheduler_settings().retention == CronSchedule.parse("15 3 * * *")
+
+
+async def _never_called(*_: object) -> list[object]:
+    raise AssertionError("retention must not start a sync job")
+
+
+@pytest.mark.asyncio
+async def test_retention_runs_on_its_schedule(monkeypatch: pytest.MonkeyPatch) -> None:
+    ran = asyncio.Event()
+    policies: list[object] = []
+
+    def fake_run_retention(policy: object) -> list[object]:
+        policies.append(policy)
+        ran.set()
+        return []
+
+    monkeypatch.setattr(scheduler, "run_retention", fake_run_retention)
+    settings = SchedulerSettings(enabled=True, entries=(), retention=CronSchedule.parse("* * * * *"))
+    # A millisecond before the next minute, so the first slot comes due at once.
+    sync_scheduler = SyncScheduler(
+        SyncJobManager(_never_called), settings, clock=lambda: _local("2026-03-10T03:14:59.999")
+    )
+
+    sync_scheduler.start()
+    try:
+        await asyncio.wait_for(ran.wait(), timeout=2)
+    finally:
+        await sync_scheduler.stop()
+
+    assert policies and all(isinstance(policy, RetentionPolicy) for policy in policies)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import date, datetime
+import io
+
+import pytest
+
+from app import json_codec
+from app.dashboard import formats
+from app.dashboard.formats import SERIES_FORMATS, SeriesStream, UnsupportedFormat, negotiate_format
+
+COLUMNS = ("day", "brutto_kwh", "ev_kwh")
+BATCHES = [[(date(2026, 1, 1), 1.5, None), (date(2026, 1, 2), 2.0, 0.5)], [], [(date(2026, 1, 3), 3.25, 1.0)]]
+
+
+def _stream() -> SeriesStream:
+    return SeriesStream(meta={"from": "2026-01-01", "data_version": 4}, rows_key="rows", columns=COLUMNS, batches=iter(BATCHES))
+
+
+def test_json_rows_match_the_row_object_document() -> None:
+    body = b"".join(formats.encode_json_rows(_stream()))
+
+    assert body == json_codec.dumps(
+        {
+            "from": "2026-01-01",
+            "data_version": 4,
+            "rows": [
+                {"day": "2026-01-01", "brutto_kwh": 1.5, "ev_kwh": None},
+                {"day": "2026-01-02", "brutto_kwh": 2.0, "ev_kwh": 0.5},
+                {"day": "2026-01-03", "brutto_kwh": 3.25, "ev_kwh": 1.0},
+            ],
+        }
+    )
+
+
+def test_columnar_layout_holds_one_array_per_column() -> None:
+    document = json_codec.loads(b"".join(formats.encode_json_columns(_stream())))
+
+    assert document == {
+        "from": "2026-01-01",
+        "data_version": 4,
+        "rows": {
+            "day": ["2026-01-01", "2026-01-02", "2026-01-03"],
+            "brutto_kwh": [1.5, 2.0, 3.25],
+            "ev_kwh": [None, 0.5, 1.0],
+        },
+    }
+
+
+def test_columnar_streams_the_first_column_and_spools_the_rest_to_disk(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(formats, "COLUMN_SPOOL_BYTES", 16)
+    rows = [(date(2026, 1, 1 + index), index * 0.5, None if index % 3 else float(index)) for index in range(28)]
+    batches_read = 0
+
+    def batches() -> Iterator[list[tuple[object, ...]]]:
+        nonlocal batches_read
+        for start in range(0, len(rows), 7):
+            batches_read += 1
+            yield rows[start : start + 7]
+
+    chunks = formats.encode_json_columns(SeriesStream(meta={}, rows_key="rows", columns=COLUMNS, batches=batches()))
+    head, first_days = next(chunks), next(chunks)
+
+    # The first batch's days are sent before the next batch is read from the cursor.
+    assert batches_read == 1
+    assert head == b'{"rows":{"day":['
+    assert first_days.startswith(b'"2026-01-01","2026-01-02"')
+    assert json_codec.loads(head + first_days + b"".join(chunks)) == {
+        "rows": {
+            "day": [row[0].isoformat() for row in rows],
+            "brutto_kwh": [row[1] for row in rows],
+            "ev_kwh": [row[2] for row in rows],
+        }
+    }
+
+
+def test_empty_series_still_encodes_valid_documents() -> None:
+    empty = SeriesStream(meta={"from": "2026-01-01"}, rows_key="points", columns=COLUMNS, batches=iter([]))
+    columnar = SeriesStream(meta={}, rows_key="points", columns=COLUMNS, batches=iter([]))
+
+    assert json_codec.loads(b"".join(formats.encode_json_rows(empty))) == {"from": "2026-01-01", "points": []}
+    assert json_codec.loads(b"".join(formats.encode_json_columns(columnar))) == {
+        "points": {"day": [], "brutto_kwh": [], "ev_kwh": []}
+    }
+
+
+def test_accept_header_is_negotiated_by_quality() -> None:
+    assert negotiate_format(None).name == "json"
+    assert negotiate_format("text/html, */*;q=0.1").name == "json"
+    assert negotiate_format("application/json;q=0.5, application/vnd.orkunotkun.columnar+json").name == "columnar"
+    assert negotiate_format("application/vnd.orkunotkun.columnar+json;q=0, application/json").name == "json"
+
+
+def test_explicit_format_wins_and_unknown_formats_are_rejected() -> None:
+    assert negotiate_format("application/json", "columnar").name == "columnar"
+    with pytest.raises(UnsupportedFormat):
+        negotiate_format(None, "xml")
+
+
+def test_binary_formats_fall_back_to_json_when_not_installed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(formats, "_load_msgpack", lambda: None)
+
+    assert negotiate_format("application/msgpack, application/json;q=0.1").name == "json"
+    with pytest.raises(UnsupportedFormat):
+        negotiate_format(None, "msgpack")
+
+
+def test_msgpack_stream_is_a_header_followed_by_rows() -> None:
+    msgpack = pytest.importorskip("msgpack")
+
+    unpacker = msgpack.Unpacker(io.BytesIO(b"".join(SERIES_FORMATS["msgpack"].encode(_stream()))))
+
+    assert next(unpacker) == {"from": "2026-01-01", "data_version": 4, "columns": list(COLUMNS)}
+    assert list(unpacker) == [["2026-01-01", 1.5, None], ["2026-01-02", 2.0, 0.5], ["2026-01-03", 3.25, 1.0]]
+
+
+def test_arrow_stream_keeps_native_time_types() -> None:
+    pyarrow = pytest.importorskip("pyarrow")
+    stream = SeriesStream(
+        meta={"resolution": "hour"},
+        rows_key="points",
+        columns=("bucket_start", "brutto_kwh"),
+        batches=iter([[(datetime(2026, 1, 1, 0), 1.0)], [(datetime(2026, 1, 1, 1), None)]]),
+    )
+
+    table = pyarrow.ipc.open_stream(b"".join(SERIES_FORMATS["arrow"].encode(stream))).read_all()
+
+    assert table.column("bucket_start").to_pylist() == [datetime(2026, 1, 1, 0), datetime(2026, 1, 1, 1)]
+    assert table.column("brutto_kwh").to_pylist() == [1.0, None]
+    assert table.schema.metadata == {b"resolution": b"hour"}
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+import pytest
+
+from app.api.sync_jobs import SyncJobManager, format_sse
+from app.ingest.db import SourceWriteResult
+
+
+
+class FakeRunner:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.sources: list[tuple[str, ...] | None] = []
+        self.forced: list[bool] = []
+        self.release = asyncio.Event()
+
+    async def __call__(
+        self,
+        force: bool,
+        sources: tuple[str, ...] | None,
+        on_result: Callable[[SourceWriteResult], None],
+    ) -> list[SourceWriteResult]:
+        self.calls += 1
+        self.sources.append(sources)
+        self.forced.append(force)
+        first = SourceWriteResult(source_name="hsveitur", status="success", rows_written=24)
+        on_result(first)
+        await self.release.wait()
+        second = SourceWriteResult(source_name="weather", status="skipped", rows_written=0, message="fresh")
+        on_result(second)
+        return [first, second]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_join_the_running_job() -> None:
+    runner = FakeRunner()
+    manager = SyncJobManager(runner)
+
+    job, joined = manager.start_or_join()
+    same_job, joined_again = manager.start_or_join()
+    await asyncio.sleep(0)
+
+    assert (joined, joined_again) == (False, True)
+    assert same_job is job
+    assert runner.calls == 1
+
+    runner.release.set()
+    await asyncio.sleep(0.01)
+    next_job, joined_after_finish = manager.start_or_join()
+
+    assert job.status == "finished"
+    assert next_job is not job and not joined_after_finish
+
+
+@pytest.mark.asyncio
+async def test_event_stream_replays_past_results_and_follows_new_ones() -> None:
+    runner = FakeRunner()
+    manager = SyncJobManager(runner)
+    job, _ = manager.start_or_join()
+    await asyncio.sleep(0)
+
+    async def collect() -> list[tuple[str, str]]:
+        return [(event, payload.get("source") or payload["status"]) async for event, payload in job.events()]
+
+    collector = asyncio.create_task(collect())
+    await asyncio.sleep(0)
+    runner.release.set()
+
+    assert await asyncio.wait_for(collector, timeout=1) == [
+        ("source", "hsveitur"),
+        ("source", "weather"),
+        ("done", "finished"),
+    ]
+    assert manager.get(job.id) is job
+
+
+@pytest.mark.asyncio
+async def test_runner_failure_marks_job_failed() -> None:
+    async def failing_runner(
+        force: bool,
+        sources: tuple[str, ...] | None,
+        on_result: Callable[[SourceWriteResult], None],
+    ) -> list[SourceWriteResult]:
+        raise RuntimeError("database unavailable")
+
+    manager = SyncJobManager(failing_runner)
+    job, _ = manager.start_or_join()
+    await asyncio.sleep(0.01)
+
+    assert job.status == "failed"
+    assert job.error == "database unavailable"
+
+
+@pytest.mark.asyncio
+async def test_job_for_uncovered_sources_queues_behind_the_running_job() -> None:
+    runner = FakeRunner()
+    manager = SyncJobManager(runner)
+
+    scheduled, _ = manager.start_or_join(sources=("zaptec",))
+    same_sources, joined_same = manager.start_or_join(sources=("zaptec",))
+    full, joined_full = manager.start_or_join()
+    await asyncio.sleep(0)
+
+    assert same_sources is scheduled and joined_same
+    assert not joined_full and full.status == "queued"
+    assert runner.sources == [("zaptec",)]
+
+    runner.release.set()
+    await asyncio.wait_for(full.wait(), timeout=1)
+
+    assert scheduled.status == "finished"
+    assert runner.sources == [("zaptec",), None]
+
+
+
+@pytest.mark.asyncio
+async def test_forced_request_queues_behind_a_running_unforced_job() -> None:
+    runner = FakeRunner()
+    manager = SyncJobManager(runner)
+
+    unforced, _ = manager.start_or_join()
+    forced, joined_forced = manager.start_or_join(force=True)
+    forced_again, joined_forced_again = manager.start_or_join(force=True)
+    unforced_request, joined_unforced = manager.start_or_join()
+    await asyncio.sleep(0)
+
+    assert forced is not unforced and not joined_forced and forced.status == "queued"
+    # Once a forced job is current, both forced and unforced requests join it.
+    assert (forced_again, joined_forced_again) == (forced, True)
+    assert (unforced_request, joined_unforced) == (forced, True)
+
+    runner.release.set()
+    await asyncio.wait_for(forced.wait(), timeout=1)
+
+    assert runner.forced == [False, True]
+
+
+def test_format_sse_frames_event_and_json_payload() -> None:
+    assert format_sse("done", {"status": "finished"}) == b'event: done\ndata: {"status":"finished"}\n\n'
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import datetime, UTC
+
+from app.ingest.batches import HotWaterBatch
+from app.ingest.run_backfill import _normalize_veitur_history_rows
+
+
+def _reading(reading_date: str, reading_value: float, usage: float = 0, reading_days: int = 0) -> dict:
+    return {
+        "readingDate": reading_date,
+        "readingValue": reading_value,
+        "usage": usage,
+        "readingDays": reading_days,
+    }
+
+
+def test_usage_is_derived_from_consecutive_reading_values() -> None:
+    batch, derived = _normalize_veitur_history_rows(
+        HotWaterBatch.from_reading_history(
+            [_reading("2026-01-20T00:00:00", 112.5), _reading("2026-01-10T00:00:00", 110.0)]
+        )
+    )
+
+    assert derived == 1
+    assert [measured_at.day for measured_at in batch.measured_at] == [10, 20]
+    assert batch.period_usage_values[1] == 2.5
+    assert batch.interval_days[1] == 10
+    assert batch.interval_start_at[1] == datetime(2026, 1, 10, tzinfo=UTC)
+
+
+def test_stored_reading_seeds_the_first_delta() -> None:
+    previous_reading = (datetime(2026, 1, 10, tzinfo=UTC), 110.0)
+    batch, derived = _normalize_veitur_history_rows(
+        HotWaterBatch.from_reading_history([_reading("2026-01-20T00:00:00", 113.0)]),
+        previous_reading=previous_reading,
+    )
+
+    assert derived == 1
+    assert batch.period_usage_values == [3.0]
+    assert batch.interval_start_at == [previous_reading[0]]
+
+
+def test_rows_at_or_before_the_stored_reading_are_not_rewritten() -> None:
+    previous_reading = (datetime(2026, 1, 10, tzinfo=UTC), 110.0)
+    batch, _ = _normalize_veitur_history_rows(
+        HotWaterBatch.from_reading_history(
+            [_reading("2026-01-10T00:00:00", 110.0), _reading("2026-01-20T00:00:00", 113.0)]
+        ),
+        previous_reading=previous_reading,
+    )
+
+    assert [measured_at.day for measured_at in batch.measured_at] == [20]
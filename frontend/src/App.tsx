@@ -5,7 +5,14 @@ import { KpiCard } from './components/KpiCard';
 import { Panel } from './components/Panel';
 import { getDashboardData } from './data/dashboardAdapter';
 import { hasSupabaseConfig } from './data/supabaseClient';
-import type { DashboardData, DatePreset, IngestionAuditItem, SourceStatusItem } from './types';
+import type {
+  DashboardData,
+  DatePreset,
+  IngestionAuditItem,
+  SourceStatusItem,
+  SyncJob,
+  SyncSourceResult,
+} from './types';
 
 const presetOptions: Array<{ value: DatePreset; label: string }> = [
   { value: 'thisMonth', label: 'Þessi mánuður' },
@@ -65,6 +72,27 @@ function auditDuration(item: IngestionAuditItem): string {
   return `${seconds}s`;
 }
 
+function followSyncJob(
+  backendUrl: string,
+  jobId: string,
+  onSource: (source: SyncSourceResult) => void,
+): Promise<SyncJob> {
+  return new Promise((resolve, reject) => {
+    const events = new EventSource(`${backendUrl}/sync-data/${jobId}/events`);
+    events.addEventListener('source', (event) => {
+      onSource(JSON.parse((event as MessageEvent<string>).data) as SyncSourceResult);
+    });
+    events.addEventListener('done', (event) => {
+      events.close();
+      resolve(JSON.parse((event as MessageEvent<string>).data) as SyncJob);
+    });
+    events.onerror = () => {
+      events.close();
+      reject(new Error('Lost connection to sync progress stream'));
+    };
+  });
+}
+
 export default function App(): ReactElement {
   const [preset, setPreset] = useState<DatePreset>('thisMonth');
   const [expandedAuditId, setExpandedAuditId] = useState<number | null>(null);
@@ -134,11 +162,18 @@ export default function App(): ReactElement {
         throw new Error(errorText || `Sync request failed (${response.status})`);
       }
 
-      const payload = (await response.json()) as {
-        sources?: Array<{ rows_written?: number }>;
-      };
+      const job = (await response.json()) as { job_id: string; joined?: boolean };
+      setSyncMessageType('success');
+      setSyncMessage(job.joined ? 'Sync already running, following it…' : 'Sync started…');
+
+      const finishedJob = await followSyncJob(backendUrl, job.job_id, (source) => {
+        setSyncMessage(`Syncing… ${source.source}: ${formatStatus(source.status)} (${source.rows_written || 0} rows)`);
+      });
+      if (finishedJob.status === 'failed') {
+        throw new Error(finishedJob.error || 'Sync job failed');
+      }
 
-      const totalRows = (payload.sources || []).reduce((sum, source) => sum + (source.rows_written || 0), 0);
+      const totalRows = (finishedJob.sources || []).reduce((sum, source) => sum + (source.rows_written || 0), 0);
       setSyncMessageType('success');
       setSyncMessage(`Sync completed. ${totalRows} rows processed.`);
 
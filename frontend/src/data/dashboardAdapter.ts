@@ -37,6 +37,26 @@ type IngestionRunRow = {
   details: Record<string, unknown> | null;
 };
 
+type KpiCardRow = {
+  key: KpiCardData['key'];
+  label: string;
+  value: number;
+  unit: string;
+  delta_percent: number | null;
+  as_of_day?: string | null;
+};
+
+type DashboardBundle = {
+  kpis: {
+    range: { start: string; end: string };
+    kpis: KpiCardRow[];
+    rolling_series: Array<{ day: string; average_kwh: number | null }>;
+  };
+  daily: DashboardRow[];
+  source_status: SourceStatusRow[];
+  ingestion_runs: IngestionRunRow[];
+};
+
 type DateRange = {
   start: string;
   end: string;
@@ -45,6 +65,8 @@ type DateRange = {
   rollingStart: string;
 };
 
+const backendUrl = (import.meta.env.VITE_BACKEND_URL || '').replace(/\/$/, '');
+
 function formatDay(date: Date): string {
   return date.toISOString().slice(0, 10);
 }
@@ -211,7 +233,54 @@ function mapIngestionRuns(rows: IngestionRunRow[]): IngestionAuditItem[] {
   }));
 }
 
+function mapBundle(bundle: DashboardBundle): DashboardData {
+  const { range } = bundle.kpis;
+  const rollingByDay = new Map(bundle.kpis.rolling_series.map((point) => [point.day, point.average_kwh]));
+  const currentPeriod = mapRows(bundle.daily)
+    .filter((row) => row.day >= range.start && row.day <= range.end)
+    .map((row) => ({ ...row, threeMonthAverageKwh: rollingByDay.get(row.day) ?? null }));
+
+  const kpis = bundle.kpis.kpis.map((card) => ({
+    key: card.key,
+    label: card.key === 'weather' && card.as_of_day ? `Weather (${formatWeatherTimestamp(card.as_of_day)})` : card.label,
+    value: card.value,
+    unit: card.unit,
+    deltaPercent: card.delta_percent,
+  }));
+
+  return {
+    kpis,
+    energySeries: currentPeriod,
+    hotWaterSeries: currentPeriod,
+    evSeries: currentPeriod,
+    sourceStatus: dedupeLatestStatuses(bundle.source_status),
+    ingestionAudit: mapIngestionRuns(bundle.ingestion_runs),
+    hasAnyData: currentPeriod.length > 0,
+    lastUpdatedAt: new Date().toISOString(),
+  };
+}
+
+async function getDashboardBundle(preset: DatePreset): Promise<DashboardData | null> {
+  try {
+    const response = await fetch(`${backendUrl}/dashboard/bundle?preset=${preset}`);
+    if (!response.ok) {
+      return null;
+    }
+    return mapBundle((await response.json()) as DashboardBundle);
+  } catch {
+    return null;
+  }
+}
+
 export async function getDashboardData(preset: DatePreset): Promise<DashboardData> {
+  // One backend request when the API is configured; the Supabase views remain the fallback.
+  if (backendUrl) {
+    const bundled = await getDashboardBundle(preset);
+    if (bundled) {
+      return bundled;
+    }
+  }
+
   if (!hasSupabaseConfig || !supabase) {
     return mockDashboardData;
   }
@@ -228,6 +297,7 @@ export async function getDashboardData(preset: DatePreset): Promise<DashboardDat
     supabase
       .from('source_status')
       .select('source_name,checked_at,status,message')
+      .neq('status', 'skipped')
       .order('checked_at', { ascending: false })
       .limit(100),
     supabase
@@ -48,3 +48,17 @@ export type DashboardData = {
   hasAnyData: boolean;
   lastUpdatedAt: string;
 };
+
+export type SyncSourceResult = {
+  source: string;
+  status: string;
+  rows_written?: number;
+  message?: string | null;
+};
+
+export type SyncJob = {
+  job_id: string;
+  status: 'queued' | 'running' | 'finished' | 'failed';
+  error?: string | null;
+  sources?: SyncSourceResult[];
+};
@@ -0,0 +1,25 @@
+begin;
+
+-- Raw tables are appended in time order, so block ranges map closely to time
+-- ranges. BRIN indexes stay a few pages in size regardless of row count and
+-- serve the range scans done by the daily views and incremental sync.
+-- The existing btree indexes are kept until benchmarks/brin_vs_btree.py has
+-- been run against production-sized data.
+
+create index if not exists idx_electricity_raw_measured_at_brin
+  on energy.electricity_raw using brin (measured_at)
+  with (pages_per_range = 32, autosummarize = on);
+
+create index if not exists idx_weather_raw_measured_at_brin
+  on energy.weather_raw using brin (measured_at)
+  with (pages_per_range = 32, autosummarize = on);
+
+create index if not exists idx_hot_water_raw_measured_at_brin
+  on energy.hot_water_raw using brin (measured_at)
+  with (autosummarize = on);
+
+create index if not exists idx_ev_charger_raw_started_at_brin
+  on energy.ev_charger_raw using brin (started_at)
+  with (autosummarize = on);
+
+commit;
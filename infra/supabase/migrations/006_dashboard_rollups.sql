@@ -0,0 +1,193 @@
+begin;
+
+-- Multi-resolution rollups for long-range dashboard reads.
+-- bucket_start is local Atlantic/Reykjavik wall-clock time:
+--   hour  -> start of the hour
+--   day   -> midnight of the day
+--   week  -> midnight of the ISO week's Monday
+--   month -> midnight of the first day of the month
+-- Hot water has no hourly resolution upstream, so hour buckets leave it null.
+
+create table if not exists energy.dashboard_rollups (
+  resolution text not null check (resolution in ('hour', 'day', 'week', 'month')),
+  bucket_start timestamp not null,
+  brutto_kwh numeric(14, 4) not null default 0,
+  ev_kwh numeric(14, 4) not null default 0,
+  netto_kwh numeric(14, 4) not null default 0,
+  hot_water_usage numeric(14, 5),
+  avg_temperature_c numeric(8, 3),
+  day_count integer not null default 0,
+  refreshed_at timestamptz not null default now(),
+  primary key (resolution, bucket_start)
+);
+
+-- Rebuilds every bucket touching p_from..p_to from the raw tables and daily views.
+create or replace function energy.rebuild_dashboard_rollups(p_from date, p_to date)
+returns integer
+language plpgsql
+as $$
+declare
+  range_start timestamptz := p_from::timestamp at time zone 'Atlantic/Reykjavik';
+  range_end timestamptz := (p_to + 1)::timestamp at time zone 'Atlantic/Reykjavik';
+  week_from date := date_trunc('week', p_from)::date;
+  week_to date := (date_trunc('week', p_to) + interval '1 week')::date;
+  month_from date := date_trunc('month', p_from)::date;
+  month_to date := (date_trunc('month', p_to) + interval '1 month')::date;
+  rows_refreshed integer := 0;
+  step_rows integer;
+begin
+  -- Hourly buckets come straight from the hourly raw rows; an hour exists when any source has rows in it.
+  delete from energy.dashboard_rollups
+  where resolution = 'hour'
+    and bucket_start >= p_from::timestamp
+    and bucket_start < (p_to + 1)::timestamp;
+
+  insert into energy.dashboard_rollups (
+    resolution, bucket_start, brutto_kwh, ev_kwh, netto_kwh, hot_water_usage, avg_temperature_c, day_count
+  )
+  with electricity as (
+    select
+      date_trunc('hour', measured_at at time zone 'Atlantic/Reykjavik') as bucket_start,
+      sum(coalesce(delta_kwh, 0)) as brutto_kwh
+    from energy.electricity_raw
+    where measured_at >= range_start and measured_at < range_end
+    group by 1
+  ), ev as (
+    select
+      date_trunc('hour', coalesce(started_at, finished_at) at time zone 'Atlantic/Reykjavik') as bucket_start,
+      sum(coalesce(energy_kwh, 0)) as ev_kwh
+    from energy.ev_charger_raw
+    where coalesce(started_at, finished_at) >= range_start and coalesce(started_at, finished_at) < range_end
+    group by 1
+  ), weather as (
+    select
+      date_trunc('hour', measured_at at time zone 'Atlantic/Reykjavik') as bucket_start,
+      avg(temperature_c) as avg_temperature_c
+    from energy.weather_raw
+    where measured_at >= range_start and measured_at < range_end
+    group by 1
+  ), hours as (
+    select bucket_start from electricity
+    union
+    select bucket_start from ev
+    union
+    select bucket_start from weather
+  )
+  select
+    'hour',
+    hours.bucket_start,
+    coalesce(electricity.brutto_kwh, 0),
+    coalesce(ev.ev_kwh, 0),
+    coalesce(electricity.brutto_kwh, 0) - coalesce(ev.ev_kwh, 0),
+    null,
+    weather.avg_temperature_c,
+    0
+  from hours
+  left join electricity on electricity.bucket_start = hours.bucket_start
+  left join ev on ev.bucket_start = hours.bucket_start
+  left join weather on weather.bucket_start = hours.bucket_start;
+
+  get diagnostics step_rows = row_count;
+  rows_refreshed := rows_refreshed + step_rows;
+
+  -- Daily buckets mirror energy.dashboard_daily for the refreshed days. The hourly tables are
+  -- aggregated here over their rows in range, because a filter on their daily views is only
+  -- applied after the views group the whole history.
+  delete from energy.dashboard_rollups
+  where resolution = 'day'
+    and bucket_start >= p_from::timestamp
+    and bucket_start <= p_to::timestamp;
+
+  insert into energy.dashboard_rollups (
+    resolution, bucket_start, brutto_kwh, ev_kwh, netto_kwh, hot_water_usage, avg_temperature_c, day_count
+  )
+  with electricity as (
+    select
+      date_trunc('day', measured_at at time zone 'Atlantic/Reykjavik')::date as day,
+      sum(coalesce(delta_kwh, 0))::numeric(14, 4) as brutto_kwh
+    from energy.electricity_raw
+    where measured_at >= range_start and measured_at < range_end
+    group by 1
+  ), ev as (
+    select
+      date_trunc('day', coalesce(started_at, finished_at) at time zone 'Atlantic/Reykjavik')::date as day,
+      sum(coalesce(energy_kwh, 0))::numeric(14, 4) as ev_kwh
+    from energy.ev_charger_raw
+    where coalesce(started_at, finished_at) >= range_start and coalesce(started_at, finished_at) < range_end
+    group by 1
+  ), hot as (
+    -- hot_water_daily spreads each reading over the days of its interval, which may start
+    -- before the range; the table holds one row per meter reading, so the view stays cheap.
+    select day, hot_water_usage
+    from energy.hot_water_daily
+    where day between p_from and p_to
+  ), weather as (
+    select
+      date_trunc('day', measured_at at time zone 'Atlantic/Reykjavik')::date as day,
+      avg(temperature_c)::numeric(8, 3) as avg_temperature_c
+    from energy.weather_raw
+    where measured_at >= range_start and measured_at < range_end
+    group by 1
+  )
+  select
+    'day',
+    electricity.day::timestamp,
+    electricity.brutto_kwh,
+    coalesce(ev.ev_kwh, 0),
+    electricity.brutto_kwh - coalesce(ev.ev_kwh, 0),
+    coalesce(hot.hot_water_usage, 0),
+    weather.avg_temperature_c,
+    1
+  from electricity
+  left join ev on ev.day = electricity.day
+  left join hot on hot.day = electricity.day
+  left join weather on weather.day = electricity.day;
+
+  get diagnostics step_rows = row_count;
+  rows_refreshed := rows_refreshed + step_rows;
+
+  -- Week and month buckets touching the refreshed days are rebuilt from the day buckets.
+  delete from energy.dashboard_rollups
+  where (resolution = 'week' and bucket_start >= week_from::timestamp and bucket_start < week_to::timestamp)
+     or (resolution = 'month' and bucket_start >= month_from::timestamp and bucket_start < month_to::timestamp);
+
+  insert into energy.dashboard_rollups (
+    resolution, bucket_start, brutto_kwh, ev_kwh, netto_kwh, hot_water_usage, avg_temperature_c, day_count
+  )
+  select
+    coarse.resolution,
+    date_trunc(coarse.resolution, day_rollup.bucket_start),
+    sum(day_rollup.brutto_kwh),
+    sum(day_rollup.ev_kwh),
+    sum(day_rollup.netto_kwh),
+    sum(day_rollup.hot_water_usage),
+    avg(day_rollup.avg_temperature_c),
+    count(*)
+  from (values ('week', week_from, week_to), ('month', month_from, month_to)) as coarse(resolution, from_day, to_day)
+  join energy.dashboard_rollups day_rollup
+    on day_rollup.resolution = 'day'
+   and day_rollup.bucket_start >= coarse.from_day::timestamp
+   and day_rollup.bucket_start < coarse.to_day::timestamp
+  group by coarse.resolution, date_trunc(coarse.resolution, day_rollup.bucket_start);
+
+  get diagnostics step_rows = row_count;
+  rows_refreshed := rows_refreshed + step_rows;
+
+  return rows_refreshed;
+end;
+$$;
+
+-- The entry point the ingestion runs call; later migrations may narrow the range it rebuilds.
+create or replace function energy.refresh_dashboard_rollups(p_from date, p_to date)
+returns integer
+language sql
+as $$
+  select energy.rebuild_dashboard_rollups(p_from, p_to)
+$$;
+
+-- Initial population from the existing daily layer.
+select energy.refresh_dashboard_rollups(min(day), max(day))
+from energy.dashboard_daily
+having count(*) > 0;
+
+commit;
@@ -0,0 +1,41 @@
+begin;
+
+-- Retention bookkeeping for app.ingest.run_retention.
+-- source_payload_archived_at marks rows whose source_payload was replaced by '{}'
+-- after the original was written to a local archive file (or dropped, for weather
+-- where the payload only repeats the typed columns).
+
+alter table energy.electricity_raw add column if not exists source_payload_archived_at timestamptz;
+alter table energy.ev_charger_raw add column if not exists source_payload_archived_at timestamptz;
+alter table energy.hot_water_raw add column if not exists source_payload_archived_at timestamptz;
+alter table energy.weather_raw add column if not exists source_payload_archived_at timestamptz;
+
+-- Hourly raw rows older than downsampled_before have been deleted; their history
+-- only survives in energy.dashboard_rollups.
+create table if not exists energy.retention_state (
+  source_table text primary key,
+  downsampled_before date,
+  updated_at timestamptz not null default now()
+);
+
+create or replace function energy.rollups_frozen_before()
+returns date
+language sql
+stable
+as $$
+  select max(downsampled_before) from energy.retention_state
+$$;
+
+-- Hour and day buckets before the downsampling watermark keep their rollups, because
+-- their raw rows no longer exist; the rebuild from migration 006 starts at the watermark.
+create or replace function energy.refresh_dashboard_rollups(p_from date, p_to date)
+returns integer
+language sql
+as $$
+  select case
+    when greatest(p_from, energy.rollups_frozen_before()) > p_to then 0
+    else energy.rebuild_dashboard_rollups(greatest(p_from, energy.rollups_frozen_before()), p_to)
+  end
+$$;
+
+commit;
@@ -0,0 +1,11 @@
+begin;
+
+-- Freshness-aware sync records sources it did not call as 'skipped'.
+-- Skipped rows are neutral: they are not a success, failure or partial result.
+
+alter table energy.source_status drop constraint if exists source_status_status_check;
+alter table energy.source_status
+  add constraint source_status_status_check
+  check (status in ('success', 'failed', 'partial', 'empty', 'skipped'));
+
+commit;
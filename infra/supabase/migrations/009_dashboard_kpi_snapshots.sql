@@ -0,0 +1,38 @@
+begin;
+
+-- KPI cards for each dashboard date preset, precomputed after every ingestion run
+-- by app.dashboard.kpi_snapshots so the dashboard reads one row instead of months
+-- of daily data. as_of is the local day the preset ranges were resolved for.
+
+create table if not exists energy.dashboard_kpi_snapshots (
+  preset text not null check (preset in ('thisMonth', 'last30Days', 'last3Months')),
+  as_of date not null,
+  run_id bigint references energy.ingestion_runs (id) on delete set null,
+  computed_at timestamptz not null default now(),
+  range_start date not null,
+  range_end date not null,
+  compare_start date not null,
+  compare_end date not null,
+  rolling_start date not null,
+  day_count integer not null default 0,
+  brutto_kwh numeric(14, 2) not null default 0,
+  netto_kwh numeric(14, 2) not null default 0,
+  ev_kwh numeric(14, 2) not null default 0,
+  hot_water_usage numeric(14, 2) not null default 0,
+  latest_temperature_c numeric(8, 1),
+  latest_temperature_day date,
+  previous_brutto_kwh numeric(14, 2) not null default 0,
+  previous_netto_kwh numeric(14, 2) not null default 0,
+  previous_ev_kwh numeric(14, 2) not null default 0,
+  previous_hot_water_usage numeric(14, 2) not null default 0,
+  brutto_delta_percent numeric(10, 1),
+  netto_delta_percent numeric(10, 1),
+  ev_delta_percent numeric(10, 1),
+  hot_water_delta_percent numeric(10, 1),
+  -- Latest day's average daily brutto over the preceding 90 days, and the same per range day.
+  rolling_average_kwh numeric(14, 2),
+  rolling_series jsonb not null default '[]'::jsonb,
+  primary key (preset, as_of)
+);
+
+commit;